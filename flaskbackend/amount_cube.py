@@ -0,0 +1,294 @@
+"""
+금액 이력 큐브 (계열 × 월, 읽기 전용 memory-map)
+
+- 피처 스토어 frame을 계열(cost_center|account_code) × 월(YYYY-MM) 배열로 내보냄
+    amount.npy  : float64, 행이 없는 칸은 NaN
+    present.npy : bool, 해당 월에 행이 있었는지(금액 NaN 행과 '행 없음' 구분용)
+    anomaly.npy : bool, 저장 시점의 anomaly_flag
+    keys.npy    : 계열 키 "cost_center|account_code" (문자열 정렬, 이진 탐색용)
+    months.npy  : 월 목록(정렬)
+- np.load(mmap_mode="r")로 열기 때문에 같은 서버의 여러 워커(gunicorn)가
+  같은 파일 페이지(page cache)를 공유하고, 프로세스별 DataFrame 사본을 만들지 않음
+- 내보내기는 새 디렉터리에 쓴 뒤 포인터(current.json)만 원자적으로 교체
+  → 이미 매핑 중인 워커는 이전 디렉터리를 계속 읽고, 다음 조회 때 새 포인터로 다시 매핑
+
+증분 분석(신규 월)에서 이력만 필요한 단계(이력 통계 / 밴드 / 전월 / 룩백)는
+대상 계열 행만 큐브에서 꺼내(gather) 계산 → 결과는 long DataFrame 단계 함수와 같음
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from key_codec import as_key_str
+
+CUBE_VERSION = 1
+
+POINTER_NAME = "current.json"
+
+# 이전 내보내기 디렉터리는 최근 것만 남김(이전 포인터로 매핑 중인 워커용)
+KEEP_EXPORTS = 2
+
+KEY_COLS = ["cost_center", "account_code"]
+
+
+def series_keys(cost_center: pd.Series, account_code: pd.Series) -> np.ndarray:
+    """
+    계열 키 "cost_center|account_code" (이력 응답 row_key와 같은 형식)
+    """
+    cc = as_key_str(cost_center).astype(str).to_numpy(dtype=object)
+    acc = as_key_str(account_code).astype(str).to_numpy(dtype=object)
+    return (cc + "|" + acc).astype(str)
+
+
+# ============================================================
+# 1. 내보내기
+# ============================================================
+def export_amount_cube(root: Path, df: pd.DataFrame, manifest: List[Tuple[str, int, int]]) -> Optional[Dict[str, Any]]:
+    """
+    long frame → 큐브 파일 + 포인터 갱신, 반환: 포인터 메타(같은 계열·월 중복 행이 있으면 None)
+    """
+    root = Path(root)
+    if df.duplicated(KEY_COLS + ["year_month"]).any():
+        print("[amount_cube] 계열·월 중복 행이 있어 큐브를 만들지 않습니다.")
+        return None
+
+    key_idx, keys = pd.factorize(series_keys(df["cost_center"], df["account_code"]), sort=True)
+    month_idx, months = pd.factorize(as_key_str(df["year_month"]).astype(str).to_numpy(dtype=object), sort=True)
+    shape = (len(keys), len(months))
+
+    amount = np.full(shape, np.nan)
+    amount[key_idx, month_idx] = pd.to_numeric(df["amount"], errors="coerce").to_numpy(dtype=float)
+    present = np.zeros(shape, dtype=bool)
+    present[key_idx, month_idx] = True
+    anomaly = np.zeros(shape, dtype=bool)
+    if "anomaly_flag" in df.columns:
+        anomaly[key_idx, month_idx] = df["anomaly_flag"].astype(bool).to_numpy()
+
+    tag = f"{datetime.now():%Y%m%d%H%M%S%f}_{os.getpid()}_{threading.get_ident()}"
+    tmp_dir = root / f".{tag}.tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    np.save(tmp_dir / "amount.npy", amount)
+    np.save(tmp_dir / "present.npy", present)
+    np.save(tmp_dir / "anomaly.npy", anomaly)
+    np.save(tmp_dir / "keys.npy", np.asarray(keys, dtype=str))
+    np.save(tmp_dir / "months.npy", np.asarray(months, dtype=str))
+    os.replace(tmp_dir, root / tag)
+
+    meta = {
+        "version": CUBE_VERSION,
+        "dir": tag,
+        "manifest": [list(x) for x in manifest],
+        "n_series": shape[0],
+        "n_months": shape[1],
+        "last_ym": str(months[-1]) if len(months) else None,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    pointer = root / POINTER_NAME
+    # 워커마다 다른 임시 파일에 쓴 뒤 교체 → 동시에 내보내도 포인터 JSON이 섞이지 않음
+    tmp_pointer = pointer.with_name(f"{pointer.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_pointer, pointer)
+
+    _prune_exports(root, keep=tag)
+    return meta
+
+
+def _prune_exports(root: Path, keep: str) -> None:
+    dirs = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for p in dirs[:-KEEP_EXPORTS]:
+        if p.name == keep:
+            continue
+        # 매핑 중인 파일은 POSIX에서는 unmap 때까지 유지, Windows에서는 삭제 실패 → 다음 내보내기 때 재시도
+        shutil.rmtree(p, ignore_errors=True)
+
+
+# ============================================================
+# 2. 매핑 / 조회
+# ============================================================
+def read_cube_pointer(root: Path) -> Optional[Dict[str, Any]]:
+    pointer = Path(root) / POINTER_NAME
+    if not pointer.exists():
+        return None
+    try:
+        with open(pointer, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception as e:
+        print("[amount_cube] pointer load error:", e)
+        return None
+    return meta if meta.get("version") == CUBE_VERSION else None
+
+
+class AmountCube:
+    def __init__(self, path: Path, meta: Dict[str, Any]):
+        self.path = Path(path)
+        self.meta = meta
+        self.tag = meta["dir"]
+        self.amount = np.load(self.path / "amount.npy", mmap_mode="r")
+        self.present = np.load(self.path / "present.npy", mmap_mode="r")
+        self.anomaly = np.load(self.path / "anomaly.npy", mmap_mode="r")
+        self.keys = np.load(self.path / "keys.npy", mmap_mode="r")
+        self.months: List[str] = np.load(self.path / "months.npy").tolist()
+
+    def rows(self, cost_center: pd.Series, account_code: pd.Series) -> np.ndarray:
+        """
+        계열 → 큐브 행 번호 (없는 계열은 -1)
+        """
+        q = series_keys(cost_center, account_code)
+        if not len(self.keys):
+            return np.full(len(q), -1, dtype=np.int64)
+        pos = np.searchsorted(self.keys, q)
+        pos_c = np.minimum(pos, len(self.keys) - 1)
+        return np.where(self.keys[pos_c] == q, pos_c, -1).astype(np.int64)
+
+    def gather(self, df: pd.DataFrame, before_ym: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        df 행마다 해당 계열의 before_ym 이전 이력 (len(df) × 월) - 없는 계열은 빈 이력
+        매핑된 배열에서 필요한 행·월 구간만 복사
+        """
+        rows = self.rows(df["cost_center"], df["account_code"])
+        hi = len(self.months) if before_ym is None else int(np.searchsorted(self.months, str(before_ym)))
+        hit = rows >= 0
+
+        out = {
+            "amount": np.full((len(rows), hi), np.nan),
+            "present": np.zeros((len(rows), hi), dtype=bool),
+            "anomaly": np.zeros((len(rows), hi), dtype=bool),
+        }
+        for name, arr in out.items():
+            arr[hit] = getattr(self, name)[rows[hit], :hi]
+        return out
+
+
+def open_amount_cube(
+    root: Path, manifest: List[Tuple[str, int, int]], current: Optional[AmountCube] = None
+) -> Optional[AmountCube]:
+    """
+    포인터가 현재 원천 매니페스트와 일치할 때만 매핑 (current가 같은 디렉터리면 그대로 재사용)
+    """
+    meta = read_cube_pointer(root)
+    if meta is None or meta.get("manifest") != [list(x) for x in manifest]:
+        return None
+    if current is not None and current.tag == meta["dir"]:
+        return current
+    try:
+        return AmountCube(Path(root) / meta["dir"], meta)
+    except Exception as e:
+        print("[amount_cube] open error:", e)
+        return None
+
+
+# ============================================================
+# 3. 이력 기반 단계 (신규 월 행, 큐브 이력은 모두 대상 월 이전)
+# ============================================================
+def _last_rows(present: np.ndarray, k: int) -> np.ndarray:
+    # 계열별 마지막 k개 '행'(present 칸) 마스크
+    from_end = np.cumsum(present[:, ::-1], axis=1)[:, ::-1]
+    return present & (from_end <= k)
+
+
+def _last_value(hist: Dict[str, np.ndarray]) -> np.ndarray:
+    present = hist["present"]
+    n, m = present.shape
+    last = m - 1 - np.argmax(present[:, ::-1], axis=1) if m else np.zeros(n, dtype=int)
+    has = present.any(axis=1)
+    out = np.full(n, np.nan)
+    out[has] = hist["amount"][np.flatnonzero(has), last[has]]
+    return out
+
+
+def cube_history_stats(
+    df: pd.DataFrame, hist: Dict[str, np.ndarray], short_window: int = 3, long_window: int = 12
+) -> pd.DataFrame:
+    """
+    add_history_stats와 같은 hist_* 컬럼 (이력 = 큐브 행 전체)
+    """
+    df = df.copy()
+    amt = hist["amount"]
+    notna = ~np.isnan(amt)
+    is_zero = notna & (amt == 0.0)
+    is_nonzero = notna & ~is_zero
+
+    n_past = notna.sum(axis=1).astype(np.int64)
+    cols = np.arange(amt.shape[1])
+    last_nonzero = np.where(is_nonzero, cols, -1).max(axis=1, initial=-1)
+    consec_zero = (notna & (cols > last_nonzero[:, None])).sum(axis=1).astype(np.int64)
+
+    short = _last_rows(hist["present"], short_window)
+    long = _last_rows(hist["present"], long_window)
+
+    df["hist_n_past"] = n_past
+    df["hist_consec_zero"] = consec_zero
+    df["hist_all_zero"] = (n_past > 0) & ~is_nonzero.any(axis=1)
+    df["hist_zero_3"] = (is_zero & short).sum(axis=1).astype(np.int64)
+    df["hist_n_3"] = (notna & short).sum(axis=1).astype(np.int64)
+    df["hist_zero_12"] = (is_zero & long).sum(axis=1).astype(np.int64)
+    df["hist_n_12"] = (notna & long).sum(axis=1).astype(np.int64)
+    return df
+
+
+def _band_stats(vals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # NaN 제외 평균 / 표준편차(ddof=0), 값이 모두 같으면 pandas rolling과 같게 평균=값, 표준편차=0
+    cnt = (~np.isnan(vals)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(vals, axis=1) / cnt
+        var = np.nansum((vals - mean[:, None]) ** 2, axis=1) / cnt
+    lo = np.fmin.reduce(vals, axis=1)
+    hi = np.fmax.reduce(vals, axis=1)
+    same = cnt > 0
+    same &= lo == hi
+    mean = np.where(same, lo, mean)
+    std = np.where(same, 0.0, np.sqrt(var))
+    return mean, std
+
+
+def cube_normal_band(df: pd.DataFrame, hist: Dict[str, np.ndarray], window: int = 6) -> pd.DataFrame:
+    """
+    add_normal_band와 같은 밴드: 직전 window-1행 + 이번 행 평균 ± 2σ
+    (anomaly 행 제외, 제외 후 값이 없으면 전체 값 기준)
+    """
+    df = df.copy()
+    prev = _last_rows(hist["present"], window - 1)
+    x = df["amount"].astype(float).to_numpy()
+    flag = df["anomaly_flag"].astype(bool).to_numpy() if "anomaly_flag" in df.columns else np.zeros(len(df), dtype=bool)
+
+    vals = np.column_stack([np.where(prev, hist["amount"], np.nan), x])
+    valid = np.column_stack([np.where(prev & ~hist["anomaly"], hist["amount"], np.nan), np.where(flag, np.nan, x)])
+
+    mean_all, std_all = _band_stats(vals)
+    mean_valid, std_valid = _band_stats(valid)
+    mean_final = np.where(np.isnan(mean_valid), mean_all, mean_valid)
+    std_final = np.where(np.isnan(std_valid), std_all, std_valid)
+
+    df["normal_upper"] = mean_final + 2 * std_final
+    df["normal_lower"] = mean_final - 2 * std_final
+    return df
+
+
+def cube_prev_amount(df: pd.DataFrame, hist: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    직전 행 금액(prev_amount) - 계열별 마지막 present 칸
+    """
+    df = df.copy()
+    df["prev_amount"] = _last_value(hist)
+    return df
+
+
+def cube_lookback_flags(df: pd.DataFrame, hist: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    add_lookback_valid_flags와 같은 직전 3/12행 유효값(NaN 아님 & 0 아님) 존재 여부
+    """
+    df = df.copy()
+    amt = hist["amount"]
+    valid = ~np.isnan(amt) & (amt != 0.0)
+    for k, col in ((3, "lookback3_has_value"), (12, "lookback12_has_value")):
+        df[col] = (valid & _last_rows(hist["present"], k)).any(axis=1)
+    return df
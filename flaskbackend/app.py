@@ -20,14 +20,13 @@ import os
 import re
 import io
 import sys
-import pickle
 import threading
 import subprocess
 import traceback
 import json
-from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Tuple, Dict, Any, List, Optional
+from typing import Callable, Tuple, Dict, Any, List, Optional
 
 import pandas as pd
 import numpy as np
@@ -62,9 +61,44 @@ from cost_center import (
     parse_cost_center_excel,   # (호환용) 필요시 사용
     detect_potential_missing,
     build_features,
-    compute_corr_pairs,
+    encode_cost_nature,
+    compute_corr_pair_map,
+    attach_corr_partners,
     run_ensemble_outlier,
+    add_history_stats,
     build_human_explanations,
+    ENSEMBLE_FEATURE_COLS,
+)
+from feature_store import (
+    RAW_COLS as FEATURE_STORE_RAW_COLS,
+    source_manifest,
+    save_feature_store,
+    load_feature_store,
+    context_frame,
+    apply_series_state,
+)
+from result_cache import ResultCache, fingerprint
+from pipeline_executor import prestart_pool, run_partitioned
+from monthly_store import (
+    parse_single_month_excel,
+    sync_monthly_store,
+    load_monthly_store,
+)
+from stage_profiler import StageProfiler, run_stages, merge_partition_records, recent_runs
+from key_codec import encode_keys, decode_keys, as_key_str, key_codes, map_keys
+from dataset_versions import CacheManager
+from precompressed import compress_body, precompressed_response
+from json_encoder import install_json_provider, frame_records
+from job_manager import JobContext, JobManager, JobQueueFull, JobStore
+from result_pages import ResultLRU, parse_query, page_rows, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from amount_cube import (
+    AmountCube,
+    export_amount_cube,
+    open_amount_cube,
+    cube_history_stats,
+    cube_normal_band,
+    cube_prev_amount,
+    cube_lookback_flags,
 )
 
 # =========================
@@ -82,6 +116,20 @@ from models.closing_forecast_model import (
     forecast_next_n,
 )
 
+# =========================
+# [OK] 코스트센터 이상탐지 모델(IF + LOF) 아티팩트
+# =========================
+from models.anomaly_model import (
+    fit_anomaly_models,
+    score_anomaly,
+    save_anomaly_models,
+    artifact_stamp as anomaly_artifact_stamp,
+    load_anomaly_models,
+    needs_retrain,
+    model_info as anomaly_model_info,
+    model_stamp as anomaly_model_stamp,
+)
+
 # =========================
 # [OK] DB / Auth
 # =========================
@@ -91,11 +139,14 @@ from werkzeug.security import check_password_hash, generate_password_hash
 app = Flask(__name__, static_folder="static", static_url_path="")
 # CORS: 배포 시 프론트 URL로 origins 제한 (보안)
 CORS(app, origins=["*"])  # 배포 후: origins=["https://your-frontend-url.onrender.com"]
+# 모든 jsonify 응답을 orjson으로 직렬화(orjson 없으면 Flask 기본)
+install_json_provider(app)
 
 CACHE_DIR = BASE_DIR / "cache"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 COST_MONTHLY_DIR = BASE_DIR / "centercost_data"
+MONTHLY_STORE_DIR = CACHE_DIR / "monthly_store"
 BACKDATA_EXCEL_PATH = BASE_DIR / "3back_data_with_fake11_v2.xlsx"
 
 REPORT_DATA_DIR = BASE_DIR / "report_data"
@@ -105,6 +156,17 @@ BASE_EXCEL_PATH = str(BASE_DIR / "코스트센터_2년치_가상데이터_전체
 
 ADV_CLASS_XLSX_PATH = BASE_DIR / "코스트센터별_분류.xlsx"
 
+PREDICT_DATA_DIR = BASE_DIR / "predict_data"
+
+# 입력 데이터셋 버전 + 파생 캐시 관리 (cache/dataset_index/)
+#  - 캐시는 각 함수 정의 옆에서 register_cache로 등록
+cache_manager = CacheManager(CACHE_DIR)
+cache_manager.register_input("centercost_data", COST_MONTHLY_DIR)
+cache_manager.register_input("report_data", REPORT_DATA_DIR)
+cache_manager.register_input("predict_data", PREDICT_DATA_DIR)
+cache_manager.register_input("adv_class_xlsx", ADV_CLASS_XLSX_PATH)
+cache_manager.register_input("backdata_xlsx", BACKDATA_EXCEL_PATH)
+
 # [OK] 서버 시작 시 1회 모델 로딩
 forecast_payload = load_or_train()
 
@@ -178,63 +240,71 @@ def load_advanced_class_map(use_cache: bool = True) -> Dict[str, Dict[str, str]]
         "byCcAcc": { "CC|ACC": "고정비|변동비|시즌/이벤트성" },
         "byAcc":   { "ACC": "고정비|변동비|시즌/이벤트성" }
       }
+    캐시(advanced_class_map.pkl)는 분류 엑셀 버전이 바뀌면 다시 만듦,
+    같은 버전이면 프로세스 메모리의 값을 그대로 반환(호출 측에서 수정하지 않음)
     """
-    cache_path = get_cache_path("advanced_class_map.pkl")
+    return cache_manager.get("advanced_class_map", force=not use_cache)
 
-    if use_cache and os.path.exists(cache_path):
-        try:
-            with open(cache_path, "rb") as f:
-                payload = pickle.load(f)
-            byCcAcc = {k: v for k, v in (payload.get("byCcAcc") or {}).items() if v in _ALLOWED_ADV}
-            byAcc = {k: v for k, v in (payload.get("byAcc") or {}).items() if v in _ALLOWED_ADV}
-            return {"byCcAcc": byCcAcc, "byAcc": byAcc}
-        except Exception:
-            pass
 
-    if not ADV_CLASS_XLSX_PATH.exists():
-        return {"byCcAcc": {}, "byAcc": {}}
+def _first_nonblank(df: pd.DataFrame, aliases: List[str]) -> pd.Series:
+    """
+    별칭 컬럼 중 행마다 처음으로 비어 있지 않은 원본 값 (없으면 "")
+    """
+    out = pd.Series("", index=df.index, dtype=object)
+    filled = np.zeros(len(df), dtype=bool)
+    for k in aliases:
+        if k not in df.columns:
+            continue
+        col = df[k]
+        if isinstance(col, pd.DataFrame):
+            # 같은 이름 컬럼이 여러 개면 행 dict와 같게 마지막 컬럼
+            col = col.iloc[:, -1]
+        take = ~filled & (col.astype(str).str.strip() != "").to_numpy()
+        out[take] = col[take]
+        filled |= take
+    return out
 
-    df = pd.read_excel(str(ADV_CLASS_XLSX_PATH))
-    df = df.replace({np.nan: ""})
 
-    def pick(row, keys):
-        for k in keys:
-            if k in row and str(row.get(k)).strip() != "":
-                return row.get(k)
-        return ""
+def _as_clean_str(values: pd.Series) -> pd.Series:
+    # str(v or "").strip() 과 같음(0 / False / "" 는 빈 문자열)
+    return values.astype(str).str.strip().where(~values.isin(["", 0]), "")
 
-    by_cc_acc: Dict[str, str] = {}
-    by_acc: Dict[str, str] = {}
 
-    for _, r in df.iterrows():
-        row = r.to_dict()
+def _build_advanced_class_map(_previous=None) -> Dict[str, Dict[str, str]]:
+    if not ADV_CLASS_XLSX_PATH.exists():
+        return {"byCcAcc": {}, "byAcc": {}}
 
-        acc_raw = pick(row, ["계정코드", "account_code", "계정", "acc_code", "Code"])
-        cc_raw = pick(row, ["코스트센터코드", "코스트센터", "CC", "cost_center", "코스트센터코드값"])
-        cls_raw = pick(row, ["심화분류", "분류", "advanced", "class", "심화", "구분"])
+    df = pd.read_excel(str(ADV_CLASS_XLSX_PATH))
+    df = df.replace({np.nan: ""})
 
-        acc = str(acc_raw or "").strip()
-        cc = str(cc_raw or "").strip()
-        cls = _normalize_advanced(cls_raw)
+    acc = _as_clean_str(_first_nonblank(df, ["계정코드", "account_code", "계정", "acc_code", "Code"]))
+    cc = _as_clean_str(_first_nonblank(df, ["코스트센터코드", "코스트센터", "CC", "cost_center", "코스트센터코드값"]))
+    cls_text = _as_clean_str(_first_nonblank(df, ["심화분류", "분류", "advanced", "class", "심화", "구분"]))
 
-        if not acc or cls not in _ALLOWED_ADV:
-            continue
+    # 분류 정규화는 고유값 단위로 한 번씩만
+    cls = cls_text.map({v: _normalize_advanced(v) for v in cls_text.unique()})
 
-        if acc not in by_acc:
-            by_acc[acc] = cls
+    keep = (acc != "") & cls.isin(_ALLOWED_ADV)
+    acc, cc, cls = acc[keep], cc[keep], cls[keep]
 
-        if cc:
-            by_cc_acc[f"{cc}|{acc}"] = cls
+    # 계정 단위는 처음 나온 분류, 코스트센터|계정 단위는 마지막 분류(dict 순서는 처음 나온 순서)
+    first_acc = ~acc.duplicated(keep="first")
+    by_acc = dict(zip(acc[first_acc], cls[first_acc]))
+    has_cc = cc != ""
+    by_cc_acc = dict(zip(cc[has_cc] + "|" + acc[has_cc], cls[has_cc]))
 
-    payload = {"byCcAcc": by_cc_acc, "byAcc": by_acc}
+    return {"byCcAcc": by_cc_acc, "byAcc": by_acc}
 
-    try:
-        with open(cache_path, "wb") as f:
-            pickle.dump(payload, f)
-    except Exception:
-        pass
 
-    return payload
+# v2: 조회 시 분류값 필터를 빼고 build 결과를 그대로 반환 → 예전 코드로 만든 피클은 다시 만듦
+cache_manager.register_cache(
+    "advanced_class_map",
+    "advanced_class_map.pkl",
+    ["adv_class_xlsx"],
+    build=_build_advanced_class_map,
+    version=2,
+    memory=True,
+)
 
 
 # =====================================================
@@ -280,15 +350,6 @@ def _match_special_rule(account_name: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def _is_missing_like_amount(x) -> bool:
-    if x is None or pd.isna(x):
-        return True
-    try:
-        return float(x) == 0.0
-    except Exception:
-        return True
-
-
 def _ensure_list_tags(v):
     if v is None:
         return []
@@ -322,37 +383,114 @@ def _add_tags(existing: Any, add: List[str]) -> List[str]:
     return base
 
 
-def _infer_bimonthly_parity_for_group(g: pd.DataFrame) -> int:
+def _missing_like_mask(s: pd.Series) -> pd.Series:
+    """금액이 0/결측처럼 보이는지 컬럼 단위로 판정 (NaN/None/0/숫자 아님 → True)"""
+    num = pd.to_numeric(s, errors="coerce")
+    return num.isna() | (num == 0.0)
+
+
+def _compile_special_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    _SPECIAL_RULES를 적용용 형태로 1회 컴파일
+      - rule_desc / 케이스별 사유 문구 / 추가 태그를 미리 만들어 둠
+      - 행 단위 처리 없이 마스크 단위로 일괄 적용하기 위함
+    """
+    compiled: List[Dict[str, Any]] = []
+    for rule in rules:
+        if rule["type"] == "fixed_months":
+            months_set = set(rule.get("months") or set())
+            rule_desc = f"{sorted(list(months_set))}월 발생"
+        elif rule["type"] == "bimonthly":
+            months_set = set()
+            rule_desc = "2개월 주기(격월) 발생"
+        else:
+            continue
+
+        name = rule["name"]
+        compiled.append(
+            {
+                **rule,
+                "months_list": sorted(months_set),
+                "rule_desc": rule_desc,
+                "tags": list(rule.get("tags", [])),
+                # 케이스 1) 비발생 월 & 0/결측 → 정상
+                "msg_off_missing": f"[규칙반영] {name}은(는) {rule_desc} → 해당 월은 비발생이 정상입니다.",
+                # 케이스 2) 발생 월 & 0/결측 → 누락 강화
+                "msg_on_missing": f"[규칙반영] {name}은(는) {rule_desc}인데 금액이 0/결측입니다 → 누락 가능성이 큽니다.",
+                # 케이스 3) 비발생 월 & 금액 발생 → 이상 강화
+                "msg_off_value": f"[규칙반영] {name}은(는) {rule_desc}인데 비발생 월에 금액이 발생했습니다 → 패턴 이탈 가능성.",
+                # 케이스 4) 발생 월 & 금액 발생 → 힌트만
+                "msg_on_value": f"[규칙반영] {name} 발생 월({rule_desc})입니다.",
+            }
+        )
+    return compiled
+
+
+_COMPILED_SPECIAL_RULES = _compile_special_rules(_SPECIAL_RULES)
+
+
+def _special_rule_index(account_names: pd.Series) -> np.ndarray:
+    """
+    행별 매칭 규칙 인덱스(_COMPILED_SPECIAL_RULES 기준, 없으면 -1)
+    정규식은 고유 계정명마다 1번만 실행.
+    """
+    key_to_compiled = {r["key"]: i for i, r in enumerate(_COMPILED_SPECIAL_RULES)}
+
+    lookup: Dict[Any, int] = {}
+    for name in pd.unique(account_names):
+        rule = _match_special_rule(name)
+        lookup[name] = key_to_compiled.get(rule["key"], -1) if rule else -1
+
+    return map_keys(account_names, lookup, default=-1).astype(int).to_numpy()
+
+
+def _infer_bimonthly_parity(df: pd.DataFrame) -> pd.Series:
     """
-    격월 패턴의 '발생 월(홀/짝)'을 과거 발생(>0) 데이터에서 추정.
-    반환: 0(짝수월 발생) 또는 1(홀수월 발생)
+    격월 패턴의 '발생 월(홀/짝)'을 (cost_center, account_code)별로 과거 발생(>0) 데이터에서 추정.
+    반환: (cost_center, account_code) 인덱스의 Series, 값 0(짝수월 발생) 또는 1(홀수월 발생)
+      - 최근 24개월만 사용
+      - 근거가 없으면 관성적으로 "짝수월"(0)
+      - 홀/짝 동률이면 최신 발생 월의 parity
     """
-    # 최근 24개월 정도만 보되, 충분히 없으면 전체
-    g2 = g.sort_values(["year", "month"]).tail(24).copy()
+    keys = ["cost_center", "account_code"]
+    if df.empty:
+        return pd.Series(dtype=int)
+
+    g = df[keys + ["year", "month", "amount"]].copy()
+    g = g.sort_values(keys + ["year", "month"], kind="mergesort")
+    g = g.groupby(keys, dropna=False, sort=False, observed=True).tail(24)
+
+    occur = g[~_missing_like_mask(g["amount"])].copy()
+    all_keys = g[keys].drop_duplicates().set_index(keys).index
 
-    occur = g2[~g2["amount"].apply(_is_missing_like_amount)]
     if occur.empty:
-        # 근거가 없으면 관성적으로 "짝수월"로 둠(임의)
-        return 0
+        return pd.Series(0, index=all_keys, dtype=int)
+
+    occur["parity"] = pd.to_numeric(occur["month"]).astype(int) % 2
+    grp = occur.groupby(keys, dropna=False, sort=False, observed=True)["parity"]
+    c1 = grp.sum()
+    c0 = grp.count() - c1
+    last_parity = grp.last()
 
-    occur["parity"] = occur["month"].astype(int) % 2
-    counts = occur["parity"].value_counts().to_dict()
-    c0 = int(counts.get(0, 0))
-    c1 = int(counts.get(1, 0))
+    parity = pd.Series(np.where(c0 > c1, 0, 1), index=c1.index)
+    parity = parity.where(c0 != c1, last_parity)
+    return parity.reindex(all_keys).fillna(0).astype(int)
 
-    if c0 == c1:
-        # 동률이면 최신 발생 월의 parity
-        last_m = int(occur.iloc[-1]["month"])
-        return last_m % 2
-    return 0 if c0 > c1 else 1
 
+def _append_reason(reason: pd.Series, msg: str) -> pd.Series:
+    return (reason + " " + msg).str.strip()
 
-def apply_season_event_rules(df: pd.DataFrame) -> pd.DataFrame:
+
+def apply_season_event_rules(df: pd.DataFrame, history: Optional[pd.DataFrame] = None) -> pd.DataFrame:
     """
     시즌/이벤트성 규칙을 issue_type/anomaly_flag/severity_rank/reason에 반영.
     - 비발생 월: 0/결측은 정상 처리
     - 발생 월: 0/결측은 누락(결측 의심) 강화
     - 비발생 월: 금액 발생은 이상 강화
+
+    history: 격월(상여) 발생 월 추정에만 함께 쓰는 과거 행(규칙 적용 대상은 df만)
+
+    규칙 매칭은 고유 계정명 단위, 발생 월 판정과 컬럼 갱신은 규칙×케이스 마스크 단위로 일괄 처리.
     """
     need = {"account_name", "year", "month", "amount", "cost_center", "account_code"}
     if (need - set(df.columns)):
@@ -374,96 +512,105 @@ def apply_season_event_rules(df: pd.DataFrame) -> pd.DataFrame:
     if "anomaly_flag" not in df.columns:
         df["anomaly_flag"] = False
 
-    # 격월(상여) parity 맵 추정
-    bonus_mask = df["account_name"].astype(str).apply(lambda s: bool(_SPECIAL_RULES[0]["pattern"].search(s)))
-    bonus_df = df[bonus_mask].copy()
+    rule_idx = _special_rule_index(df["account_name"])
+    matched = rule_idx >= 0
+    if not matched.any():
+        return df
 
-    parity_map: Dict[str, int] = {}
-    if not bonus_df.empty:
-        for (cc, acc), g in bonus_df.groupby(["cost_center", "account_code"], dropna=False):
-            key = f"{cc}|{acc}"
-            parity_map[key] = _infer_bimonthly_parity_for_group(g)
+    month = pd.to_numeric(df["month"], errors="coerce").fillna(-1).astype(int).to_numpy()
+    missing_like = _missing_like_mask(df["amount"]).to_numpy()
 
-    # row-by-row 적용 (데이터량이 큰 편이어도 보통 수만행 수준이라 이 정도는 OK)
-    for idx, row in df.iterrows():
-        rule = _match_special_rule(row.get("account_name"))
-        if not rule:
+    # 규칙별 발생 예정 월 여부(컬럼 단위)
+    expected = np.ones(len(df), dtype=bool)
+    for i, rule in enumerate(_COMPILED_SPECIAL_RULES):
+        in_rule = rule_idx == i
+        if not in_rule.any():
             continue
 
-        m = int(row.get("month"))
-        key = f"{row.get('cost_center')}|{row.get('account_code')}"
-        amt_missing_like = _is_missing_like_amount(row.get("amount"))
-
-        expected_occurs = True
-        rule_desc = ""
-
         if rule["type"] == "fixed_months":
-            months_set = set(rule.get("months") or set())
-            expected_occurs = (m in months_set)
-            rule_desc = f"{sorted(list(months_set))}월 발생"
+            expected[in_rule] = np.isin(month[in_rule], rule["months_list"])
         elif rule["type"] == "bimonthly":
-            parity = parity_map.get(key, 0)
-            expected_occurs = (m % 2 == parity)
-            rule_desc = "2개월 주기(격월) 발생"
+            parity_src = df
+            if history is not None and not history.empty and not (need - set(history.columns)):
+                parity_src = pd.concat([history[list(need)], df[list(need)]], ignore_index=True)
+            src_mask = as_key_str(parity_src["account_name"]).str.contains(rule["pattern"], regex=True)
+            # 이력/신규 행의 카테고리 구성이 다를 수 있어 규칙 대상 행만 문자열 키로 비교
+            parity_map = _infer_bimonthly_parity(decode_keys(parity_src[src_mask].copy(), ["cost_center", "account_code"]))
+
+            row_keys = pd.MultiIndex.from_frame(df.loc[in_rule, ["cost_center", "account_code"]].astype(object))
+            parity = parity_map.reindex(row_keys).fillna(0).astype(int).to_numpy()
+            expected[in_rule] = (month[in_rule] % 2) == parity
+
+    # 사유 문자열 / 심각도 현재값 (인덱스 정렬 없이 위치 기준으로 처리)
+    reason = df["reason_kor"].fillna("").astype(str).str.strip()
+    new_reason = df["reason_kor"].to_numpy(dtype=object).copy()
+    severity = pd.to_numeric(df["severity_rank"], errors="coerce").fillna(1)
+    raised_severity = np.maximum(severity.where(severity != 0, 1), 4).astype(int).to_numpy()
+
+    # 행별 추가 태그 = add_lists[add_id]
+    add_id = np.full(len(df), -1, dtype=int)
+    add_lists: List[List[str]] = []
+
+    for i, rule in enumerate(_COMPILED_SPECIAL_RULES):
+        in_rule = rule_idx == i
+        if not in_rule.any():
+            continue
 
-        # 태그 추가(항상)
-        df.at[idx, "reason_tags"] = _add_tags(df.at[idx, "reason_tags"], rule.get("tags", []))
+        off_missing = in_rule & ~expected & missing_like
+        on_missing = in_rule & expected & missing_like
+        off_value = in_rule & ~expected & ~missing_like
+        on_value = in_rule & expected & ~missing_like
 
-        # -----------------------------
         # 케이스 1) 비발생 월인데 0/결측 -> 정상 처리(결측 잡혔어도 되돌림)
-        # -----------------------------
-        if (not expected_occurs) and amt_missing_like:
-            # issue_type이 결측 의심이더라도 정상으로 되돌림
-            df.at[idx, "issue_type"] = "정상"
-            df.at[idx, "anomaly_flag"] = False
-            df.at[idx, "severity_rank"] = 0
-
-            # reason_kor는 "문제 행"에만 주로 쓰지만, 혹시 프론트에서 상세를 볼 때 도움이 되도록 남김
-            msg = f"[규칙반영] {rule['name']}은(는) {rule_desc} → 해당 월은 비발생이 정상입니다."
-            rk = str(df.at[idx, "reason_kor"] or "").strip()
-            df.at[idx, "reason_kor"] = (rk + " " + msg).strip()
-
-            # 결측/0값 태그는 굳이 붙이지 않음(정상 처리이므로)
-            continue
+        if off_missing.any():
+            df.loc[off_missing, "issue_type"] = "정상"
+            df.loc[off_missing, "anomaly_flag"] = False
+            df.loc[off_missing, "severity_rank"] = 0
+            new_reason[off_missing] = _append_reason(reason[off_missing], rule["msg_off_missing"]).to_numpy()
 
-        # -----------------------------
         # 케이스 2) 발생 월인데 0/결측 -> 누락(결측 의심) 강화
-        # -----------------------------
-        if expected_occurs and amt_missing_like:
-            df.at[idx, "issue_type"] = "결측 의심"
-            df.at[idx, "anomaly_flag"] = True
-            df.at[idx, "severity_rank"] = max(int(df.at[idx, "severity_rank"] or 1), 4)
-            df.at[idx, "reason_tags"] = _add_tags(df.at[idx, "reason_tags"], ["결측", "0값"])
-
-            msg = f"[규칙반영] {rule['name']}은(는) {rule_desc}인데 금액이 0/결측입니다 → 누락 가능성이 큽니다."
-            rk = str(df.at[idx, "reason_kor"] or "").strip()
-            df.at[idx, "reason_kor"] = (rk + " " + msg).strip()
-            continue
+        if on_missing.any():
+            df.loc[on_missing, "issue_type"] = "결측 의심"
+            df.loc[on_missing, "anomaly_flag"] = True
+            df.loc[on_missing, "severity_rank"] = raised_severity[on_missing]
+            new_reason[on_missing] = _append_reason(reason[on_missing], rule["msg_on_missing"]).to_numpy()
 
-        # -----------------------------
         # 케이스 3) 비발생 월인데 금액 발생 -> 이상 강화
-        # -----------------------------
-        if (not expected_occurs) and (not amt_missing_like):
-            df.at[idx, "issue_type"] = "이상치 의심"
-            df.at[idx, "anomaly_flag"] = True
-            df.at[idx, "severity_rank"] = max(int(df.at[idx, "severity_rank"] or 1), 4)
-            df.at[idx, "reason_tags"] = _add_tags(df.at[idx, "reason_tags"], ["패턴이탈"])
-
-            msg = f"[규칙반영] {rule['name']}은(는) {rule_desc}인데 비발생 월에 금액이 발생했습니다 → 패턴 이탈 가능성."
-            rk = str(df.at[idx, "reason_kor"] or "").strip()
-            df.at[idx, "reason_kor"] = (rk + " " + msg).strip()
-            continue
+        if off_value.any():
+            df.loc[off_value, "issue_type"] = "이상치 의심"
+            df.loc[off_value, "anomaly_flag"] = True
+            df.loc[off_value, "severity_rank"] = raised_severity[off_value]
+            new_reason[off_value] = _append_reason(reason[off_value], rule["msg_off_value"]).to_numpy()
 
-        # -----------------------------
         # 케이스 4) 발생 월 & 금액 발생 -> 정상/이상 여부는 기존 모델 판단 유지
-        #  - 다만 사유에 '이벤트성 발생월' 힌트만 추가
-        # -----------------------------
-        if expected_occurs and (not amt_missing_like):
-            msg = f"[규칙반영] {rule['name']} 발생 월({rule_desc})입니다."
-            rk = str(df.at[idx, "reason_kor"] or "").strip()
-            # 너무 중복으로 길어질 수 있어, 같은 문구가 이미 있으면 추가하지 않음
-            if msg not in rk:
-                df.at[idx, "reason_kor"] = (rk + " " + msg).strip()
+        #  - 다만 사유에 '이벤트성 발생월' 힌트만 추가(같은 문구가 이미 있으면 생략)
+        if on_value.any():
+            msg = rule["msg_on_value"]
+            add_hint = on_value & ~reason.str.contains(msg, regex=False).to_numpy()
+            new_reason[add_hint] = _append_reason(reason[add_hint], msg).to_numpy()
+
+        # 태그: 규칙 태그(항상) + 케이스 태그
+        for case_mask, case_tags in (
+            (off_missing | on_value, []),
+            (on_missing, ["결측", "0값"]),
+            (off_value, ["패턴이탈"]),
+        ):
+            add_id[case_mask] = len(add_lists)
+            add_lists.append(rule["tags"] + case_tags)
+
+    df["reason_kor"] = new_reason
+
+    # 태그 병합은 (기존 태그, 추가 태그) 조합별로 1번만 계산
+    positions = np.flatnonzero(add_id >= 0)
+    existing_tags = df["reason_tags"].to_numpy(dtype=object)
+    merged_cache: Dict[Tuple[Tuple[str, ...], int], List[str]] = {}
+    tags_out = existing_tags.copy()
+    for pos in positions:
+        ck = (tuple(_ensure_list_tags(existing_tags[pos])), int(add_id[pos]))
+        if ck not in merged_cache:
+            merged_cache[ck] = _add_tags(list(ck[0]), add_lists[ck[1]])
+        tags_out[pos] = list(merged_cache[ck])
+    df["reason_tags"] = tags_out
 
     return df
 
@@ -734,27 +881,33 @@ def add_mom_change(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
     df = df.copy().sort_values(["cost_center", "account_code", "year", "month"])
-    df["prev_amount"] = df.groupby(["cost_center", "account_code"])["amount"].shift(1)
+    df["prev_amount"] = df.groupby(["cost_center", "account_code"], observed=True)["amount"].shift(1)
+    df["mom_change_pct"] = df.apply(_mom_change_pct, axis=1)
+    return df
 
-    def _calc(row):
-        cur = row.get("amount")
-        prev = row.get("prev_amount")
-        if pd.isna(cur) or pd.isna(prev):
-            return None
-        try:
-            prev_f = float(prev)
-            cur_f = float(cur)
-        except Exception:
-            return None
 
-        if cur_f == 0.0:
-            return None
-        if prev_f == 0.0:
-            return None
+def _mom_change_pct(row) -> Optional[float]:
+    cur = row.get("amount")
+    prev = row.get("prev_amount")
+    if pd.isna(cur) or pd.isna(prev):
+        return None
+    try:
+        prev_f = float(prev)
+        cur_f = float(cur)
+    except Exception:
+        return None
+
+    if cur_f == 0.0:
+        return None
+    if prev_f == 0.0:
+        return None
+
+    return (cur_f - prev_f) / abs(prev_f) * 100.0
 
-        return (cur_f - prev_f) / abs(prev_f) * 100.0
 
-    df["mom_change_pct"] = df.apply(_calc, axis=1)
+def _mom_change_from_cube(df: pd.DataFrame, hist: Dict[str, np.ndarray]) -> pd.DataFrame:
+    df = cube_prev_amount(df, hist)
+    df["mom_change_pct"] = df.apply(_mom_change_pct, axis=1)
     return df
 
 
@@ -817,24 +970,17 @@ def add_lookback_valid_flags(df: pd.DataFrame) -> pd.DataFrame:
 
     df = df.copy().sort_values(["cost_center", "account_code", "year", "month"])
 
-    def _is_valid(x):
-        if pd.isna(x):
-            return False
-        try:
-            return float(x) != 0.0
-        except Exception:
-            return False
+    # 유효값 = NaN 아님 & 0 아님
+    amt = pd.to_numeric(df["amount"], errors="coerce")
+    valid = (amt.notna() & (amt != 0.0)).astype(int)
 
-    df["_valid_amt"] = df["amount"].apply(_is_valid)
+    # 그룹 내 '이번 행 이전'까지의 유효값 누적 개수 → 직전 k행 개수 = 누적차
+    keys = [df["cost_center"], df["account_code"]]
+    before = valid.groupby(keys, dropna=False, observed=True).cumsum() - valid
+    for k, col in ((3, "lookback3_has_value"), (12, "lookback12_has_value")):
+        older = before.groupby(keys, dropna=False, observed=True).shift(k).fillna(0)
+        df[col] = (before - older) > 0
 
-    def _calc_flags(g):
-        pv = g["_valid_amt"].shift(1).fillna(False)
-        g["lookback3_has_value"] = pv.rolling(3, min_periods=1).max().astype(bool)
-        g["lookback12_has_value"] = pv.rolling(12, min_periods=1).max().astype(bool)
-        return g
-
-    df = df.groupby(["cost_center", "account_code"], group_keys=False).apply(_calc_flags)
-    df.drop(columns=["_valid_amt"], inplace=True, errors="ignore")
     return df
 
 
@@ -1055,95 +1201,8 @@ def reset_password():
 
 # =====================================================
 # 4. 단일 월 업로드 엑셀 파싱 (유연 파서)
+#    → monthly_store.parse_single_month_excel (일괄 변환 워커에서도 사용)
 # =====================================================
-def _normalize_year_month_label(label: str) -> Tuple[str, int, int]:
-    s = str(label)
-
-    # 1) "2024년 4월" / "2024년4월" / "2024년 10 월" 전부 허용
-    m = re.search(r"(20\d{2})\s*년\s*([0-9]{1,2})\s*월", s)
-    if not m:
-        # 2) 보조: "2024-04", "2024/04" 같은 형식도 허용
-        m = re.search(r"(20\d{2})\D+([0-9]{1,2})\b", s)
-
-    if not m:
-        raise ValueError(f"연-월 정보를 찾을 수 없습니다: {label}")
-
-    year = int(m.group(1))
-    month = int(m.group(2))
-    if not (1 <= month <= 12):
-        raise ValueError(f"월(month) 값이 범위를 벗어났습니다: {label}")
-
-    ym = f"{year:04d}-{month:02d}"
-    return ym, year, month
-
-
-
-def parse_single_month_excel(file_stream: io.BytesIO) -> pd.DataFrame:
-    raw = pd.read_excel(file_stream, header=None)
-
-    if raw.shape[1] < 5:
-        raise ValueError("예상보다 적은 컬럼 수입니다. 업로드 양식을 확인하세요.")
-
-    header = raw.iloc[0]
-    header_str = header.astype(str)
-
-    month_col_idx = None
-    for i, v in enumerate(header_str):
-        if re.search(r"20\d{2}\s*년\s*\d{1,2}\s*월", v):
-            month_col_idx = i
-            break
-    if month_col_idx is None:
-        month_col_idx = raw.shape[1] - 1
-
-    month_label = header.iloc[month_col_idx]
-    year_month, year, month = _normalize_year_month_label(month_label)
-
-    df = raw.iloc[1:].copy()
-
-    def find_col(keyword_list, default_idx):
-        for i, v in enumerate(header_str):
-            for kw in keyword_list:
-                if kw in v:
-                    return i
-        return default_idx
-
-    cc_code_idx = find_col(["코스트센터코드", "코스트센터 코드", "코스트센터"], 0)
-    cc_name_idx = find_col(["코스트센터명", "코스트센터 명"], 1)
-    acc_code_idx = find_col(["계정코드", "계정 코드"], 2)
-    acc_name_idx = find_col(["계정명", "계정 명"], 3)
-
-    rename_map = {
-        cc_code_idx: "cost_center",
-        cc_name_idx: "cc_name",
-        acc_code_idx: "account_code",
-        acc_name_idx: "account_name",
-        month_col_idx: "amount",
-    }
-
-    df = df.rename(columns=rename_map)
-
-    needed_cols = ["cost_center", "cc_name", "account_code", "account_name", "amount"]
-    missing = [c for c in needed_cols if c not in df.columns]
-    if missing:
-        raise ValueError(f"필수 컬럼이 누락되었습니다: {', '.join(missing)}")
-
-    df = df[needed_cols]
-
-    for col in ["cost_center", "cc_name", "account_code", "account_name"]:
-        df[col] = df[col].astype(str).str.strip()
-
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
-
-    df["year_month"] = year_month
-    df["year"] = year
-    df["month"] = month
-
-    if "cost_nature" not in df.columns:
-        df["cost_nature"] = "기타"
-
-    df = df[df["cost_center"].notna() & (df["cost_center"].astype(str) != "nan")]
-    return df.reset_index(drop=True)
-
 
 # =====================================================
 # 1-A. 월별 엑셀 여러 개를 long 포맷으로 로딩
@@ -1152,25 +1211,20 @@ def load_all_monthly_cost_long() -> pd.DataFrame:
     if not COST_MONTHLY_DIR.exists():
         raise FileNotFoundError(f"월별 코스트센터 폴더가 없습니다: {COST_MONTHLY_DIR}")
 
-    all_dfs: List[pd.DataFrame] = []
+    # 월별 엑셀은 cache/monthly_store에 파일별 Parquet로 한 번만 변환(변경 파일만 재파싱)
+    manifest, ingested = sync_monthly_store(COST_MONTHLY_DIR, MONTHLY_STORE_DIR)
+    if ingested:
+        print(f"[load_all_monthly_cost_long] ingested {len(ingested)} file(s):", ", ".join(ingested))
 
-    for fname in sorted(os.listdir(str(COST_MONTHLY_DIR))):
-        if not fname.lower().endswith((".xlsx", ".xls")):
-            continue
-        fpath = COST_MONTHLY_DIR / fname
-        try:
-            with open(fpath, "rb") as f:
-                data = f.read()
-            df = parse_single_month_excel(io.BytesIO(data))
-            df["source_file"] = fname
-            all_dfs.append(df)
-            print(f"[load_all_monthly_cost_long] loaded {fname}, rows={len(df)}")
-        except Exception as e:
-            print(f"[load_all_monthly_cost_long] {fname} 읽는 중 오류:", e)
+    all_dfs: List[pd.DataFrame] = load_monthly_store(MONTHLY_STORE_DIR, manifest)
 
     if not all_dfs:
         raise ValueError(f"{COST_MONTHLY_DIR} 안에서 유효한 월별 엑셀(.xlsx/.xls)을 찾지 못했습니다.")
 
+    return _concat_monthly_frames(all_dfs)
+
+
+def _concat_monthly_frames(all_dfs: List[pd.DataFrame]) -> pd.DataFrame:
     df_all = pd.concat(all_dfs, ignore_index=True)
 
     if "year" not in df_all.columns or "month" not in df_all.columns:
@@ -1182,10 +1236,24 @@ def load_all_monthly_cost_long() -> pd.DataFrame:
     if "cost_nature" not in df_all.columns:
         df_all["cost_nature"] = "기타"
 
-    return df_all
+    # 키 컬럼은 적재 시 한 번 Categorical로 인코딩(응답 직전에 decode_keys)
+    return encode_keys(df_all)
+
+
+WIDE_KEY_COLS = ["cost_center", "cc_name", "account_code", "account_name"]
+
+# 화면 호환용 별칭 컬럼(원본 키 컬럼 복사본)
+WIDE_ALIAS_COLS = ["코스트센터", "코스트센터명", "부서명"]
 
 
 def build_wide_cost_data(df: pd.DataFrame) -> pd.DataFrame:
+    return _add_wide_alias_columns(_pivot_wide_core(df))
+
+
+def _pivot_wide_core(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    long → (키 4개 + 월 컬럼) wide 피벗, 월 컬럼은 정렬된 'YYYY-MM' 문자열
+    """
     required_cols = ["cost_center", "cc_name", "account_code", "account_name", "year_month", "amount"]
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
@@ -1193,21 +1261,24 @@ def build_wide_cost_data(df: pd.DataFrame) -> pd.DataFrame:
 
     df_use = df[required_cols].copy()
     for col in ["cost_center", "cc_name", "account_code", "account_name", "year_month"]:
-        df_use[col] = df_use[col].astype(str)
-
-    pivot = (
-        df_use.pivot_table(
-            index=["cost_center", "cc_name", "account_code", "account_name"],
-            columns="year_month",
-            values="amount",
-            aggfunc="sum",
-            fill_value=0.0,
-        )
-        .reset_index()
+        df_use[col] = as_key_str(df_use[col])
+
+    pivot = df_use.pivot_table(
+        index=WIDE_KEY_COLS,
+        columns="year_month",
+        values="amount",
+        aggfunc="sum",
+        fill_value=0.0,
+        observed=True,
     )
+    pivot.columns = pivot.columns.astype(object)
+    pivot = decode_keys(pivot.reset_index())
 
     pivot.columns = [str(c) for c in pivot.columns]
+    return pivot
 
+
+def _add_wide_alias_columns(pivot: pd.DataFrame) -> pd.DataFrame:
     if "cc_name" in pivot.columns:
         if "코스트센터명" not in pivot.columns:
             idx = pivot.columns.get_loc("cc_name") + 1
@@ -1223,27 +1294,102 @@ def build_wide_cost_data(df: pd.DataFrame) -> pd.DataFrame:
     return pivot
 
 
+def _wide_month_values(values: np.ndarray) -> np.ndarray:
+    # pivot_table(fill_value=...)은 월 컬럼마다 값이 모두 정수(allclose, rtol=0)면 int64로 내림 → 같은 규칙
+    if len(values) and np.isfinite(values).all():
+        as_int = values.astype(np.int64)
+        if np.allclose(as_int, values, rtol=0):
+            return as_int
+    return values
+
+
+def append_wide_months(df_wide: pd.DataFrame, df_new: pd.DataFrame) -> pd.DataFrame:
+    """
+    기존 wide 행렬에 새 월(들)의 long 데이터를 컬럼으로 추가
+      - 새 월만 피벗 후 키 4개로 outer 조인, 한쪽에만 있는 행은 0
+      - 행은 키 정렬, 월 컬럼은 월 정렬 → 전체 재피벗(build_wide_cost_data)과 같은 결과
+    """
+    old = df_wide.drop(columns=[c for c in WIDE_ALIAS_COLS if c in df_wide.columns])
+    new = _pivot_wide_core(df_new)
+
+    old_months = [c for c in old.columns if c not in WIDE_KEY_COLS]
+    new_months = [c for c in new.columns if c not in WIDE_KEY_COLS]
+    if set(old_months) & set(new_months):
+        raise ValueError("append_wide_months: 이미 있는 월은 추가할 수 없습니다: " + ", ".join(sorted(set(old_months) & set(new_months))))
+
+    # 흔한 경우(새 계열 없음, 마지막 월 이후 월만): 기존 행 순서 그대로 새 월 컬럼만 추가
+    # (기존 월 컬럼은 복사하지 않음 → 이력 길이와 무관)
+    if not old_months or not new_months or min(new_months) > max(old_months):
+        old_idx = pd.MultiIndex.from_frame(old[WIDE_KEY_COLS].astype(str))
+        pos = old_idx.get_indexer(pd.MultiIndex.from_frame(new[WIDE_KEY_COLS].astype(str)))
+        if len(pos) == 0 or (pos >= 0).all():
+            out = old.copy(deep=False)
+            for m in sorted(new_months):
+                col = np.zeros(len(out), dtype=float)
+                col[pos] = new[m].to_numpy(dtype=float)
+                out[m] = _wide_month_values(col)
+            return _add_wide_alias_columns(out)
+
+    merged = old.merge(new, on=WIDE_KEY_COLS, how="outer")
+    months = sorted(old_months + new_months)
+    for m in months:
+        merged[m] = _wide_month_values(merged[m].fillna(0).to_numpy(dtype=float))
+
+    merged = merged.sort_values(WIDE_KEY_COLS, kind="mergesort").reset_index(drop=True)
+    return _add_wide_alias_columns(merged[WIDE_KEY_COLS + months])
+
+
+# costData_wide.pkl 구조가 바뀌면 올림
+WIDE_CACHE_VERSION = 2
+
+
 def load_cost_center_data(use_cache: bool = True) -> pd.DataFrame:
-    cache_path = get_cache_path("costData_wide.pkl")
+    """
+    centercost_data 기준 wide 행렬 (cache/costData_wide.pkl, cache_manager 관리)
+      - centercost_data 버전이 같으면 캐시 그대로
+      - 바뀌었으면 _build_cost_center_wide(이전 값)로 갱신(새 월만 추가된 경우 증분)
+    """
+    return cache_manager.get("costData_wide", force=not use_cache)["frame"]
 
-    if use_cache and os.path.exists(cache_path):
-        try:
-            df_wide = pd.read_pickle(cache_path)
-            print("[load_cost_center_data] loaded from cache:", cache_path)
-            return df_wide
-        except Exception as e:
-            print("[load_cost_center_data] cache load error, 재계산:", e)
 
-    df_long = load_all_monthly_cost_long()
-    df_wide = build_wide_cost_data(df_long)
+def _build_cost_center_wide(previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    반환: {"files": 원본 파일명 → sha256, "frame": wide DataFrame}
+      - 이전 값의 파일은 그대로이고 새 월 파일만 추가됐으면 그 월만 피벗해 컬럼 추가
+      - 그 외(파일 변경/삭제, 같은 월 중복, 이전 값 없음)는 전체 재피벗
+    """
+    manifest, ingested = sync_monthly_store(COST_MONTHLY_DIR, MONTHLY_STORE_DIR)
+    if ingested:
+        print(f"[load_cost_center_data] ingested {len(ingested)} file(s):", ", ".join(ingested))
+    files = {fname: e["sha256"] for fname, e in manifest.get("files", {}).items()}
+
+    df_wide = None
+    if isinstance(previous, dict) and previous.get("frame") is not None:
+        old_files: Dict[str, str] = previous.get("files") or {}
+        if old_files == files:
+            return previous
+
+        added = sorted(set(files) - set(old_files))
+        unchanged = all(files.get(f) == sha for f, sha in old_files.items())
+        if added and unchanged:
+            try:
+                df_new = _concat_monthly_frames(load_monthly_store(MONTHLY_STORE_DIR, manifest, files=added))
+                df_wide = append_wide_months(previous["frame"], df_new)
+                print("[load_cost_center_data] appended month(s):", ", ".join(sorted(df_new["year_month"].unique())))
+            except Exception as e:
+                print("[load_cost_center_data] incremental append 실패, 전체 재계산:", e)
+                df_wide = None
+
+    if df_wide is None:
+        df_long = load_all_monthly_cost_long()
+        df_wide = build_wide_cost_data(df_long)
 
-    try:
-        df_wide.to_pickle(cache_path)
-        print("[load_cost_center_data] saved cache:", cache_path)
-    except Exception as e:
-        print("[load_cost_center_data] cache save error:", e)
+    return {"files": files, "frame": df_wide}
 
-    return df_wide
+
+cache_manager.register_cache(
+    "costData_wide", "costData_wide.pkl", ["centercost_data"], build=_build_cost_center_wide, version=WIDE_CACHE_VERSION
+)
 
 
 def load_pl_backdata():
@@ -1262,8 +1408,7 @@ def load_pl_backdata():
         back_sheet_name = xls.sheet_names[0]
 
     df_back = pd.read_excel(xls, sheet_name=back_sheet_name)
-    df_back = df_back.replace({np.nan: None})
-    back_records = df_back.to_dict(orient="records")
+    back_records = frame_records(df_back)
 
     codeNameMap: Dict[str, str] = {}
     mapping_sheet_name = None
@@ -1303,14 +1448,19 @@ def load_pl_backdata():
     return back_records, codeNameMap
 
 
-@app.route("/api/init-data", methods=["GET"])
-def init_data():
+def _init_data_payload() -> Tuple[Dict[str, Any], List[str]]:
+    """
+    반환: (init-data 응답 dict, 실패한 항목 목록) - 실패 항목은 빈 값으로 채움
+    """
+    errors: List[str] = []
+
     try:
         df_cost = load_cost_center_data(use_cache=True)
-        costData = df_cost.to_dict(orient="records")
+        costData = frame_records(df_cost)
     except Exception as e:
         print("[init-data] costData load error:", e)
         costData = []
+        errors.append("costData")
 
     try:
         backData, codeNameMap = load_pl_backdata()
@@ -1318,180 +1468,865 @@ def init_data():
         print("[init-data] backData load error:", e)
         backData = []
         codeNameMap = {}
+        errors.append("backData")
 
     try:
         advancedMap = load_advanced_class_map(use_cache=True)
     except Exception as e:
         print("[init-data] advancedMap load error:", e)
         advancedMap = {"byCcAcc": {}, "byAcc": {}}
+        errors.append("advancedMap")
 
     anomalyData: List[Dict[str, Any]] = []
-    return jsonify(
-        {
-            "costData": costData,
-            "backData": backData,
-            "codeNameMap": codeNameMap,
-            "anomalyData": anomalyData,
-            "advancedMap": advancedMap,
-        }
-    )
+    payload = {
+        "costData": costData,
+        "backData": backData,
+        "codeNameMap": codeNameMap,
+        "anomalyData": anomalyData,
+        "advancedMap": advancedMap,
+    }
+    return payload, errors
 
 
-def build_history_map(df: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
-    hist: Dict[str, List[Dict[str, Any]]] = {}
-    df = df.copy()
-    df["year_month"] = df["year_month"].astype(str)
+def _encode_init_data_body(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # jsonify와 같은 직렬화(정렬 키 / 끝 줄바꿈)
+    return compress_body((app.json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8"))
 
-    has_upper = "normal_upper" in df.columns
-    has_lower = "normal_lower" in df.columns
-    has_flag = "anomaly_flag" in df.columns
 
-    for (cc, acc), grp in df.groupby(["cost_center", "account_code"], dropna=False):
-        key = f"{cc}|{acc}"
-        grp_sorted = grp.sort_values("year_month")
+def _build_init_data_body(_previous=None) -> Dict[str, Any]:
+    payload, errors = _init_data_payload()
+    if errors:
+        raise RuntimeError("init-data 일부 항목 로딩 실패: " + ", ".join(errors))
+    return _encode_init_data_body(payload)
 
-        records: List[Dict[str, Any]] = []
-        for _, row in grp_sorted.iterrows():
-            ym = str(row.get("year_month"))
-            amt = row.get("amount")
 
-            nu = row.get("normal_upper") if has_upper else None
-            nl = row.get("normal_lower") if has_lower else None
-            af = bool(row.get("anomaly_flag", False)) if has_flag else False
+# 응답 구조·직렬화 방식이 바뀌면 올림
+INIT_DATA_VERSION = 2
 
-            records.append(
-                {
-                    "month": ym,
-                    "amount": float(amt) if pd.notna(amt) else None,
-                    "normalUpper": float(nu) if (nu is not None and pd.notna(nu)) else None,
-                    "normalLower": float(nl) if (nl is not None and pd.notna(nl)) else None,
-                    "anomalyFlag": af,
-                }
-            )
+# 직렬화·압축된 본문(gzip/brotli) - 입력 버전이 같으면 프로세스 메모리에서 바로 응답
+cache_manager.register_cache(
+    "init_data_body",
+    "init_data_body.pkl",
+    ["centercost_data", "backdata_xlsx", "adv_class_xlsx"],
+    build=_build_init_data_body,
+    version=f"{INIT_DATA_VERSION}:{WIDE_CACHE_VERSION}",
+    memory=True,
+)
 
-        hist[key] = records
 
-    return hist
+@app.route("/api/init-data", methods=["GET"])
+def init_data():
+    """
+    본문은 데이터 버전마다 한 번만 직렬화·압축, ETag가 같으면 304
+    일부 항목 로딩이 실패한 응답은 캐시하지 않음(다음 요청에서 다시 시도)
+    """
+    body = cache_manager.load_fresh("init_data_body")
+    if body is None:
+        versions = cache_manager.current_versions("init_data_body")
+        payload, errors = _init_data_payload()
+        body = _encode_init_data_body(payload)
+        if not errors:
+            try:
+                cache_manager.put("init_data_body", body, versions)
+            except Exception as e:
+                print("[init-data] cache save error:", e)
+    return precompressed_response(body)
 
 
-def add_normal_band(df: pd.DataFrame, window: int = 6, min_periods: int = 1) -> pd.DataFrame:
-    if "amount" not in df.columns:
-        raise ValueError("add_normal_band: 'amount' 컬럼이 없습니다.")
-    for col in ["year", "month"]:
-        if col not in df.columns:
-            raise ValueError(f"add_normal_band: '{col}' 컬럼이 없습니다.")
+HISTORY_LAYOUT = "columnar"
 
-    df = df.copy()
-    df = df.sort_values(["cost_center", "account_code", "year", "month"])
-    df["normal_upper"] = np.nan
-    df["normal_lower"] = np.nan
 
-    has_flag = "anomaly_flag" in df.columns
+def _float_list(values: np.ndarray, ndigits: Optional[int] = None) -> List[Optional[float]]:
+    """
+    float 배열 → JSON용 list (NaN → None)
+    """
+    arr = np.asarray(values, dtype=float)
+    if ndigits is not None:
+        arr = np.round(arr, ndigits)
+    out = arr.astype(object)
+    out[np.isnan(arr)] = None
+    return out.tolist()
 
-    for (cc, acc), grp in df.groupby(["cost_center", "account_code"], dropna=False):
-        vals = grp["amount"].astype(float)
 
-        if has_flag:
-            flag = grp["anomaly_flag"].astype(bool)
-            valid_vals = vals.where(~flag, np.nan)
-        else:
-            valid_vals = vals
+def build_history_columns(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    계열(cost_center|account_code)별 월 이력을 컬럼형으로 구성
+      - keys / offsets : 계열 키, 계열 i의 행 구간 = [offsets[i], offsets[i+1])
+      - months         : 전체 월 목록(정렬), 각 행은 monthIdx로 참조
+      - amount / normalUpper / normalLower / anomalyFlag : 행 단위 병렬 배열
+    """
+    return _build_history_columns(df)[0]
 
-        roll_mean = valid_vals.rolling(window=window, min_periods=min_periods).mean()
-        roll_std = valid_vals.rolling(window=window, min_periods=min_periods).std(ddof=0)
 
-        fallback_mean = vals.rolling(window=window, min_periods=min_periods).mean()
-        fallback_std = vals.rolling(window=window, min_periods=min_periods).std(ddof=0)
+def _build_history_columns(df: pd.DataFrame) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    # 반환: (컬럼형 이력, 계열별 cost_center 문자열, 계열별 account_code 문자열) - 뒤 둘은 append_history_columns 정렬용
+    n = len(df)
+    nan_col = pd.Series(np.nan, index=df.index)
 
-        mean_final = roll_mean.fillna(fallback_mean)
-        std_final = roll_std.fillna(fallback_std)
+    # 정렬/계열 경계는 키 코드(정수)로 계산, 문자열은 계열 키·월 목록에만 만듦
+    cc_code = key_codes(df["cost_center"])
+    acc_code = key_codes(df["account_code"])
+    ym = pd.Categorical(as_key_str(df["year_month"]))
+    order = np.lexsort((ym.codes, acc_code, cc_code))
 
-        upper = mean_final + 2 * std_final
-        lower = mean_final - 2 * std_final
+    cc_s, acc_s = cc_code[order], acc_code[order]
+    starts = (
+        np.flatnonzero(np.r_[True, (cc_s[1:] != cc_s[:-1]) | (acc_s[1:] != acc_s[:-1])])
+        if n else np.array([], dtype=int)
+    )
+    first = order[starts]
+    cc_keys = df["cost_center"].iloc[first].astype(str).to_numpy(dtype=object)
+    acc_keys = df["account_code"].iloc[first].astype(str).to_numpy(dtype=object)
+    keys = cc_keys + "|" + acc_keys
 
-        df.loc[grp.index, "normal_upper"] = upper.values
-        df.loc[grp.index, "normal_lower"] = lower.values
+    ym_codes = ym.codes[order]
+    used = np.unique(ym_codes)
+    months = np.asarray(ym.categories, dtype=object)[used]
 
-    return df
+    def _col(name: str, default: pd.Series) -> np.ndarray:
+        return (df[name] if name in df.columns else default).to_numpy()[order]
 
+    anomaly = (
+        df["anomaly_flag"].fillna(False).astype(bool).to_numpy()[order]
+        if "anomaly_flag" in df.columns else np.zeros(n, dtype=bool)
+    )
 
-def run_monthly_anomaly_pipeline(upload_df: pd.DataFrame) -> Dict[str, Any]:
-    if upload_df.empty:
-        raise ValueError("업로드된 데이터에 내용이 없습니다.")
+    cols = {
+        "layout": HISTORY_LAYOUT,
+        "keys": list(keys),
+        "offsets": np.r_[starts, n].astype(int).tolist(),
+        "months": months.tolist(),
+        "monthIdx": np.searchsorted(used, ym_codes).astype(int).tolist(),
+        "amount": _float_list(pd.to_numeric(df["amount"], errors="coerce").to_numpy()[order]),
+        "normalUpper": _float_list(_col("normal_upper", nan_col), ndigits=2),
+        "normalLower": _float_list(_col("normal_lower", nan_col), ndigits=2),
+        "anomalyFlag": anomaly.astype(int).tolist(),
+    }
+    return cols, cc_keys, acc_keys
 
-    target_ym = upload_df["year_month"].iloc[0]
 
-    base_df = load_all_monthly_cost_long()
-    base_df = base_df[base_df["year_month"] != target_ym].copy()
-    df_all = pd.concat([base_df, upload_df], ignore_index=True)
+_HISTORY_ROW_FIELDS = ["amount", "normalUpper", "normalLower", "anomalyFlag"]
 
-    df_all = detect_potential_missing(df_all, lookback_months=3)
-    df_all = build_features(df_all)
-    df_all = compute_corr_pairs(df_all)
-    df_all = run_ensemble_outlier(df_all)
-    df_all = build_human_explanations(df_all)
 
-    # [OK] 밴드 계산 전에 일단 밴드(기존대로)
-    df_all = add_normal_band(df_all)
+def append_history_columns(
+    base: Dict[str, Any], base_pairs: Tuple[np.ndarray, np.ndarray], df_new: pd.DataFrame
+) -> Dict[str, Any]:
+    """
+    저장 이력의 컬럼형 이력(base)에 마지막 월 이후 새 월 행만 추가
+      - 새 월 행만 컬럼형으로 만든 뒤 계열 구간 단위로 병합(정렬/그룹은 계열 수만큼만)
+      - 기존 계열은 구간 끝에 새 행, 새 계열은 (cost_center, account_code) 정렬 위치에 삽입
+        → build_history_columns(이력 + 새 월)과 같은 결과
+    base_pairs: base 계열별 (cost_center, account_code) 문자열 (_build_history_columns 반환값)
+    """
+    new, new_cc, new_acc = _build_history_columns(df_new)
+    if base["months"] and new["months"] and new["months"][0] <= base["months"][-1]:
+        raise ValueError("append_history_columns: 저장 이력의 마지막 월 이후만 추가할 수 있습니다.")
+
+    nb, nn = len(base["keys"]), len(new["keys"])
+    base_off = np.asarray(base["offsets"], dtype=np.int64)
+    new_off = np.asarray(new["offsets"], dtype=np.int64)
+
+    # 계열 구간 정렬: (cost_center, account_code) 문자열 순서, 같은 계열이면 기존 구간 먼저
+    cc_codes = pd.factorize(np.concatenate([base_pairs[0], new_cc]), sort=True)[0]
+    acc_codes = pd.factorize(np.concatenate([base_pairs[1], new_acc]), sort=True)[0]
+    src = np.r_[np.zeros(nb, dtype=np.int8), np.ones(nn, dtype=np.int8)]
+    seg_order = np.lexsort((src, acc_codes, cc_codes))
+
+    seg_start = np.r_[base_off[:-1], new_off[:-1] + base_off[-1]][seg_order]
+    seg_len = np.r_[np.diff(base_off), np.diff(new_off)][seg_order]
+    out_start = np.r_[0, np.cumsum(seg_len)]
+    rows = np.repeat(seg_start - out_start[:-1], seg_len) + np.arange(out_start[-1])
+
+    # 새 계열 시작 = 정렬된 구간 중 앞 구간과 키가 다른 곳
+    cc_o, acc_o = cc_codes[seg_order], acc_codes[seg_order]
+    first = np.flatnonzero(np.r_[True, (cc_o[1:] != cc_o[:-1]) | (acc_o[1:] != acc_o[:-1])]) if len(seg_order) else seg_order
+    all_keys = np.asarray(base["keys"] + new["keys"], dtype=object)
+
+    month_idx = np.r_[
+        np.asarray(base["monthIdx"], dtype=np.int64), np.asarray(new["monthIdx"], dtype=np.int64) + len(base["months"])
+    ]
+    out = {
+        "layout": HISTORY_LAYOUT,
+        "keys": all_keys[seg_order[first]].tolist(),
+        "offsets": np.r_[out_start[first], out_start[-1]].astype(int).tolist(),
+        "months": list(base["months"]) + list(new["months"]),
+        "monthIdx": month_idx[rows].tolist(),
+    }
+    for field in _HISTORY_ROW_FIELDS:
+        values = np.empty(len(base[field]) + len(new[field]), dtype=object)
+        values[: len(base[field])] = base[field]
+        values[len(base[field]):] = new[field]
+        out[field] = values[rows].tolist()
+    return out
 
-    # [OK] 전월대비/룩백
-    df_all = add_mom_change(df_all)
-    df_all = add_lookback_valid_flags(df_all)
 
+def _history_rows(cols: Dict[str, Any], i: int) -> List[Dict[str, Any]]:
+    months = cols["months"]
+    return [
+        {
+            "month": months[cols["monthIdx"][j]],
+            "amount": cols["amount"][j],
+            "normalUpper": cols["normalUpper"][j],
+            "normalLower": cols["normalLower"][j],
+            "anomalyFlag": bool(cols["anomalyFlag"][j]),
+        }
+        for j in range(cols["offsets"][i], cols["offsets"][i + 1])
+    ]
 
 
-    # ✅ reason_kor에서 전월 금액/이번 달 금액 verbose 문장 제거
-    df_all = clean_reason_kor_mom(df_all)
+def history_columns_to_map(cols: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    컬럼형 이력 → 기존 {키: [월별 dict]} 형태 (?history=records 요청 호환용)
+    """
+    return {key: _history_rows(cols, i) for i, key in enumerate(cols["keys"])}
 
-    # ✅ 시즌/이벤트 규칙 반영(여기서 issue_type / severity / reason 보정)
-    df_all = apply_season_event_rules(df_all)
 
-    wide_df = build_wide_cost_data(df_all)
-    cost_data_updated = wide_df.to_dict(orient="records")
+def history_series(
+    cols: Dict[str, Any], keys: List[str], positions: Optional[Dict[str, int]] = None
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    컬럼형 이력에서 지정한 계열만 {키: [월별 dict]}
+    positions: 키 → 계열 번호(결과마다 한 번 만들어 재사용), 반환: (이력, 없는 키 목록)
+    """
+    if positions is None:
+        positions = {key: i for i, key in enumerate(cols["keys"])}
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    missing: List[str] = []
+    for key in keys:
+        i = positions.get(key)
+        if i is None:
+            missing.append(key)
+        else:
+            found[key] = _history_rows(cols, i)
+    return found, missing
 
-    history_map = build_history_map(df_all)
 
-    df_month = df_all[df_all["year_month"] == target_ym].copy()
-    if df_month.empty:
-        raise ValueError(f"파이프라인 이후에도 {target_ym} 데이터가 없습니다.")
+def _center_records(center_group: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    코스트센터별 집계 → centers 응답(열 단위 형 변환 후 일괄 records)
+    """
+    return frame_records(
+        pd.DataFrame(
+            {
+                "cost_center": center_group["cost_center"].astype(str),
+                "cc_name": center_group["cc_name"].astype(str),
+                "total_rows": center_group["total_rows"].astype(np.int64),
+                "issue_rows": center_group["issue_rows"].astype(np.int64),
+                "missing_rows": center_group["missing_rows"].astype(np.int64),
+                "anomaly_rows": center_group["anomaly_rows"].astype(np.int64),
+                "total_amount": center_group["total_amount"].astype(float),
+                "issue_ratio": center_group["issue_ratio"].astype(float).fillna(0.0),
+            }
+        )
+    )
 
-    def _status_from_row(row):
-        issue_type = row.get("issue_type")
-        if issue_type == "결측 의심":
-            return "issue"
-        if issue_type == "정상":
-            return "ok"
-        if issue_type == "이상치 의심":
-            return "check"
-        return "check"
 
-    df_month["status"] = df_month.apply(_status_from_row, axis=1)
-    df_month["is_issue"] = df_month["status"] != "ok"
+def _issue_float(issue_df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in issue_df.columns:
+        return pd.Series(np.nan, index=issue_df.index, dtype=float)
+    return pd.to_numeric(issue_df[col], errors="coerce").astype(float)
 
-    total_rows = int(len(df_month))
-    issue_rows = int(df_month["is_issue"].sum())
-    missing_rows = int((df_month["issue_type"] == "결측 의심").sum())
-    anomaly_rows = int((df_month["issue_type"] == "이상치 의심").sum())
-    total_amount = float(df_month["amount"].sum(skipna=True))
 
-    summary = {
-        "year_month": target_ym,
-        "total_rows": total_rows,
-        "issue_rows": issue_rows,
-        "missing_rows": missing_rows,
-        "anomaly_rows": anomaly_rows,
-        "total_amount": total_amount,
-        "issue_ratio": float(issue_rows / total_rows) if total_rows else 0.0,
-    }
+def _issue_optional_bool(issue_df: pd.DataFrame, col: str) -> pd.Series:
+    # 값이 있으면 bool, NaN/없음은 None
+    if col not in issue_df.columns:
+        return pd.Series(None, index=issue_df.index, dtype=object)
+    s = issue_df[col]
+    out = pd.Series(None, index=s.index, dtype=object)
+    mask = s.notna()
+    out[mask] = s[mask].map(bool)
+    return out
 
-    center_group = (
-        df_month.groupby(["cost_center", "cc_name"], dropna=False)
-        .agg(
-            total_rows=("is_issue", "count"),
-            issue_rows=("is_issue", "sum"),
-            missing_rows=("issue_type", lambda s: (s == "결측 의심").sum()),
-            anomaly_rows=("issue_type", lambda s: (s == "이상치 의심").sum()),
-            total_amount=("amount", "sum"),
+
+def _issue_values(issue_df: pd.DataFrame, col: str, default: Any = None) -> List[Any]:
+    # 행별 사유 함수에 넘길 원래 값(iterrows의 row.get과 같은 값)
+    if col not in issue_df.columns:
+        return [default] * len(issue_df)
+    return issue_df[col].tolist()
+
+
+def _issue_records(issue_df: pd.DataFrame, with_pattern: bool = False) -> List[Dict[str, Any]]:
+    """
+    정렬된 이슈 행 → issues 응답(열 단위 형 변환 후 일괄 records)
+      - 사유 보정/요약(_apply_mom_detail_to_reason, _summarize_reason)만 행별 문자열 처리
+      - with_pattern: 업로드 분석 응답용 patternMean/Upper/Lower + display_issue_type 포함
+    """
+    cost_center = issue_df["cost_center"].astype(str)
+    account_code = issue_df["account_code"].astype(str)
+    issue_type = issue_df["issue_type"].astype(str)
+    amount = _issue_float(issue_df, "amount")
+    mom_pct = _issue_float(issue_df, "mom_change_pct")
+
+    # 금액이 비었거나 0이면 "누락", 이상치는 "이상", 나머지는 issue_type 그대로
+    is_missing_like = (amount.isna() | (amount == 0.0)).to_numpy()
+    display_issue_type = np.where(
+        is_missing_like, "누락", np.where(issue_type.to_numpy() == "이상치 의심", "이상", issue_type.to_numpy())
+    ).astype(object)
+
+    amount_raw = _issue_values(issue_df, "amount")
+    prev_raw = _issue_values(issue_df, "prev_amount")
+    reason_tags = _issue_values(issue_df, "reason_tags", [])
+    # ✅ 사유(상세) 전월대비 변동% 부호 보정
+    reason_kor = [
+        _apply_mom_detail_to_reason(str(r or ""), cur, prev)
+        for r, cur, prev in zip(_issue_values(issue_df, "reason_kor"), amount_raw, prev_raw)
+    ]
+    corr = [
+        c or a for c, a in zip(_issue_values(issue_df, "corr_score"), _issue_values(issue_df, "corr_anom_score"))
+    ]
+    reason_summary = [
+        _summarize_reason(
+            reason_kor[i],
+            reason_tags[i],
+            display_issue_type[i],
+            mom,
+            lb3,
+            lb12,
+            zscore_12=z,
+            dev_3m=d3,
+            iso_score=iso,
+            lof_score=lof,
+            corr_score=corr[i],
+        )
+        for i, (mom, lb3, lb12, z, d3, iso, lof) in enumerate(
+            zip(
+                _issue_values(issue_df, "mom_change_pct"),
+                _issue_values(issue_df, "lookback3_has_value"),
+                _issue_values(issue_df, "lookback12_has_value"),
+                _issue_values(issue_df, "zscore_12"),
+                _issue_values(issue_df, "dev_3m"),
+                _issue_values(issue_df, "iso_score"),
+                _issue_values(issue_df, "lof_score"),
+            )
+        )
+    ]
+
+    severity = (
+        issue_df["severity_rank"].astype(np.int64)
+        if "severity_rank" in issue_df.columns
+        else pd.Series(1, index=issue_df.index, dtype=np.int64)
+    )
+    anomaly_flag = (
+        issue_df["anomaly_flag"].astype(object).astype(bool)
+        if "anomaly_flag" in issue_df.columns
+        else pd.Series(False, index=issue_df.index, dtype=bool)
+    )
+
+    cols: Dict[str, Any] = {
+        "row_key": (cost_center + "|" + account_code).to_numpy(dtype=object),
+        "year_month": issue_df["year_month"].astype(str).to_numpy(dtype=object),
+        "year": issue_df["year"].astype(np.int64).to_numpy(),
+        "month": issue_df["month"].astype(np.int64).to_numpy(),
+        "cost_center": cost_center.to_numpy(dtype=object),
+        "cc_name": issue_df["cc_name"].astype(str).to_numpy(dtype=object),
+        "account_code": account_code.to_numpy(dtype=object),
+        "account_name": issue_df["account_name"].astype(str).to_numpy(dtype=object),
+        "cost_nature": issue_df["cost_nature"].astype(str).to_numpy(dtype=object),
+        "amount": amount.to_numpy(),
+        "prev_amount": _issue_float(issue_df, "prev_amount").to_numpy(),
+        "mom_change_pct": mom_pct.to_numpy(),
+        "lookback3_has_value": _issue_optional_bool(issue_df, "lookback3_has_value").to_numpy(),
+        "lookback12_has_value": _issue_optional_bool(issue_df, "lookback12_has_value").to_numpy(),
+        "issue_type": issue_type.to_numpy(dtype=object),
+        "severity_rank": severity.to_numpy(),
+        "status": issue_df["status"].to_numpy(dtype=object),
+        "reason_kor": reason_kor,
+        "reason_summary": reason_summary,
+        "reason_tags": reason_tags,
+        "zscore_12": _issue_float(issue_df, "zscore_12").to_numpy(),
+        "dev_3m": _issue_float(issue_df, "dev_3m").to_numpy(),
+        "iso_score": _issue_float(issue_df, "iso_score").to_numpy(),
+        "lof_score": _issue_float(issue_df, "lof_score").to_numpy(),
+        "anomaly_flag": anomaly_flag.to_numpy(),
+    }
+    if with_pattern:
+        upper = _issue_float(issue_df, "normal_upper")
+        lower = _issue_float(issue_df, "normal_lower")
+        cols["patternMean"] = ((upper + lower) / 2.0).to_numpy()
+        cols["patternUpper"] = upper.to_numpy()
+        cols["patternLower"] = lower.to_numpy()
+        cols["display_issue_type"] = display_issue_type
+    return frame_records(pd.DataFrame(cols))
+
+
+# args: 요청 query 인자(dict) - 백그라운드 작업에서는 제출 시점에 복사해 둔 값, 생략하면 현재 요청
+def _timings_requested(args: Optional[Dict[str, Any]] = None) -> bool:
+    args = request.args if args is None else args
+    return str(args.get("timings", "")).lower() in ("1", "true", "yes")
+
+
+def _history_as_requested(history: Any, args: Optional[Dict[str, Any]] = None) -> Any:
+    args = request.args if args is None else args
+    if args.get("history") == "records" and isinstance(history, dict):
+        return history_columns_to_map(history)
+    return history
+
+
+def _history_for_request(result: Dict[str, Any], args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    분석 응답의 history는 기본으로 뺌(계열별 이력은 /api/cost-center/results/<id>/history)
+    ?history=columnar|records 일 때만 전체 이력을 포함(이전 클라이언트 호환)
+    """
+    args = request.args if args is None else args
+    if args.get("history") in ("columnar", "records"):
+        return {**result, "history": _history_as_requested(result.get("history"), args)}
+    return {k: v for k, v in result.items() if k != "history"}
+
+
+def add_normal_band(df: pd.DataFrame, window: int = 6, min_periods: int = 1) -> pd.DataFrame:
+    """
+    (cost_center, account_code)별 최근 `window`행 롤링 평균 ± 2σ(ddof=0)
+      - anomaly_flag 행은 제외하고 계산, 제외 후 값이 없으면 전체 값 기준으로 대체
+    """
+    if "amount" not in df.columns:
+        raise ValueError("add_normal_band: 'amount' 컬럼이 없습니다.")
+    for col in ["year", "month"]:
+        if col not in df.columns:
+            raise ValueError(f"add_normal_band: '{col}' 컬럼이 없습니다.")
+
+    df = df.copy()
+    df = df.sort_values(["cost_center", "account_code", "year", "month"])
+
+    vals = df["amount"].astype(float)
+    if "anomaly_flag" in df.columns:
+        valid_vals = vals.where(~df["anomaly_flag"].astype(bool), np.nan)
+    else:
+        valid_vals = vals
+
+    keys = [df["cost_center"], df["account_code"]]
+
+    def _rolling(s: pd.Series, how: str) -> pd.Series:
+        r = s.groupby(keys, sort=False, dropna=False, observed=True).rolling(window=window, min_periods=min_periods)
+        out = r.mean() if how == "mean" else r.std(ddof=0)
+        return out.reset_index(level=[0, 1], drop=True).reindex(df.index)
+
+    mean_final = _rolling(valid_vals, "mean").fillna(_rolling(vals, "mean"))
+    std_final = _rolling(valid_vals, "std").fillna(_rolling(vals, "std"))
+
+    df["normal_upper"] = mean_final + 2 * std_final
+    df["normal_lower"] = mean_final - 2 * std_final
+
+    return df
+
+
+def _center_stages_before_ensemble(
+    df: pd.DataFrame, pair_info: pd.DataFrame, trace_memory: bool = False
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    코스트센터 파티션 단위: 결측 → 피처 → 상관 파트너 부착
+    """
+    return run_stages(
+        df,
+        [
+            ("missing", partial(detect_potential_missing, lookback_months=3)),
+            ("features", build_features),
+            ("corr_attach", partial(attach_corr_partners, pair_df=pair_info)),
+        ],
+        trace_memory=trace_memory,
+    )
+
+
+def _center_stages_after_ensemble(
+    df: pd.DataFrame, trace_memory: bool = False
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    코스트센터 파티션 단위: 이력 통계 → 설명 → 밴드/전월/룩백 → 규칙
+    """
+    return run_stages(
+        df,
+        [
+            ("history_stats", add_history_stats),
+            ("explanations", build_human_explanations),
+            # [OK] 밴드 계산 전에 일단 밴드(기존대로)
+            ("normal_band", add_normal_band),
+            # [OK] 전월대비/룩백
+            ("mom_change", add_mom_change),
+            ("lookback_flags", add_lookback_valid_flags),
+            # ✅ reason_kor에서 전월 금액/이번 달 금액 verbose 문장 제거
+            ("clean_reason", clean_reason_kor_mom),
+            # ✅ 시즌/이벤트 규칙 반영(여기서 issue_type / severity / reason 보정)
+            ("season_rules", apply_season_event_rules),
+        ],
+        trace_memory=trace_memory,
+    )
+
+
+def _run_partitioned_stages(prof: StageProfiler, name: str, df: pd.DataFrame, fn, ignore_index: bool = False) -> pd.DataFrame:
+    rec = prof.begin(name, df)
+    df, parts = run_partitioned(df, partial(fn, trace_memory=prof.trace_memory), ignore_index=ignore_index)
+    rec["partitions"] = len(parts)
+    prof.end(rec, df)
+    prof.extend(merge_partition_records(parts))
+    return df
+
+
+def _run_anomaly_stages(
+    df: pd.DataFrame, prof: Optional[StageProfiler] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    전체 이력 기준 이상탐지 단계(결측 → 피처 → 상관 → IF+LOF → 설명 → 밴드/전월/룩백 → 규칙)
+      - IF+LOF 이외 단계는 코스트센터별로 독립 → run_partitioned로 프로세스 풀 실행
+      - IF+LOF는 전체 행 기준(단일 barrier 단계)
+    반환: (처리된 long DataFrame, 상관 파트너 DataFrame)
+    """
+    if prof is None:
+        prof = StageProfiler("anomaly_stages", keep=False)
+
+    # 상관행렬은 센터를 묶어 한 번에 계산(+프로세스 내 캐시) 후 파티션별로 부착만 수행
+    pair_info = prof.run("corr_pair_map", compute_corr_pair_map, df)
+
+    df = _run_partitioned_stages(
+        prof, "center_stages_pre", df,
+        partial(_center_stages_before_ensemble, pair_info=pair_info),
+        ignore_index=True,
+    )
+    df = prof.run("cost_nature_code", encode_cost_nature, df)
+
+    df = prof.run("ensemble", run_ensemble_outlier, df)
+
+    df = _run_partitioned_stages(prof, "center_stages_post", df, _center_stages_after_ensemble)
+
+    return df, pair_info
+
+
+# =====================================================
+# 피처 스토어 (centercost_data 기준 이력 피처 저장 + 신규 월 증분 계산)
+# =====================================================
+FEATURE_STORE_PATH = get_cache_path("cost_feature_store.pkl")
+
+
+def _cost_source_manifest():
+    return source_manifest(COST_MONTHLY_DIR)
+
+
+def save_cost_feature_store(df: pd.DataFrame, pair_info) -> Optional[Dict[str, Any]]:
+    try:
+        store = save_feature_store(FEATURE_STORE_PATH, df, _cost_source_manifest(), pair_info)
+        print("[feature_store] saved:", FEATURE_STORE_PATH, "last_ym =", store["last_ym"])
+    except Exception as e:
+        print("[feature_store] save error:", e)
+        return None
+
+    try:
+        export_amount_cube(AMOUNT_CUBE_DIR, store["frame"], store["manifest"])
+    except Exception as e:
+        print("[amount_cube] export error:", e)
+    return store
+
+
+def load_or_build_feature_store() -> Optional[Dict[str, Any]]:
+    store = load_feature_store(FEATURE_STORE_PATH, _cost_source_manifest())
+    if store is not None:
+        return store
+
+    df = load_all_monthly_cost_long()
+    df, pair_info = _run_anomaly_stages(df)
+    return save_cost_feature_store(df, pair_info)
+
+
+# =====================================================
+# 금액 이력 큐브 (피처 스토어 frame → 계열 × 월 mmap, 워커 간 page cache 공유)
+# =====================================================
+AMOUNT_CUBE_DIR = CACHE_DIR / "amount_cube"
+
+_amount_cube: Optional[AmountCube] = None
+_amount_cube_lock = threading.Lock()
+
+
+def get_amount_cube(store: Optional[Dict[str, Any]] = None) -> Optional[AmountCube]:
+    """
+    현재 원천 매니페스트와 맞는 금액 큐브 (읽기 전용 mmap)
+      - 다른 워커가 새로 내보냈으면(포인터 변경) 새 디렉터리로 다시 매핑
+      - 없고 store가 주어지면 store frame으로 내보낸 뒤 매핑
+    """
+    global _amount_cube
+
+    manifest = _cost_source_manifest()
+    with _amount_cube_lock:
+        cube = open_amount_cube(AMOUNT_CUBE_DIR, manifest, current=_amount_cube)
+        if cube is None and store is not None and [tuple(x) for x in store.get("manifest") or []] == manifest:
+            try:
+                if export_amount_cube(AMOUNT_CUBE_DIR, store["frame"], manifest) is not None:
+                    cube = open_amount_cube(AMOUNT_CUBE_DIR, manifest)
+            except Exception as e:
+                print("[amount_cube] export error:", e)
+        _amount_cube = cube
+        return cube
+
+
+# 저장된 IF+LOF 모델 (프로세스 내 1회 로딩, 재학습 시 교체)
+#  - 아티팩트 파일 stat이 바뀌면(다른 워커가 재학습·저장) 다시 로딩
+_anomaly_models: Optional[Dict[str, Any]] = None
+_anomaly_models_file: Optional[Tuple[int, int]] = None
+_anomaly_models_lock = threading.Lock()
+
+
+def _loaded_anomaly_models() -> Optional[Dict[str, Any]]:
+    # _anomaly_models_lock 잡은 상태에서 호출
+    global _anomaly_models, _anomaly_models_file
+
+    stamp = anomaly_artifact_stamp()
+    if _anomaly_models is None or stamp != _anomaly_models_file:
+        loaded = load_anomaly_models()
+        if loaded is not None:
+            if _anomaly_models is not None:
+                print("[anomaly_model] artifact changed on disk, reloaded")
+            _anomaly_models = loaded
+        _anomaly_models_file = stamp
+    return _anomaly_models
+
+
+def get_anomaly_models(store: Optional[Dict[str, Any]] = None, force_retrain: bool = False) -> Dict[str, Any]:
+    """
+    이상탐지 모델 반환
+      - 메모리 → models/ 아티팩트 순으로 로딩(아티팩트가 바뀌었으면 다시 로딩)
+      - 없거나, 피처 구성이 바뀌었거나, 피처 스토어 이력이 RETRAIN_AFTER_MONTHS 이상 늘었거나,
+        force_retrain=True 이면 피처 스토어 이력 전체로 재학습 후 저장
+    """
+    global _anomaly_models, _anomaly_models_file
+
+    with _anomaly_models_lock:
+        payload = _loaded_anomaly_models()
+
+        if store is None and (force_retrain or payload is None):
+            store = load_or_build_feature_store()
+        last_ym = store.get("last_ym") if store is not None else None
+
+        if force_retrain or needs_retrain(payload, ENSEMBLE_FEATURE_COLS, last_ym):
+            if store is None:
+                raise ValueError("이상탐지 모델 학습에 필요한 피처 스토어가 없습니다.")
+            payload = fit_anomaly_models(store["frame"], ENSEMBLE_FEATURE_COLS, last_ym=last_ym)
+            try:
+                save_anomaly_models(payload)
+                _anomaly_models_file = anomaly_artifact_stamp()
+                print("[anomaly_model] retrained, last_ym =", last_ym, "n_train =", payload["n_train"])
+            except Exception as e:
+                print("[anomaly_model] save error:", e)
+
+        _anomaly_models = payload
+        return payload
+
+
+# 업로드 분석 점수용 모델: 원천 버전(namespace)마다 한 번 재학습 정책을 확인하고 그 뒤로는 메모리 모델
+# (결과 캐시 키와 점수 계산이 같은 payload를 쓰도록 분석 전에 먼저 확정)
+#  - 다른 워커가 재학습해 아티팩트가 바뀌었으면 그 모델로 교체 → 어느 워커든 같은 모델로 점수 계산
+_scoring_models_namespace: Optional[str] = None
+
+
+def get_scoring_models(namespace: str) -> Optional[Dict[str, Any]]:
+    global _scoring_models_namespace
+
+    with _anomaly_models_lock:
+        if _scoring_models_namespace == namespace and _anomaly_models is not None:
+            return _loaded_anomaly_models()
+
+    store = load_or_build_feature_store()
+    if store is None:
+        return None
+    payload = get_anomaly_models(store)
+    _scoring_models_namespace = namespace
+    return payload
+
+
+def _run_incremental_month_stages(
+    upload_df: pd.DataFrame,
+    store: Dict[str, Any],
+    prof: Optional[StageProfiler] = None,
+    models: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    저장된 이력 피처 + 업로드 월만으로 해당 월 행을 계산
+      - 롤링/룩백 계열: 직전 CONTEXT_MONTHS 구간만 꺼내 함께 계산
+      - 이력만 쓰는 단계(이력 통계 / 밴드 / 전월 / 룩백): 금액 큐브가 있으면 대상 계열 행만 꺼내 계산
+        (업로드에 같은 계열이 중복되면 행 순서가 필요하므로 long 구간 계산)
+      - 그룹 전체 통계(mean_12/std_12, 누적 0원): 계열별 상태로 이어서 계산
+      - 상관 파트너: 저장된 파트너 맵 재사용
+      - IF+LOF: 저장된 모델로 신규 월 행만 점수 계산(score-only, 재학습 정책은 get_anomaly_models)
+        models가 주어지면 그 모델로 계산(업로드 분석: 결과 캐시 키를 만든 모델)
+    """
+    if prof is None:
+        prof = StageProfiler("incremental_stages", keep=False)
+
+    target_ym = str(upload_df["year_month"].iloc[0])
+    ctx = context_frame(store, target_ym)
+
+    new_rows = upload_df.copy()
+    for col in FEATURE_STORE_RAW_COLS:
+        if col not in new_rows.columns:
+            new_rows[col] = np.nan
+    new_rows["__is_new"] = True
+
+    work = pd.concat(
+        [ctx[FEATURE_STORE_RAW_COLS].assign(__is_new=False), new_rows],
+        ignore_index=True,
+    )
+    work = encode_keys(work)
+    work = prof.run("missing", detect_potential_missing, work, lookback_months=3)
+    work = prof.run("features", build_features, work)
+
+    cube = None
+    if not upload_df.duplicated(["cost_center", "account_code"]).any():
+        cube = get_amount_cube(store)
+
+    def _gather(d: pd.DataFrame) -> Dict[str, np.ndarray]:
+        # 큐브 이력은 d의 행 순서에 맞춰 꺼냄(중간 단계에서 행 순서가 바뀔 수 있어 단계 묶음마다 다시 꺼냄)
+        return prof.run("cube_gather", cube.gather, d, before_ym=target_ym)
+
+    if cube is None:
+        work = prof.run("history_stats", add_history_stats, work)
+        df_new = work[work["__is_new"]].copy()
+    else:
+        df_new = work[work["__is_new"]].copy()
+        df_new = prof.run("history_stats", cube_history_stats, df_new, _gather(df_new))
+
+    df_new = prof.run("series_state", apply_series_state, df_new, store)
+    df_new = prof.run("corr_attach", attach_corr_partners, df_new, store.get("pair_info"))
+
+    if models is None:
+        models = get_anomaly_models(store)
+    df_new = prof.run("ensemble_score", lambda d: score_anomaly(models, d), df_new)
+
+    df_new = prof.run("explanations", build_human_explanations, df_new)
+
+    if cube is not None:
+        # 큐브 이력으로 신규 월 행만 계산 (long 경로와 같은 계열·연월 정렬)
+        hist = _gather(df_new)
+        df_new = prof.run("normal_band", cube_normal_band, df_new, hist)
+        df_new = prof.run("mom_change", _mom_change_from_cube, df_new, hist)
+        df_new = prof.run("lookback_flags", cube_lookback_flags, df_new, hist)
+        df_new = df_new.sort_values(["cost_center", "account_code", "year", "month"]).drop(columns=["__is_new"])
+    else:
+        # 밴드/전월/룩백은 직전 구간과 함께 계산 후 신규 월만 남김
+        band_cols = FEATURE_STORE_RAW_COLS + ["anomaly_flag"]
+        work2 = pd.concat(
+            [ctx.reindex(columns=band_cols).assign(__is_new=False), df_new],
+            ignore_index=True,
+        )
+        work2 = prof.run("normal_band", add_normal_band, work2)
+        work2 = prof.run("mom_change", add_mom_change, work2)
+        work2 = prof.run("lookback_flags", add_lookback_valid_flags, work2)
+        df_new = work2[work2["__is_new"].astype(bool)].drop(columns=["__is_new"])
+    df_new = prof.run("clean_reason", clean_reason_kor_mom, df_new)
+    df_new = prof.run(
+        "season_rules", apply_season_event_rules, df_new, history=context_frame(store, target_ym, months=24)
+    )
+    return df_new
+
+
+# 증분 경로 응답용 저장 이력 기준값(wide 행렬 / 컬럼형 이력) - 원천 매니페스트마다 한 번 만들고 프로세스에 보관
+_incremental_base: Optional[Dict[str, Any]] = None
+_incremental_base_lock = threading.Lock()
+
+
+def get_incremental_base(store: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    반환: {"manifest", "wide", "history", "history_pairs"} (store 이력만으로 만든 값, 읽기 전용)
+    업로드마다 여기에 새 월만 붙임(append_wide_months / append_history_columns)
+    """
+    global _incremental_base
+
+    manifest = [tuple(x) for x in store.get("manifest") or []]
+    with _incremental_base_lock:
+        base = _incremental_base
+        if base is None or base["manifest"] != manifest:
+            history, cc_keys, acc_keys = _build_history_columns(store["frame"])
+            base = {
+                "manifest": manifest,
+                "wide": build_wide_cost_data(store["frame"]),
+                "history": history,
+                "history_pairs": (cc_keys, acc_keys),
+            }
+            _incremental_base = base
+        return base
+
+
+def run_monthly_anomaly_pipeline(
+    upload_df: pd.DataFrame,
+    incremental: bool = True,
+    prof: Optional[StageProfiler] = None,
+    models: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    if upload_df.empty:
+        raise ValueError("업로드된 데이터에 내용이 없습니다.")
+    if prof is None:
+        prof = StageProfiler("analyze", keep=False)
+
+    target_ym = upload_df["year_month"].iloc[0]
+
+    store = None
+    if incremental:
+        try:
+            rec = prof.begin("feature_store")
+            store = load_or_build_feature_store()
+            prof.end(rec, store["frame"] if store is not None else None)
+        except Exception as e:
+            print("[feature_store] unavailable, 전체 재계산:", e)
+            store = None
+
+    # 저장 이력의 마지막 월 이후(신규 월 추가)만 증분 경로, 과거 월 교체는 전체 재계산
+    if store is not None and store.get("last_ym") and str(target_ym) > str(store["last_ym"]):
+        df_month = _run_incremental_month_stages(upload_df, store, prof=prof, models=models)
+        # 점수 이후 단계도 새 월 행만: 저장 이력 기준값(원천 버전마다 1회)에 새 월 컬럼/행을 붙임
+        base = prof.run("incremental_base", get_incremental_base, store)
+        wide_df = prof.run("wide_cost_data", lambda d: append_wide_months(base["wide"], d), df_month)
+        history_map = prof.run(
+            "history_columns", lambda d: append_history_columns(base["history"], base["history_pairs"], d), df_month
+        )
+    else:
+        base_df = prof.run("load_history", lambda _: load_all_monthly_cost_long(), None)
+        base_df = base_df[base_df["year_month"] != target_ym].copy()
+        df_all = encode_keys(pd.concat([base_df, upload_df], ignore_index=True))
+        df_all, _ = _run_anomaly_stages(df_all, prof=prof)
+        df_month = df_all[df_all["year_month"] == target_ym].copy()
+
+        wide_df = prof.run("wide_cost_data", build_wide_cost_data, df_all)
+        history_map = prof.run("history_columns", build_history_columns, df_all)
+
+    # costData는 화면 호환상 전체 wide 행렬(계열 × 월) 그대로 반환
+    cost_data_updated = prof.run("cost_data_records", frame_records, wide_df)
+    response_rec = prof.begin("response", df_month)
+
+    df_month = decode_keys(df_month)
+    if df_month.empty:
+        raise ValueError(f"파이프라인 이후에도 {target_ym} 데이터가 없습니다.")
+
+    def _status_from_row(row):
+        issue_type = row.get("issue_type")
+        if issue_type == "결측 의심":
+            return "issue"
+        if issue_type == "정상":
+            return "ok"
+        if issue_type == "이상치 의심":
+            return "check"
+        return "check"
+
+    df_month["status"] = df_month.apply(_status_from_row, axis=1)
+    df_month["is_issue"] = df_month["status"] != "ok"
+
+    total_rows = int(len(df_month))
+    issue_rows = int(df_month["is_issue"].sum())
+    missing_rows = int((df_month["issue_type"] == "결측 의심").sum())
+    anomaly_rows = int((df_month["issue_type"] == "이상치 의심").sum())
+    total_amount = float(df_month["amount"].sum(skipna=True))
+
+    summary = {
+        "year_month": target_ym,
+        "total_rows": total_rows,
+        "issue_rows": issue_rows,
+        "missing_rows": missing_rows,
+        "anomaly_rows": anomaly_rows,
+        "total_amount": total_amount,
+        "issue_ratio": float(issue_rows / total_rows) if total_rows else 0.0,
+    }
+
+    center_group = (
+        df_month.groupby(["cost_center", "cc_name"], dropna=False)
+        .agg(
+            total_rows=("is_issue", "count"),
+            issue_rows=("is_issue", "sum"),
+            missing_rows=("issue_type", lambda s: (s == "결측 의심").sum()),
+            anomaly_rows=("issue_type", lambda s: (s == "이상치 의심").sum()),
+            total_amount=("amount", "sum"),
         )
         .reset_index()
     )
@@ -1499,114 +2334,16 @@ def run_monthly_anomaly_pipeline(upload_df: pd.DataFrame) -> Dict[str, Any]:
     center_group["issue_ratio"] = center_group["issue_rows"] / center_group["total_rows"].replace(0, np.nan)
     center_group = center_group.sort_values(["issue_rows", "total_amount"], ascending=[False, False])
 
-    centers: List[Dict[str, Any]] = []
-    for _, row in center_group.iterrows():
-        centers.append(
-            {
-                "cost_center": str(row["cost_center"]),
-                "cc_name": str(row["cc_name"]),
-                "total_rows": int(row["total_rows"]),
-                "issue_rows": int(row["issue_rows"]),
-                "missing_rows": int(row["missing_rows"]),
-                "anomaly_rows": int(row["anomaly_rows"]),
-                "total_amount": float(row["total_amount"]),
-                "issue_ratio": float(row["issue_ratio"]) if pd.notna(row["issue_ratio"]) else 0.0,
-            }
-        )
+    centers = _center_records(center_group)
 
     issue_df = df_month[df_month["is_issue"]].copy()
     order_map = {"issue": 0, "check": 1, "ok": 2}
     issue_df["__order"] = issue_df["status"].map(order_map).fillna(1)
     issue_df = issue_df.sort_values(["__order", "severity_rank", "amount"], ascending=[True, False, False])
 
-    issues: List[Dict[str, Any]] = []
-    for _, row in issue_df.iterrows():
-        row_key = f"{row.get('cost_center')}|{row.get('account_code')}"
-
-        nu = row.get("normal_upper")
-        nl = row.get("normal_lower")
-        pattern_upper = float(nu) if (nu is not None and pd.notna(nu)) else None
-        pattern_lower = float(nl) if (nl is not None and pd.notna(nl)) else None
-        pattern_mean = (
-            (pattern_upper + pattern_lower) / 2.0
-            if (pattern_upper is not None and pattern_lower is not None)
-            else None
-        )
-
-        amt_val = row.get("amount")
-        is_missing_like = False
-        try:
-            if pd.isna(amt_val) or float(amt_val) == 0.0:
-                is_missing_like = True
-        except Exception:
-            pass
-
-        if is_missing_like:
-            display_issue_type = "누락"
-        elif str(row.get("issue_type")) == "이상치 의심":
-            display_issue_type = "이상"
-        else:
-            display_issue_type = str(row.get("issue_type"))
-
-        reason_kor = str(row.get("reason_kor") or "")
-        # ✅ 사유(상세) 전월대비 변동% 부호 보정
-        reason_kor = _apply_mom_detail_to_reason(reason_kor, row.get("amount"), row.get("prev_amount"))
-        reason_tags = row.get("reason_tags", [])
-
-        mom_pct = row.get("mom_change_pct")
-        lb3 = row.get("lookback3_has_value")
-        lb12 = row.get("lookback12_has_value")
-
-        reason_summary = _summarize_reason(
-            reason_kor,
-            reason_tags,
-            display_issue_type,
-            mom_pct,
-            lb3,
-            lb12,
-            zscore_12=row.get("zscore_12"),
-            dev_3m=row.get("dev_3m"),
-            iso_score=row.get("iso_score"),
-            lof_score=row.get("lof_score"),
-            corr_score=row.get("corr_score") or row.get("corr_anom_score"),
-        )
+    issues = _issue_records(issue_df, with_pattern=True)
 
-        issues.append(
-            {
-                "row_key": row_key,
-                "year_month": str(row.get("year_month")),
-                "year": int(row.get("year")),
-                "month": int(row.get("month")),
-                "cost_center": str(row.get("cost_center")),
-                "cc_name": str(row.get("cc_name")),
-                "account_code": str(row.get("account_code")),
-                "account_name": str(row.get("account_name")),
-                "cost_nature": str(row.get("cost_nature")),
-                "amount": float(row.get("amount")) if pd.notna(row.get("amount")) else None,
-
-                "prev_amount": float(row.get("prev_amount")) if pd.notna(row.get("prev_amount")) else None,
-                "mom_change_pct": float(mom_pct) if (mom_pct is not None and pd.notna(mom_pct)) else None,
-
-                "lookback3_has_value": bool(lb3) if pd.notna(lb3) else None,
-                "lookback12_has_value": bool(lb12) if pd.notna(lb12) else None,
-
-                "issue_type": str(row.get("issue_type")),
-                "severity_rank": int(row.get("severity_rank", 1)),
-                "status": row.get("status"),
-                "reason_kor": reason_kor,
-                "reason_summary": reason_summary,
-                "reason_tags": reason_tags,
-                "zscore_12": float(row.get("zscore_12")) if pd.notna(row.get("zscore_12")) else None,
-                "dev_3m": float(row.get("dev_3m")) if pd.notna(row.get("dev_3m")) else None,
-                "iso_score": float(row.get("iso_score")) if pd.notna(row.get("iso_score")) else None,
-                "lof_score": float(row.get("lof_score")) if pd.notna(row.get("lof_score")) else None,
-                "anomaly_flag": bool(row.get("anomaly_flag", False)),
-                "patternMean": pattern_mean,
-                "patternUpper": pattern_upper,
-                "patternLower": pattern_lower,
-                "display_issue_type": display_issue_type,
-            }
-        )
+    prof.end(response_rec, rows_out=len(issues))
 
     return {
         "summary": summary,
@@ -1617,6 +2354,103 @@ def run_monthly_anomaly_pipeline(upload_df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
+# =====================================================
+# 백그라운드 작업 (무거운 요청)
+#   - 분석 / PL 리포트 생성 / 재학습 / FX-관세 분석 요청에 ?async=1 → 202 + job_id
+#   - GET /api/jobs/<id>?wait=초[&since=version] 상태(long-poll), GET /api/jobs/<id>/result 결과
+#   - POST /api/jobs/<id>/cancel 취소(실행 중이면 다음 단계 경계에서 중단)
+#   - 상태·결과는 cache/jobs/에도 기록 → gunicorn 워커 여러 개 중 어느 워커로 폴링해도 조회됨
+# =====================================================
+job_manager = JobManager(store=JobStore(CACHE_DIR / "jobs"))
+
+MAX_JOB_WAIT_S = 60
+
+
+def _async_requested() -> bool:
+    return str(request.args.get("async", "")).lower() in ("1", "true", "yes")
+
+
+def _submit_job(kind: str, fn: Callable[[JobContext], Any], **kwargs):
+    try:
+        job = job_manager.submit(kind, fn, **kwargs)
+    except JobQueueFull as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    job_id = job["job_id"]
+    return (
+        jsonify({"ok": True, **job, "status_url": f"/api/jobs/{job_id}", "result_url": f"/api/jobs/{job_id}/result"}),
+        202,
+    )
+
+
+def _job_wait_args() -> Tuple[int, Optional[int]]:
+    wait = _safe_int(request.args.get("wait", 0), 0, min_value=0, max_value=MAX_JOB_WAIT_S)
+    since = request.args.get("since")
+    return wait, (_safe_int(since, 0) if since not in (None, "") else None)
+
+
+@app.route("/api/jobs", methods=["GET"])
+def jobs_list():
+    kind = request.args.get("kind") or None
+    return jsonify({"ok": True, **job_manager.stats(), "items": job_manager.list(kind)}), 200
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    wait, since = _job_wait_args()
+    job = job_manager.wait(job_id, wait, since) if wait else job_manager.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "작업을 찾을 수 없습니다(만료되었거나 없는 작업)."}), 404
+    return jsonify({"ok": True, **job}), 200
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id: str):
+    """
+    끝난 작업: 원래 동기 요청과 같은 응답 본문 / 진행 중: 202 + 상태 (?wait=초 만큼 기다린 뒤)
+    """
+    wait, _ = _job_wait_args()
+    job = job_manager.wait(job_id, wait) if wait else job_manager.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "작업을 찾을 수 없습니다(만료되었거나 없는 작업)."}), 404
+    if job["status"] == "succeeded":
+        if job["result_expired"]:
+            return jsonify({"ok": False, "error": "작업 결과 보관 기간이 지났습니다. 다시 요청해 주세요."}), 410
+        return jsonify(job_manager.result(job_id)), 200
+    if job["status"] == "failed":
+        return jsonify({"ok": False, "job_id": job_id, "error": job["error"]}), 500
+    if job["status"] == "cancelled":
+        return jsonify({"ok": False, "job_id": job_id, "error": job["error"] or "작업이 취소되었습니다."}), 409
+    return jsonify({"ok": True, **job}), 202
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def job_cancel(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify({"ok": True, **job}), 200
+
+
+# =====================================================
+# 업로드 분석 결과 캐시 (업로드 바이트 + 기준 이력 + 모델 버전)
+# =====================================================
+# 응답 구조/파이프라인 로직이 바뀌면 올림
+ANALYZE_RESULT_VERSION = 1
+
+analyze_result_cache = ResultCache(CACHE_DIR / "analyze_results")
+
+
+def _analyze_cache_namespace() -> str:
+    # 기준 이력 지문: centercost_data 버전이 바뀌면 기존 항목 전부 무효화
+    return cache_manager.input_versions(["centercost_data"])["centercost_data"]
+
+
+def _analyze_cache_key(raw: bytes, models: Optional[Dict[str, Any]]) -> str:
+    # models: 이번 분석에서 점수 계산에 쓸 payload(get_scoring_models) - 모델 파일 stat이 아니라 실제 사용 모델 기준
+    versions = (ANALYZE_RESULT_VERSION, HISTORY_LAYOUT, anomaly_model_stamp(models))
+    return fingerprint([raw, versions])
+
+
 @app.route("/api/cost-center/analyze", methods=["POST"])
 def analyze_cost_center():
     if "file" not in request.files:
@@ -1627,52 +2461,91 @@ def analyze_cost_center():
         return jsonify({"error": "업로드된 파일명이 비어 있습니다."}), 400
 
     try:
-        upload_df = parse_single_month_excel(io.BytesIO(f.read()))
-        result = run_monthly_anomaly_pipeline(upload_df)
-        return jsonify(result)
+        raw = f.read()
+        args = request.args.to_dict()
+        if _async_requested():
+            return _submit_job(
+                "cost_center_analyze",
+                lambda ctx: _analyze_upload(raw, args, on_stage=ctx.stage),
+                meta={"filename": f.filename},
+            )
+        return jsonify(_analyze_upload(raw, args))
     except Exception as e:
         print("[/api/cost-center/analyze] error:", e)
         return jsonify({"error": str(e)}), 500
 
 
-def run_default_cost_center_anomaly(use_cache: bool = True) -> Dict[str, Any]:
-    cache_path = get_cache_path("default_anomaly_result.pkl")
+def _analyze_upload(raw: bytes, args: Dict[str, Any], on_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    업로드 월 분석 → 응답 본문 (요청 스레드 / 백그라운드 작업 공용)
+    """
+    prof = StageProfiler("analyze", trace_memory=_timings_requested(args), on_stage=on_stage)
+    try:
+        namespace = _analyze_cache_namespace()
+        models = prof.run("scoring_models", lambda ns: get_scoring_models(ns), namespace)
+        cache_key = _analyze_cache_key(raw, models)
+
+        result = prof.run("result_cache_get", lambda _: analyze_result_cache.get(namespace, cache_key), None)
+        if result is None:
+            upload_df = prof.run("parse_upload", lambda b: parse_single_month_excel(io.BytesIO(b)), raw)
+            result = run_monthly_anomaly_pipeline(upload_df, prof=prof, models=models)
+            try:
+                analyze_result_cache.put(namespace, cache_key, result)
+            except Exception as e:
+                print("[/api/cost-center/analyze] cache save error:", e)
+        else:
+            print("[/api/cost-center/analyze] result cache hit:", cache_key[:12])
+        timings = prof.finish()
+    except Exception:
+        prof.finish()
+        raise
+    return _analyze_payload(_upload_result_id(namespace, cache_key), result, timings, args)
 
-    if use_cache and os.path.exists(cache_path):
-        try:
-            with open(cache_path, "rb") as f:
-                result = pickle.load(f)
-            print("[run_default_cost_center_anomaly] loaded from cache:", cache_path)
+
+def run_default_cost_center_anomaly(use_cache: bool = True, prof: Optional[StageProfiler] = None) -> Dict[str, Any]:
+    """
+    centercost_data 전체 이력 기준 최신 월 분석 결과
+    캐시(default_anomaly_result.pkl)는 centercost_data 버전 / 결과 구조 버전이 같을 때만 사용
+    """
+    if prof is None:
+        prof = StageProfiler("analyze_default", keep=False)
+
+    if use_cache:
+        result = cache_manager.load_fresh("default_anomaly_result")
+        if result is not None:
+            print("[run_default_cost_center_anomaly] loaded from cache")
             return result
-        except Exception as e:
-            print("[run_default_cost_center_anomaly] cache load error, 재계산:", e)
 
-    df = load_all_monthly_cost_long()
-    df = detect_potential_missing(df, lookback_months=3)
-    df = build_features(df)
-    df = compute_corr_pairs(df)
-    df = run_ensemble_outlier(df)
-    df = build_human_explanations(df)
-    df = add_normal_band(df)
+    # 계산 시작 시점의 입력 버전으로 기록(계산 중 파일이 바뀌면 다음 요청에서 다시 계산)
+    versions = cache_manager.current_versions("default_anomaly_result")
+    result = _build_default_anomaly_result(prof=prof)
+    try:
+        cache_manager.put("default_anomaly_result", result, versions)
+        print("[run_default_cost_center_anomaly] saved cache")
+    except Exception as e:
+        print("[run_default_cost_center_anomaly] cache save error:", e)
+    return result
 
-    df = add_mom_change(df)
-    df = add_lookback_valid_flags(df)
 
+def _build_default_anomaly_result(_previous=None, prof: Optional[StageProfiler] = None) -> Dict[str, Any]:
+    if prof is None:
+        prof = StageProfiler("analyze_default", keep=False)
 
-    # ✅ reason_kor에서 전월 금액/이번 달 금액 verbose 문장 제거
-    df = clean_reason_kor_mom(df)
+    df = prof.run("load_history", lambda _: load_all_monthly_cost_long(), None)
+    df, pair_info = _run_anomaly_stages(df, prof=prof)
 
-    # ✅ 시즌/이벤트 규칙 반영
-    df = apply_season_event_rules(df)
+    # 같은 결과로 피처 스토어도 갱신(업로드 분석의 증분 경로용)
+    prof.run("feature_store_save", lambda d: save_cost_feature_store(d, pair_info), df)
 
-    df["year_month"] = df["year_month"].astype(str)
+    df["year_month"] = as_key_str(df["year_month"])
     unique_ym = sorted(df["year_month"].unique())
     if not unique_ym:
         raise ValueError("year_month 값이 없습니다.")
     target_ym = unique_ym[-1]
 
-    history_map = build_history_map(df)
-    df_month = df[df["year_month"] == target_ym].copy()
+    history_map = prof.run("history_columns", build_history_columns, df)
+    response_rec = prof.begin("response", df)
+    df_month = decode_keys(df[df["year_month"] == target_ym].copy())
     if df_month.empty:
         raise ValueError(f"{target_ym} 월 데이터가 없습니다.")
 
@@ -1716,126 +2589,283 @@ def run_default_cost_center_anomaly(use_cache: bool = True) -> Dict[str, Any]:
     center_group["issue_ratio"] = center_group["issue_rows"] / center_group["total_rows"].replace(0, np.nan)
     center_group = center_group.sort_values(["issue_rows", "total_amount"], ascending=[False, False])
 
-    centers: List[Dict[str, Any]] = []
-    for _, row in center_group.iterrows():
-        centers.append(
-            {
-                "cost_center": str(row["cost_center"]),
-                "cc_name": str(row["cc_name"]),
-                "total_rows": int(row["total_rows"]),
-                "issue_rows": int(row["issue_rows"]),
-                "missing_rows": int(row["missing_rows"]),
-                "anomaly_rows": int(row["anomaly_rows"]),
-                "total_amount": float(row["total_amount"]),
-                "issue_ratio": float(row["issue_ratio"]) if pd.notna(row["issue_ratio"]) else 0.0,
-            }
-        )
+    centers = _center_records(center_group)
 
     issue_df = df_month[df_month["is_issue"]].copy()
     order_map = {"issue": 0, "check": 1, "ok": 2}
     issue_df["__order"] = issue_df["status"].map(order_map).fillna(1)
     issue_df = issue_df.sort_values(["__order", "severity_rank", "amount"], ascending=[True, False, False])
 
-    issues: List[Dict[str, Any]] = []
-    for _, row in issue_df.iterrows():
-        row_key = f"{row.get('cost_center')}|{row.get('account_code')}"
-
-        amt_val = row.get("amount")
-        is_missing_like = False
-        try:
-            if pd.isna(amt_val) or float(amt_val) == 0.0:
-                is_missing_like = True
-        except Exception:
-            pass
-
-        if is_missing_like:
-            display_issue_type = "누락"
-        elif str(row.get("issue_type")) == "이상치 의심":
-            display_issue_type = "이상"
-        else:
-            display_issue_type = str(row.get("issue_type"))
-
-        reason_kor = str(row.get("reason_kor") or "")
-        # ✅ 사유(상세) 전월대비 변동% 부호 보정
-        reason_kor = _apply_mom_detail_to_reason(reason_kor, row.get("amount"), row.get("prev_amount"))
-        reason_tags = row.get("reason_tags", [])
-
-        mom_pct = row.get("mom_change_pct")
-        lb3 = row.get("lookback3_has_value")
-        lb12 = row.get("lookback12_has_value")
-
-        reason_summary = _summarize_reason(
-            reason_kor,
-            reason_tags,
-            display_issue_type,
-            mom_pct,
-            lb3,
-            lb12,
-            zscore_12=row.get("zscore_12"),
-            dev_3m=row.get("dev_3m"),
-            iso_score=row.get("iso_score"),
-            lof_score=row.get("lof_score"),
-            corr_score=row.get("corr_score") or row.get("corr_anom_score"),
-        )
-
-        issues.append(
-            {
-                "row_key": row_key,
-                "year_month": str(row.get("year_month")),
-                "year": int(row.get("year")),
-                "month": int(row.get("month")),
-                "cost_center": str(row.get("cost_center")),
-                "cc_name": str(row.get("cc_name")),
-                "account_code": str(row.get("account_code")),
-                "account_name": str(row.get("account_name")),
-                "cost_nature": str(row.get("cost_nature")),
-                "amount": float(row.get("amount")) if pd.notna(row.get("amount")) else None,
-
-                "prev_amount": float(row.get("prev_amount")) if pd.notna(row.get("prev_amount")) else None,
-                "mom_change_pct": float(mom_pct) if (mom_pct is not None and pd.notna(mom_pct)) else None,
-
-                "lookback3_has_value": bool(lb3) if pd.notna(lb3) else None,
-                "lookback12_has_value": bool(lb12) if pd.notna(lb12) else None,
-
-                "issue_type": str(row.get("issue_type")),
-                "severity_rank": int(row.get("severity_rank", 1)),
-                "status": row.get("status"),
-                "reason_kor": reason_kor,
-                "reason_summary": reason_summary,
-                "reason_tags": reason_tags,
-                "zscore_12": float(row.get("zscore_12")) if pd.notna(row.get("zscore_12")) else None,
-                "dev_3m": float(row.get("dev_3m")) if pd.notna(row.get("dev_3m")) else None,
-                "iso_score": float(row.get("iso_score")) if pd.notna(row.get("iso_score")) else None,
-                "lof_score": float(row.get("lof_score")) if pd.notna(row.get("lof_score")) else None,
-                "anomaly_flag": bool(row.get("anomaly_flag", False)),
-            }
-        )
+    issues = _issue_records(issue_df)
 
     result = {"summary": summary, "centers": centers, "issues": issues, "history": history_map}
+    prof.end(response_rec, rows_out=len(issues))
+    return result
 
-    try:
-        with open(cache_path, "wb") as f:
-            pickle.dump(result, f)
-        print("[run_default_cost_center_anomaly] saved cache:", cache_path)
-    except Exception as e:
-        print("[run_default_cost_center_anomaly] cache save error:", e)
 
-    return result
+cache_manager.register_cache(
+    "default_anomaly_result",
+    "default_anomaly_result.pkl",
+    ["centercost_data"],
+    build=_build_default_anomaly_result,
+    version=f"{ANALYZE_RESULT_VERSION}:{HISTORY_LAYOUT}",
+)
 
 
 @app.route("/api/cost-center/analyze-default", methods=["GET"])
 def analyze_cost_center_default():
     try:
-        result = run_default_cost_center_anomaly(use_cache=True)
-        return jsonify(result)
+        args = request.args.to_dict()
+        if _async_requested():
+            return _submit_job("cost_center_analyze_default", lambda ctx: _analyze_default(args, on_stage=ctx.stage))
+        return jsonify(_analyze_default(args))
     except Exception as e:
         print("[/api/cost-center/analyze-default] error:", e)
         return jsonify({"error": str(e)}), 500
 
 
+def _analyze_default(args: Dict[str, Any], on_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    prof = StageProfiler("analyze_default", trace_memory=_timings_requested(args), on_stage=on_stage)
+    try:
+        # 결과 id는 계산 전 버전으로(계산 중 입력이 바뀌면 다음 페이지 요청은 404 → 다시 분석)
+        result_id = _default_result_id()
+        result = run_default_cost_center_anomaly(use_cache=True, prof=prof)
+        timings = prof.finish()
+    except Exception:
+        prof.finish()
+        raise
+    return _analyze_payload(result_id, result, timings, args)
+
+
+# =====================================================
+# 분석 결과 페이지 조회 (result id + cursor)
+#   - ?view=page 로 분석하면 summary + issues/centers 첫 페이지 + result_id만 응답
+#   - 나머지는 /api/cost-center/results/<result_id>/... 로 필터·정렬·커서 조회
+#   - 계열별 이력은 /api/cost-center/results/<result_id>/history 로 필요한 키만
+#   - 결과 자체는 기존 저장소(default_anomaly_result 캐시 / analyze_result_cache)에서 다시 찾음
+#     id에 기준 이력 버전이 들어가므로 이력이 바뀌면 예전 id는 404(= 다시 분석)
+# =====================================================
+result_lru = ResultLRU()
+
+
+def _default_result_id() -> str:
+    return "default-" + _analyze_cache_namespace()[:16]
+
+
+def _upload_result_id(namespace: str, cache_key: str) -> str:
+    return f"upload-{namespace[:16]}-{cache_key}"
+
+
+def _load_result_by_id(result_id: str) -> Optional[Dict[str, Any]]:
+    kind, _, rest = result_id.partition("-")
+    namespace = _analyze_cache_namespace()
+    if kind == "default":
+        if rest != namespace[:16]:
+            return None
+        return run_default_cost_center_anomaly(use_cache=True)
+    if kind == "upload":
+        ns_prefix, _, cache_key = rest.partition("-")
+        if ns_prefix != namespace[:16] or not cache_key:
+            return None
+        return analyze_result_cache.get(namespace, cache_key)
+    return None
+
+
+def _analyze_payload(
+    result_id: str, result: Dict[str, Any], timings: Dict[str, Any], args: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    분석 결과 → 응답 본문
+      - ?view=page: summary + issues/centers 첫 페이지(limit) + result_id
+      - 기본: 전체 결과(history 제외, ?history=columnar|records면 포함) + result_id
+    """
+    # 이어지는 페이지·이력 요청은 프로세스 메모리에서
+    entry = result_lru.get(result_id, lambda _: result)
+    if args.get("view") == "page":
+        limit = str(_safe_int(args.get("limit"), DEFAULT_PAGE_SIZE, min_value=1, max_value=MAX_PAGE_SIZE))
+        out = {
+            "result_id": result_id,
+            "summary": result.get("summary"),
+            "issues": page_rows(entry, "issues", parse_query("issues", {"limit": limit})),
+            "centers": page_rows(entry, "centers", parse_query("centers", {"limit": limit})),
+        }
+    else:
+        out = {**_history_for_request(result, args), "result_id": result_id}
+    if _timings_requested(args):
+        out["_timings"] = timings
+    return out
+
+
+def _result_entry_or_404(result_id: str):
+    entry = result_lru.get(result_id, _load_result_by_id)
+    if entry is None:
+        return None, (jsonify({"ok": False, "error": "분석 결과를 찾을 수 없습니다(만료되었거나 기준 이력이 바뀜). 다시 분석해 주세요."}), 404)
+    return entry, None
+
+
+@app.route("/api/cost-center/results/<result_id>/<list_name>", methods=["GET"])
+def cost_center_result_page(result_id: str, list_name: str):
+    """
+    issues / centers 페이지
+      - 필터: status, severity_rank, cost_center, account_code, issue_type, display_issue_type (쉼표 목록)
+              tag (reason_tags), q (텍스트 검색)
+      - sort: 필드 / -필드, limit, cursor(이전 응답의 next_cursor)
+    """
+    if list_name not in ("issues", "centers"):
+        return jsonify({"ok": False, "error": f"알 수 없는 목록: {list_name}"}), 404
+    try:
+        query = parse_query(list_name, request.args)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    entry, err = _result_entry_or_404(result_id)
+    if err is not None:
+        return err
+    try:
+        page = page_rows(entry, list_name, query)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, "result_id": result_id, **page}), 200
+
+
+@app.route("/api/cost-center/results/<result_id>", methods=["GET"])
+def cost_center_result_fields(result_id: str):
+    """
+    결과 문서 중 필요한 최상위 항목만 (?fields=summary,costData,history, 기본 summary)
+    history는 ?history=records 규칙을 그대로 따름
+    """
+    fields = [f.strip() for f in (request.args.get("fields") or "summary").split(",") if f.strip()]
+    allowed = ("summary", "costData", "history")
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        return jsonify({"ok": False, "error": f"알 수 없는 항목: {', '.join(unknown)} (가능: {', '.join(allowed)})"}), 400
+
+    entry, err = _result_entry_or_404(result_id)
+    if err is not None:
+        return err
+    result = {f: entry["result"].get(f) for f in fields}
+    if "history" in result:
+        result["history"] = _history_as_requested(result["history"])
+    return jsonify({"ok": True, "result_id": result_id, **result}), 200
+
+
+MAX_HISTORY_KEYS = 200
+
+
+@app.route("/api/cost-center/results/<result_id>/history", methods=["GET", "POST"])
+def cost_center_result_history(result_id: str):
+    """
+    계열별 월 이력 (차트용) - 결과에 저장된 컬럼형 이력에서 요청한 키만 잘라서 반환
+      - GET ?keys=코스트센터|계정코드,...  /  POST {"keys": [...]}
+      - 응답: {"history": {키: [월별 row]}, "missing": [이력에 없는 키]}
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        keys = body.get("keys") or []
+        if not isinstance(keys, list):
+            return jsonify({"ok": False, "error": "keys는 목록이어야 합니다."}), 400
+        keys = [str(k).strip() for k in keys if str(k).strip()]
+    else:
+        keys = [k.strip() for k in (request.args.get("keys") or "").split(",") if k.strip()]
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return jsonify({"ok": False, "error": "keys가 비어 있습니다."}), 400
+    if len(keys) > MAX_HISTORY_KEYS:
+        return jsonify({"ok": False, "error": f"keys는 최대 {MAX_HISTORY_KEYS}개까지 요청할 수 있습니다."}), 400
+
+    entry, err = _result_entry_or_404(result_id)
+    if err is not None:
+        return err
+    cols = entry["result"].get("history")
+    if not isinstance(cols, dict) or cols.get("layout") != HISTORY_LAYOUT:
+        return jsonify({"ok": False, "error": "결과에 컬럼형 이력이 없습니다."}), 404
+    if entry["history_pos"] is None:
+        entry["history_pos"] = {key: i for i, key in enumerate(cols["keys"])}
+    found, missing = history_series(cols, keys, entry["history_pos"])
+    return jsonify({"ok": True, "result_id": result_id, "history": found, "missing": missing}), 200
+
+
+@app.route("/api/diagnostics/pipeline-timings", methods=["GET"])
+def diagnostics_pipeline_timings():
+    limit = _safe_int(request.args.get("limit", 20), 20, min_value=1, max_value=200)
+    pipeline = request.args.get("pipeline") or None
+    return jsonify({"ok": True, "runs": recent_runs(limit=limit, pipeline=pipeline)}), 200
+
+
+@app.route("/api/cost-center/analyze/cache", methods=["GET", "DELETE"])
+def cost_center_analyze_cache():
+    if request.method == "DELETE":
+        removed = analyze_result_cache.clear()
+        return jsonify({"ok": True, "removed": removed}), 200
+    return jsonify({"ok": True, **analyze_result_cache.stats()}), 200
+
+
+@app.route("/api/cache/status", methods=["GET"])
+def cache_status():
+    return jsonify({"ok": True, **cache_manager.status()}), 200
+
+
+@app.route("/api/cache/refresh", methods=["POST"])
+def cache_refresh():
+    """
+    body: {"names": [캐시명...] (생략 시 전체), "force": bool}
+    stale인 캐시만 다시 만듦(force면 전부)
+    """
+    body = request.get_json(silent=True) or {}
+    names = body.get("names") or None
+    unknown = [n for n in (names or []) if n not in cache_manager.cache_names()]
+    if unknown:
+        return jsonify({"ok": False, "error": "알 수 없는 캐시: " + ", ".join(unknown)}), 400
+    results = cache_manager.refresh(names, force=bool(body.get("force")))
+    return jsonify({"ok": True, "results": results}), 200
+
+
+@app.route("/api/cost-center/anomaly-model", methods=["GET"])
+def cost_center_anomaly_model_status():
+    with _anomaly_models_lock:
+        payload = _loaded_anomaly_models()
+    return jsonify({"ok": True, **anomaly_model_info(payload)}), 200
+
+
+def _retrain_anomaly_model(ctx: Optional[JobContext] = None) -> Dict[str, Any]:
+    if ctx is not None:
+        ctx.stage("retrain")
+    payload = get_anomaly_models(force_retrain=True)
+    return {"ok": True, **anomaly_model_info(payload)}
+
+
+@app.route("/api/cost-center/anomaly-model/retrain", methods=["POST"])
+def cost_center_anomaly_model_retrain():
+    if _async_requested():
+        return _submit_job("anomaly_model_retrain", _retrain_anomaly_model, dedupe_key="anomaly_model_retrain")
+    try:
+        return jsonify(_retrain_anomaly_model()), 200
+    except Exception as e:
+        print("[/api/cost-center/anomaly-model/retrain] error:", e)
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 # =====================================================
 # Topic3: P&L Back data 업로드 + 통합 리포트 생성
 # =====================================================
+def _generate_pl_report(
+    original_path: Path, report_path: Path, force: bool, on_stage: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    if on_stage is not None:
+        on_stage("generate_pl_report")
+    try:
+        df = generate_pl_report_df(back_data_file=str(original_path))
+    except TypeError:
+        df = generate_pl_report_df()
+
+    if on_stage is not None:
+        on_stage("write_report")
+    df.to_excel(report_path, sheet_name="보고서", index=False)
+    cache_manager.touch_input("report_data")
+
+    return {"status": "ok", "overwritten": bool(force), "back_data_file": str(original_path), "report_file": str(report_path)}
+
+
 @app.route("/api/pl-report/back-data", methods=["POST"])
 def upload_pl_back_data():
     if "file" not in request.files:
@@ -1920,17 +2950,16 @@ def upload_pl_back_data():
                         pass
 
         f.save(str(original_path))
-
-        try:
-            df = generate_pl_report_df(back_data_file=str(original_path))
-        except TypeError:
-            df = generate_pl_report_df()
-
-        df.to_excel(report_path, sheet_name="보고서", index=False)
-
-        return jsonify(
-            {"status": "ok", "overwritten": bool(force), "back_data_file": str(original_path), "report_file": str(report_path)}
-        )
+        cache_manager.touch_input("report_data")
+
+        # 파일 확인·저장까지는 요청 안에서, 리포트 생성만 작업으로
+        if _async_requested():
+            return _submit_job(
+                "pl_report_generate",
+                lambda ctx: _generate_pl_report(original_path, report_path, force, on_stage=ctx.stage),
+                meta={"back_data_file": original_path.name},
+            )
+        return jsonify(_generate_pl_report(original_path, report_path, force))
 
     except Exception as e:
         print("[ERROR] /api/pl-report/back-data:", e)
@@ -1993,6 +3022,18 @@ def get_pl_cause():
         return jsonify({"error": str(e)}), 500
 
 
+def _build_pl_report_df(_previous=None) -> pd.DataFrame:
+    try:
+        return generate_pl_report_df(back_data_file=str(BACKDATA_EXCEL_PATH))
+    except TypeError:
+        return generate_pl_report_df()
+
+
+cache_manager.register_cache(
+    "pl_report_df", "pl_report_df.pkl", ["report_data", "backdata_xlsx"], build=_build_pl_report_df
+)
+
+
 @app.route("/api/pl-report", methods=["GET"])
 def get_pl_report():
     try:
@@ -2025,30 +3066,13 @@ def get_pl_report():
         if candidates:
             latest_path = candidates[0]
             df = pd.read_excel(latest_path, sheet_name="보고서")
-            rows = df.to_dict(orient="records")
+            rows = frame_records(df)
             return jsonify({"rows": rows, "filename": latest_path.name})
 
-        cache_path = get_cache_path("pl_report_df.pkl")
-        if os.path.exists(cache_path):
-            try:
-                df = pd.read_pickle(cache_path)
-                rows = df.to_dict(orient="records")
-                return jsonify({"rows": rows, "filename": "pl_report_df.pkl"})
-            except Exception as e:
-                print("[/api/pl-report] cache load error, 재계산:", e)
-
-        try:
-            df = generate_pl_report_df(back_data_file=str(BACKDATA_EXCEL_PATH))
-        except TypeError:
-            df = generate_pl_report_df()
-
-        try:
-            df.to_pickle(cache_path)
-        except Exception:
-            pass
-
-        rows = df.to_dict(orient="records")
-        return jsonify({"rows": rows, "filename": "generated_from_backdata"})
+        fresh = cache_manager.is_fresh("pl_report_df")
+        df = cache_manager.get("pl_report_df")
+        rows = frame_records(df)
+        return jsonify({"rows": rows, "filename": "pl_report_df.pkl" if fresh else "generated_from_backdata"})
 
     except Exception as e:
         print("[ERROR] /api/pl-report:", e)
@@ -2058,7 +3082,10 @@ def get_pl_report():
 # =====================================================
 # Topic4: 최신 결산 반영 + 재학습 (백그라운드)
 # =====================================================
-_topic4_state = {
+# 작업 관리자(job_manager)에서 실행, 아래 상태 API는 기존 응답 형식 그대로
+TOPIC4_JOB = "topic4_sync_and_retrain"
+
+_TOPIC4_IDLE = {
     "running": False,
     "step": "idle",
     "started_at": None,
@@ -2067,106 +3094,79 @@ _topic4_state = {
     "error": None,
     "detail": None,
 }
-_topic4_lock = threading.Lock()
 
 
-def _topic4_run_sync_and_retrain():
+def _topic4_run_sync_and_retrain(ctx: JobContext) -> Dict[str, Any]:
     global forecast_payload
 
-    with _topic4_lock:
-        _topic4_state.update(
-            {
-                "running": True,
-                "step": "update_excel",
-                "started_at": datetime.now().isoformat(timespec="seconds"),
-                "finished_at": None,
-                "ok": None,
-                "error": None,
-                "detail": None,
-            }
-        )
+    ctx.stage("update_excel")
+    update_script = str(BASE_DIR / "update_forecast_data.py")
+    proc = subprocess.run(
+        [sys.executable, update_script],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
 
-    try:
-        update_script = str(BASE_DIR / "update_forecast_data.py")
-        proc = subprocess.run(
-            [sys.executable, update_script],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
+    if proc.returncode != 0:
+        raise RuntimeError(
+            "[주제4] update_forecast_data.py 실패\n"
+            f"STDOUT:\n{(proc.stdout or '')[-2000:]}\n"
+            f"STDERR:\n{(proc.stderr or '')[-2000:]}"
         )
 
-        if proc.returncode != 0:
-            raise RuntimeError(
-                "[주제4] update_forecast_data.py 실패\n"
-                f"STDOUT:\n{(proc.stdout or '')[-2000:]}\n"
-                f"STDERR:\n{(proc.stderr or '')[-2000:]}"
-            )
-
-        with _topic4_lock:
-            _topic4_state["detail"] = {"update_stdout": (proc.stdout or "")[-3000:]}
+    ctx.progress(detail={"update_stdout": (proc.stdout or "")[-3000:]})
 
-        with _topic4_lock:
-            _topic4_state["step"] = "train_prophet"
+    ctx.stage("train_prophet")
+    trained = train_prophet_models(test_horizon=6)
+    forecast_payload = trained if trained is not None else load_or_train()
+    return {"ok": True}
 
-        trained = train_prophet_models(test_horizon=6)
-        forecast_payload = trained if trained is not None else load_or_train()
 
-        with _topic4_lock:
-            _topic4_state.update(
-                {
-                    "running": False,
-                    "step": "done",
-                    "finished_at": datetime.now().isoformat(timespec="seconds"),
-                    "ok": True,
-                }
-            )
-
-    except Exception as e:
-        with _topic4_lock:
-            _topic4_state.update(
-                {
-                    "running": False,
-                    "step": "failed",
-                    "finished_at": datetime.now().isoformat(timespec="seconds"),
-                    "ok": False,
-                    "error": str(e),
-                    "detail": {"trace": traceback.format_exc()[-5000:]},
-                }
-            )
+def _topic4_state() -> Dict[str, Any]:
+    job = job_manager.latest(TOPIC4_JOB)
+    if job is None:
+        return dict(_TOPIC4_IDLE)
+    status = job["status"]
+    return {
+        "running": status in ("queued", "running"),
+        "step": {"succeeded": "done", "failed": "failed", "cancelled": "cancelled"}.get(status, job["stage"] or "queued"),
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "ok": {"succeeded": True, "failed": False, "cancelled": False}.get(status),
+        "error": job["error"],
+        "detail": job["detail"],
+        "job_id": job["job_id"],
+    }
 
 
 def _topic4_start_background_job():
-    with _topic4_lock:
-        if _topic4_state["running"]:
-            return {"ok": True, "already_running": True, **_topic4_state}
-
-        t = threading.Thread(target=_topic4_run_sync_and_retrain, daemon=True)
-        t.start()
-        return {"ok": True, "started": True, **_topic4_state}
+    try:
+        job = job_manager.submit(TOPIC4_JOB, _topic4_run_sync_and_retrain, dedupe_key=TOPIC4_JOB)
+    except JobQueueFull as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    flag = "already_running" if job["deduplicated"] else "started"
+    return jsonify({"ok": True, flag: True, **_topic4_state()}), 200
 
 
 @app.route("/api/topic4/sync-and-retrain", methods=["POST"])
 def topic4_sync_and_retrain():
-    payload = _topic4_start_background_job()
-    return jsonify(payload), 200
+    return _topic4_start_background_job()
 
 
 @app.route("/api/topic4/sync-and-retrain/status", methods=["GET"])
 def topic4_sync_and_retrain_status():
-    with _topic4_lock:
-        return jsonify({"ok": True, **_topic4_state}), 200
+    return jsonify({"ok": True, **_topic4_state()}), 200
 
 
 @app.route("/api/closing/sync-and-retrain", methods=["POST"])
 def closing_sync_and_retrain_alias():
-    payload = _topic4_start_background_job()
-    return jsonify(payload), 200
+    return _topic4_start_background_job()
 
 
 @app.route("/api/closing/sync-and-retrain/status", methods=["GET"])
 def closing_sync_and_retrain_status_alias():
-    with _topic4_lock:
-        return jsonify({"ok": True, **_topic4_state}), 200
+    return jsonify({"ok": True, **_topic4_state()}), 200
 
 
 @app.route("/api/closing/forecast", methods=["POST"])
@@ -2346,7 +3346,7 @@ def get_forecast_history_series(months: int = 36) -> Dict[str, Any]:
         dd = df.copy().sort_values("ym")
         if months and months > 0:
             dd = dd.tail(int(months))
-        return dd.to_dict(orient="records")
+        return frame_records(dd)
 
     return {
         "ok": True,
@@ -2441,80 +3441,92 @@ def api_fx_tariff_v2_analyze():
         if "file" not in request.files:
             return jsonify({"ok": False, "error": "file 업로드가 필요합니다"}), 400
         b = request.files["file"].read()
-        an = FxTariffAnalyzer(b)
+        form = request.form.to_dict()
+        if _async_requested():
+            return _submit_job("fx_tariff_analyze", lambda ctx: _fx_tariff_v2_analyze(b, form, ctx))
+        return jsonify(_fx_tariff_v2_analyze(b, form))
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
-        plan_fx = float(request.form.get("plan_fx", "1350") or 1350)
-        tariff_pct = float(request.form.get("tariff_pct", "0") or 0)
-        fx_mode = (request.form.get("fx_mode", "pct") or "pct").strip()
-        fx_change_pct = float(request.form.get("fx_change_pct", "0") or 0)
-        try:
-            forecast_months = int(request.form.get("forecast_months", "").strip() or 0)
-        except Exception:
-            forecast_months = 0
-        if forecast_months <= 0:
-            forecast_months = None
-        else:
-            forecast_months = max(1, min(120, forecast_months))
 
-        car = (request.form.get("car", "") or "").strip()
-        group = (request.form.get("group", "") or "").strip()
-        market = (request.form.get("market", "") or "").strip()
-        q = (request.form.get("q", "") or "").strip()
+def _fx_tariff_v2_analyze(b: bytes, form: Dict[str, str], ctx: Optional[JobContext] = None) -> Dict[str, Any]:
+    if ctx is not None:
+        ctx.stage("load_upload")
+    an = FxTariffAnalyzer(b)
+
+    plan_fx = float(form.get("plan_fx", "1350") or 1350)
+    tariff_pct = float(form.get("tariff_pct", "0") or 0)
+    fx_mode = (form.get("fx_mode", "pct") or "pct").strip()
+    fx_change_pct = float(form.get("fx_change_pct", "0") or 0)
+    try:
+        forecast_months = int(form.get("forecast_months", "").strip() or 0)
+    except Exception:
+        forecast_months = 0
+    if forecast_months <= 0:
+        forecast_months = None
+    else:
+        forecast_months = max(1, min(120, forecast_months))
+
+    car = (form.get("car", "") or "").strip()
+    group = (form.get("group", "") or "").strip()
+    market = (form.get("market", "") or "").strip()
+    q = (form.get("q", "") or "").strip()
 
-        cost_rate_pct_raw = request.form.get("cost_rate_pct", "")
-        cost_rate_pct = None if cost_rate_pct_raw is None or str(cost_rate_pct_raw).strip()=="" else float(cost_rate_pct_raw)
+    cost_rate_pct_raw = form.get("cost_rate_pct", "")
+    cost_rate_pct = None if cost_rate_pct_raw is None or str(cost_rate_pct_raw).strip()=="" else float(cost_rate_pct_raw)
 
-        # 수동 환율 입력(사용자가 직접 입력한 예측 환율 맵)
-        manual_fx_raw = request.form.get("manual_fx_rates", "")
-        manual_fx_rates = None
-        if manual_fx_raw:
-            try:
-                parsed = json.loads(manual_fx_raw)
-                if isinstance(parsed, dict):
-                    manual_fx_rates = {str(k): float(v) for k, v in parsed.items() if v is not None}
-            except Exception:
-                manual_fx_rates = None
-
-        # 사용자 정의 EBIT 시나리오 입력(선택)
-        def _parse(name, default):
-            try:
-                return float(request.form.get(name, default) or default)
-            except Exception:
-                return float(default)
-        scenario_best_exp_pct = _parse("scenario_best_exp_pct", 5.0)
-        scenario_best_tariff_delta_pct = _parse("scenario_best_tariff_delta_pct", 0.0)
-        scenario_worst_exp_pct = _parse("scenario_worst_exp_pct", -5.0)
-        scenario_worst_tariff_delta_pct = _parse("scenario_worst_tariff_delta_pct", 5.0)
-
-        forecast_rates = manual_fx_rates if manual_fx_rates else None
-        if fx_mode == "auto" and forecast_rates is None and _DEFAULT_FX_FILE.exists():
-            months = forecast_months or (len((an.options() or {}).get("months", [])) or 12)
-            fc = FxEnsembleForecaster(str(_DEFAULT_FX_FILE)).forecast(months=months)
-            forecast_rates = fc.rates
-
-        out = an.analyze(
-            plan_fx=plan_fx,
-            tariff_pct=tariff_pct,
-            fx_mode=fx_mode,
-            fx_change_pct=fx_change_pct,
-            forecast_rates=forecast_rates,
-            car=car,
-            group=group,
-            market=market,
-            q=q,
-            cost_rate_pct=cost_rate_pct,
-            limit_rows=4000,
-            forecast_months=forecast_months,
-            scenario_best_exp_pct=scenario_best_exp_pct,
-            scenario_best_tariff_delta_pct=scenario_best_tariff_delta_pct,
-            scenario_worst_exp_pct=scenario_worst_exp_pct,
-            scenario_worst_tariff_delta_pct=scenario_worst_tariff_delta_pct,
-        )
-        return jsonify(out)
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 400
+    # 수동 환율 입력(사용자가 직접 입력한 예측 환율 맵)
+    manual_fx_raw = form.get("manual_fx_rates", "")
+    manual_fx_rates = None
+    if manual_fx_raw:
+        try:
+            parsed = json.loads(manual_fx_raw)
+            if isinstance(parsed, dict):
+                manual_fx_rates = {str(k): float(v) for k, v in parsed.items() if v is not None}
+        except Exception:
+            manual_fx_rates = None
+
+    # 사용자 정의 EBIT 시나리오 입력(선택)
+    def _parse(name, default):
+        try:
+            return float(form.get(name, default) or default)
+        except Exception:
+            return float(default)
+    scenario_best_exp_pct = _parse("scenario_best_exp_pct", 5.0)
+    scenario_best_tariff_delta_pct = _parse("scenario_best_tariff_delta_pct", 0.0)
+    scenario_worst_exp_pct = _parse("scenario_worst_exp_pct", -5.0)
+    scenario_worst_tariff_delta_pct = _parse("scenario_worst_tariff_delta_pct", 5.0)
+
+    if ctx is not None:
+        ctx.stage("analyze")
+    forecast_rates = manual_fx_rates if manual_fx_rates else None
+    if fx_mode == "auto" and forecast_rates is None and _DEFAULT_FX_FILE.exists():
+        months = forecast_months or (len((an.options() or {}).get("months", [])) or 12)
+        fc = FxEnsembleForecaster(str(_DEFAULT_FX_FILE)).forecast(months=months)
+        forecast_rates = fc.rates
+
+    return an.analyze(
+        plan_fx=plan_fx,
+        tariff_pct=tariff_pct,
+        fx_mode=fx_mode,
+        fx_change_pct=fx_change_pct,
+        forecast_rates=forecast_rates,
+        car=car,
+        group=group,
+        market=market,
+        q=q,
+        cost_rate_pct=cost_rate_pct,
+        limit_rows=4000,
+        forecast_months=forecast_months,
+        scenario_best_exp_pct=scenario_best_exp_pct,
+        scenario_best_tariff_delta_pct=scenario_best_tariff_delta_pct,
+        scenario_worst_exp_pct=scenario_worst_exp_pct,
+        scenario_worst_tariff_delta_pct=scenario_worst_tariff_delta_pct,
+    )
 
 if __name__ == "__main__":
     print("[INFO] Flask 서버 시작")
     test_db_connection()
+    # 개발 서버는 요청마다 스레드 → 그 전에 파티션 프로세스 풀을 띄움(gunicorn은 gunicorn.conf.py)
+    prestart_pool()
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=False)
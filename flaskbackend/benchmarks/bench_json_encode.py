@@ -0,0 +1,108 @@
+"""
+DataFrame 응답 직렬화 벤치마크 (기존 to_dict + Flask 기본 jsonify vs frame_records + OrjsonProvider)
+
+사용:
+    python benchmarks/bench_json_encode.py                  # 50,000행 × 30열
+    python benchmarks/bench_json_encode.py --rows 200000 --repeat 5
+
+- 합성 프레임: 실수(NaN 포함) / 정수 / 문자열(한글) / None 섞인 object / 날짜 열
+  (날짜 열에 NaT가 있으면 기존 경로는 직렬화 자체가 실패하므로 NaT는 넣지 않음)
+- 두 경로 모두 앱 컨텍스트에서 실제 Response 본문(bytes)까지 만들고
+  JSON 파싱 결과가 같은지(NaN → null 정규화) 확인 후 단계별 시간 / 본문 크기 출력
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from json_encoder import _HAS_ORJSON, OrjsonProvider, frame_records  # noqa: E402
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    cols = {
+        "cost_center": np.array([f"{1100000 + i % 500}" for i in range(rows)], dtype=object),
+        "cc_name": np.array([f"부서{i % 500:03d}" for i in range(rows)], dtype=object),
+        "account_code": rng.integers(521000000, 529000000, rows),
+        "account_name": np.array([f"계정{i % 60:02d}" for i in range(rows)], dtype=object),
+    }
+    for k in range(24):
+        vals = rng.normal(1e6, 3e5, rows).round(2)
+        vals[rng.random(rows) < 0.05] = np.nan
+        cols[f"m{k:02d}"] = vals
+    note = np.array(["고정비", "변동비", None, "시즌/이벤트성"], dtype=object)[rng.integers(0, 4, rows)]
+    cols["cost_nature"] = note
+    dates = pd.Series(pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 700, rows), unit="D"))
+    cols["posted_at"] = dates.to_numpy()
+    return pd.DataFrame(cols)
+
+
+def _norm(o):
+    if isinstance(o, float) and (math.isnan(o) or math.isinf(o)):
+        return None
+    if isinstance(o, dict):
+        return {k: _norm(v) for k, v in o.items()}
+    if isinstance(o, list):
+        return [_norm(v) for v in o]
+    return o
+
+
+def _run(app: Flask, df: pd.DataFrame, to_records, repeat: int):
+    best_conv = best_enc = float("inf")
+    body = b""
+    with app.app_context():
+        for _ in range(repeat):
+            t = time.perf_counter()
+            rows = to_records(df)
+            t_conv = time.perf_counter() - t
+            t = time.perf_counter()
+            body = app.json.response({"rows": rows}).get_data()
+            t_enc = time.perf_counter() - t
+            best_conv, best_enc = min(best_conv, t_conv), min(best_enc, t_enc)
+    return body, best_conv, best_enc
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="DataFrame JSON response benchmark")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not _HAS_ORJSON:
+        print("orjson not installed")
+        return 1
+
+    df = make_frame(args.rows)
+    print(f"frame: rows={len(df)} cols={df.shape[1]}")
+
+    legacy_app = Flask("legacy")
+    legacy_app.json = DefaultJSONProvider(legacy_app)
+    new_app = Flask("orjson")
+    new_app.json = OrjsonProvider(new_app)
+
+    legacy_body, l_conv, l_enc = _run(legacy_app, df, lambda d: d.to_dict(orient="records"), args.repeat)
+    new_body, n_conv, n_enc = _run(new_app, df, frame_records, args.repeat)
+
+    assert _norm(json.loads(legacy_body)) == json.loads(new_body), "JSON 결과가 다릅니다"
+    print("identical JSON (NaN → null) = True")
+
+    l_total, n_total = l_conv + l_enc, n_conv + n_enc
+    print(f"to_dict + jsonify        : records {l_conv:6.3f}s  encode {l_enc:6.3f}s  total {l_total:6.3f}s  "
+          f"body={len(legacy_body) / 1e6:6.1f}MB")
+    print(f"frame_records + orjson   : records {n_conv:6.3f}s  encode {n_enc:6.3f}s  total {n_total:6.3f}s  "
+          f"body={len(new_body) / 1e6:6.1f}MB  speedup={l_total / n_total:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
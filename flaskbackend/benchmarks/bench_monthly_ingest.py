@@ -0,0 +1,74 @@
+"""
+월별 엑셀 일괄 변환(monthly_store) 순차 vs 병렬 벤치마크
+
+사용:
+    python benchmarks/bench_monthly_ingest.py                # centercost_data 전체, 워커 1 / CPU 코어 수
+    python benchmarks/bench_monthly_ingest.py --copies 2 --workers 1 4 8
+
+- 원본 파일을 임시 폴더에 --copies배로 복사(파일명만 바꿔서)한 뒤
+  워커 수별로 빈 저장소에 변환하는 시간을 측정
+- 워커 수와 상관없이 매니페스트/로딩 결과가 같은지도 확인
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import pandas as pd  # noqa: E402
+
+from monthly_store import list_source_files, load_monthly_store, sync_monthly_store  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="monthly_store ingestion benchmark")
+    parser.add_argument("--src", default=str(BASE_DIR / "centercost_data"))
+    parser.add_argument("--copies", type=int, default=1, help="원본 파일 복제 배수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    files = list_source_files(src)
+    if not files:
+        print(f"no source files in {src}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data_dir = tmp / "data"
+        data_dir.mkdir()
+        for c in range(args.copies):
+            for fname in files:
+                shutil.copyfile(src / fname, data_dir / f"{c:02d}_{fname}")
+
+        n_files = len(list_source_files(data_dir))
+        print(f"files={n_files} cpu_count={os.cpu_count()}")
+
+        baseline = None
+        for workers in args.workers:
+            store_dir = tmp / f"store_w{workers}"
+            t = time.perf_counter()
+            manifest, ingested = sync_monthly_store(data_dir, store_dir, workers=workers)
+            elapsed = time.perf_counter() - t
+
+            df = pd.concat(load_monthly_store(store_dir, manifest), ignore_index=True)
+            if baseline is None:
+                baseline = (elapsed, df)
+                speedup = 1.0
+            else:
+                pd.testing.assert_frame_equal(baseline[1], df)
+                speedup = baseline[0] / elapsed
+            print(f"workers={workers:<3d} ingested={len(ingested):<4d} rows={len(df):<7d} "
+                  f"time={elapsed:7.2f}s speedup={speedup:5.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
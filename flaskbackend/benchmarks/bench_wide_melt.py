@@ -0,0 +1,233 @@
+"""
+다월(wide) 코스트센터 엑셀 → long 변환(parse_cost_center_excel) 벤치마크
+
+사용:
+    python benchmarks/bench_wide_melt.py                       # 36개월, 코스트센터 300개 × 계정 40개
+    python benchmarks/bench_wide_melt.py --months 36 --centers 500 --accounts 60 --repeat 5
+
+- 합성 36개월 wide 엑셀(2행 월 라벨 / 3행 필드명 / 4행~ 데이터)을 임시 폴더에 생성
+- 엑셀 읽기(read_excel)는 한 번만 하고, 같은 raw 프레임으로
+  기존 월별 루프 방식(_legacy_melt, 아래에 원본 그대로 보관)과 melt_cost_center_wide를 비교
+- 두 결과가 같은지(assert_frame_equal) 확인 후 시간 / tracemalloc 최대 메모리 출력
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cost_center import _normalize_year_month, melt_cost_center_wide  # noqa: E402
+
+
+# ============================================================
+# 기존 구현(월별 루프) - 비교 기준
+# ============================================================
+def _ensure_series(obj, length):
+    if isinstance(obj, pd.DataFrame):
+        ser = obj.iloc[:, 0]
+    else:
+        ser = pd.Series(obj)
+    ser = ser.reset_index(drop=True)
+    if len(ser) < length:
+        ser = ser.reindex(range(length))
+    elif len(ser) > length:
+        ser = ser.iloc[:length]
+    return ser
+
+
+def _legacy_melt(raw: pd.DataFrame) -> pd.DataFrame:
+    month_row = raw.iloc[2].copy()
+    field_row = raw.iloc[3].copy()
+    month_row.iloc[0] = "meta"
+    month_row.iloc[1] = "meta"
+    field_row.iloc[0] = "코드"
+    field_row.iloc[1] = "명"
+
+    current_month = None
+    for i in range(2, len(month_row)):
+        if pd.notna(month_row.iloc[i]) and str(month_row.iloc[i]).strip() != "":
+            current_month = month_row.iloc[i]
+        else:
+            month_row.iloc[i] = current_month
+
+    cols = pd.MultiIndex.from_arrays([month_row, field_row])
+    data = raw.iloc[4:].copy()
+    data.columns = cols
+
+    cost_center_raw = data.loc[:, ("meta", "코드")]
+    cc_name_raw = data.loc[:, ("meta", "명")]
+    if isinstance(cost_center_raw, pd.DataFrame):
+        cost_center_raw = cost_center_raw.iloc[:, 0]
+    if isinstance(cc_name_raw, pd.DataFrame):
+        cc_name_raw = cc_name_raw.iloc[:, 0]
+
+    cost_centers = cost_center_raw.astype(str).str.strip().reset_index(drop=True)
+    cc_names = cc_name_raw.astype(str).str.strip().reset_index(drop=True)
+    n_rows = len(cost_centers)
+
+    records = []
+    cost_nature_meta_col = None
+    for col in data.columns:
+        if col[0] == "meta" and ("성질" in str(col[1]) or "비용성질" in str(col[1]) or "cost_nature" in str(col[1]).lower()):
+            cost_nature_meta_col = col
+            break
+
+    raw_months = []
+    for m in month_row:
+        if m in ["meta", None]:
+            continue
+        if isinstance(m, float) and np.isnan(m):
+            continue
+        raw_months.append(m)
+    unique_months = sorted(set(raw_months), key=lambda x: str(x))
+
+    def _guess_cols(month_slice):
+        cols_ = list(month_slice.columns)
+
+        def pick(substrings, default_idx=None):
+            for c in cols_:
+                if any(sub in str(c) for sub in substrings):
+                    return c
+            if default_idx is not None and default_idx < len(cols_):
+                return cols_[default_idx]
+            return cols_[-1]
+
+        return (
+            pick(["계정코드", "코드"], default_idx=0),
+            pick(["계정명", "계정 명", "명", "이름"], default_idx=1 if len(cols_) > 1 else 0),
+            pick(["실제원가", "금액", "원가"], default_idx=len(cols_) - 1),
+        )
+
+    for m in unique_months:
+        ym_norm = _normalize_year_month(m)
+        if ym_norm is None:
+            continue
+        month_slice = data.loc[:, m]
+        if all(col in month_slice.columns for col in ["계정코드", "계정명", "실제원가"]):
+            code_col, name_col, amt_col = "계정코드", "계정명", "실제원가"
+        else:
+            code_col, name_col, amt_col = _guess_cols(month_slice)
+
+        account_codes = _ensure_series(month_slice[code_col], n_rows)
+        account_names = _ensure_series(month_slice[name_col], n_rows)
+        amounts = _ensure_series(month_slice[amt_col], n_rows)
+
+        cn_col = next((c for c in month_slice.columns
+                       if ("성질" in str(c)) or ("비용성질" in str(c)) or ("cost_nature" in str(c).lower())), None)
+        if cn_col is not None:
+            cost_nature_series = _ensure_series(month_slice[cn_col], n_rows)
+        elif cost_nature_meta_col is not None:
+            cost_nature_series = _ensure_series(data[cost_nature_meta_col], n_rows)
+        else:
+            cost_nature_series = pd.Series([np.nan] * n_rows)
+
+        records.append(pd.DataFrame({
+            "cost_center": cost_centers.values,
+            "cc_name": cc_names.values,
+            "year_month": np.array([ym_norm] * n_rows),
+            "account_code": account_codes.values,
+            "account_name": account_names.values,
+            "amount": amounts.values,
+            "cost_nature": cost_nature_series.values,
+        }))
+
+    df_long = pd.concat(records, ignore_index=True)
+    df_long["amount"] = pd.to_numeric(df_long["amount"], errors="coerce")
+    df_long["cost_nature"] = df_long["cost_nature"].astype(str).str.strip()
+    df_long.loc[df_long["cost_nature"].isin(["", "nan", "NaN"]), "cost_nature"] = np.nan
+    df_long["year_month"] = df_long["year_month"].astype(str)
+    df_long["year"] = pd.to_numeric(df_long["year_month"].str.slice(0, 4), errors="coerce").astype("Int64")
+    df_long["month"] = pd.to_numeric(df_long["year_month"].str.slice(5, 7), errors="coerce").astype("Int64")
+    return df_long
+
+
+# ============================================================
+# 합성 wide 엑셀
+# ============================================================
+def make_wide_frame(months: int, centers: int, accounts: int, seed: int = 0) -> pd.DataFrame:
+    """
+    header=None 로 읽었을 때와 같은 모양의 raw 프레임
+    월 블록 = (계정코드, 계정명, 실제원가, 비용성질), 일부 금액은 빈칸
+    """
+    rng = np.random.default_rng(seed)
+    fields = ["계정코드", "계정명", "실제원가", "비용성질"]
+    n_rows = centers * accounts
+
+    cc_codes = np.repeat([f"{1100000 + i}" for i in range(centers)], accounts)
+    cc_names = np.repeat([f"부서{i:03d}" for i in range(centers)], accounts)
+    acc_codes = np.tile([521000000 + 100 * j for j in range(accounts)], centers)
+    acc_names = np.tile([f"계정{j:02d}" for j in range(accounts)], centers)
+    natures = np.tile(np.array(["고정비", "변동비", "시즌/이벤트성", ""], dtype=object)[np.arange(accounts) % 4], centers)
+
+    header_month = ["", ""]
+    header_field = ["코스트센터", "코스트센터명"]
+    columns = [cc_codes, cc_names]
+    for k in range(months):
+        year, month = 2023 + k // 12, k % 12 + 1
+        header_month += [f"{year}년 {month}월"] + [None] * (len(fields) - 1)
+        header_field += fields
+        amt = rng.normal(1e6, 3e5, n_rows).round().astype(object)
+        amt[rng.random(n_rows) < 0.03] = np.nan
+        columns += [acc_codes, acc_names, amt, natures]
+
+    body = pd.DataFrame({i: pd.Series(c, dtype=object) for i, c in enumerate(columns)})
+    head = pd.DataFrame(
+        [["코스트센터별 실적"] + [None] * (len(columns) - 1), [None] * len(columns), header_month, header_field],
+        columns=body.columns,
+    )
+    return pd.concat([head, body], ignore_index=True)
+
+
+def _measure(fn, raw, repeat: int):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(raw)
+        best = min(best, time.perf_counter() - t)
+    tracemalloc.start()
+    fn(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, best, peak / (1024 * 1024)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="wide cost-center melt benchmark")
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--centers", type=int, default=300)
+    parser.add_argument("--accounts", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "wide.xlsx"
+        t = time.perf_counter()
+        make_wide_frame(args.months, args.centers, args.accounts).to_excel(path, header=False, index=False)
+        print(f"synthetic file: months={args.months} rows={args.centers * args.accounts} "
+              f"write={time.perf_counter() - t:.1f}s size={path.stat().st_size / 1e6:.1f}MB")
+
+        t = time.perf_counter()
+        raw = pd.read_excel(path, header=None)
+        print(f"read_excel(header=None): {time.perf_counter() - t:.2f}s shape={raw.shape}")
+
+    legacy, t_legacy, m_legacy = _measure(_legacy_melt, raw, args.repeat)
+    new, t_new, m_new = _measure(melt_cost_center_wide, raw, args.repeat)
+    pd.testing.assert_frame_equal(legacy, new)
+
+    print(f"rows_out={len(new)} identical=True")
+    print(f"legacy loop : {t_legacy:7.3f}s  peak={m_legacy:7.1f}MB")
+    print(f"vectorized  : {t_new:7.3f}s  peak={m_new:7.1f}MB  speedup={t_legacy / t_new:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
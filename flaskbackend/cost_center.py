@@ -1,12 +1,16 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+import threading
+
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.neighbors import LocalOutlierFactor
 from sklearn.preprocessing import StandardScaler
-from typing import Union, IO, Optional
+from typing import Union, IO, Optional, Dict, Tuple
+
+from key_codec import as_key_str, decode_keys, key_codes, map_keys
 
 
 # ============================================================
@@ -49,26 +53,6 @@ def _normalize_year_month(label):
         return None
 
 
-def _ensure_series(obj, length):
-    """
-    DataFrame/Series/ndarray 어떤 형태가 와도
-    길이 `length`의 Series 한 개로 맞춰주는 유틸.
-    """
-    if isinstance(obj, pd.DataFrame):
-        ser = obj.iloc[:, 0]
-    else:
-        ser = pd.Series(obj)
-
-    ser = ser.reset_index(drop=True)
-
-    if len(ser) < length:
-        ser = ser.reindex(range(length))
-    elif len(ser) > length:
-        ser = ser.iloc[:length]
-
-    return ser
-
-
 def parse_cost_center_excel(file_source: Union[str, IO, bytes]):
     """
     코스트센터별 2년치 관리회계 엑셀을 Long 형태로 파싱
@@ -86,146 +70,136 @@ def parse_cost_center_excel(file_source: Union[str, IO, bytes]):
         file_source = pd.io.common.BytesIO(file_source)
 
     raw = pd.read_excel(file_source, header=None)
+    return melt_cost_center_wide(raw)
 
-    # 2행: 월 정보 / 3행: 필드명
-    month_row = raw.iloc[2].copy()
-    field_row = raw.iloc[3].copy()
 
-    # 앞 두 칼럼은 메타 정보 (코스트센터 코드 / 명)
-    month_row.iloc[0] = "meta"
-    month_row.iloc[1] = "meta"
+def _is_cost_nature_field(field) -> bool:
+    s = str(field)
+    return ("성질" in s) or ("비용성질" in s) or ("cost_nature" in s.lower())
 
-    field_row.iloc[0] = "코드"
-    field_row.iloc[1] = "명"
+
+def _guess_month_fields(fields: list) -> Tuple[object, object, object]:
+    """
+    월 블록의 필드명 목록에서 계정코드 / 계정명 / 금액 필드 추정
+    """
+    if all(f in fields for f in ["계정코드", "계정명", "실제원가"]):
+        return "계정코드", "계정명", "실제원가"
+
+    def pick(substrings, default_idx=None):
+        for c in fields:
+            if any(sub in str(c) for sub in substrings):
+                return c
+        if default_idx is not None and default_idx < len(fields):
+            return fields[default_idx]
+        return fields[-1]
+
+    code_col = pick(["계정코드", "코드"], default_idx=0)
+    name_col = pick(["계정명", "계정 명", "명", "이름"], default_idx=1 if len(fields) > 1 else 0)
+    amt_col  = pick(["실제원가", "금액", "원가"], default_idx=len(fields) - 1)
+    return code_col, name_col, amt_col
+
+
+def melt_cost_center_wide(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    header=None 로 읽은 다월(wide) 엑셀 → long
+      - 2행: 월 라벨(블록 첫 칸만 있어도 됨, 오른쪽으로 채움) / 3행: 필드명 / 4행~: 데이터
+      - 앞 두 칼럼은 코스트센터 코드 / 명
+    (월, 필드) 블록 위치를 한 번 찾은 뒤 필드별로 (행 × 월) 블록을 잘라
+    월 순서대로 이어지게 펼침(ravel order="F") → 월별 반복/임시 DataFrame 없음
+    """
+    month_row = raw.iloc[2].tolist()
+    field_row = raw.iloc[3].tolist()
+
+    # 앞 두 칼럼은 메타 정보 (코스트센터 코드 / 명)
+    month_row[0] = month_row[1] = "meta"
+    field_row[0] = "코드"
+    field_row[1] = "명"
 
     # 월 정보 NaN -> 직전 값으로 채우기
     current_month = None
     for i in range(2, len(month_row)):
-        if pd.notna(month_row.iloc[i]) and str(month_row.iloc[i]).strip() != "":
-            current_month = month_row.iloc[i]
+        if pd.notna(month_row[i]) and str(month_row[i]).strip() != "":
+            current_month = month_row[i]
         else:
-            month_row.iloc[i] = current_month
+            month_row[i] = current_month
 
-    # MultiIndex 컬럼
-    cols = pd.MultiIndex.from_arrays([month_row, field_row])
-    data = raw.iloc[4:].copy()
-    data.columns = cols
-
-    # 메타 컬럼
-    cost_center_col = ("meta", "코드")
-    cc_name_col     = ("meta", "명")
+    # 라벨별 칼럼 위치(왼쪽부터)
+    month_positions: Dict[object, list] = {}
+    for i, m in enumerate(month_row):
+        if m is None or m == "meta" or (isinstance(m, float) and np.isnan(m)):
+            continue
+        month_positions.setdefault(m, []).append(i)
 
-    if cost_center_col not in data.columns or cc_name_col not in data.columns:
+    meta_pos = [i for i, m in enumerate(month_row) if m == "meta"]
+    meta_fields = {}
+    for i in meta_pos:
+        meta_fields.setdefault(field_row[i], i)
+    if "코드" not in meta_fields or "명" not in meta_fields:
         raise KeyError("코스트센터 코드/명 컬럼을 찾지 못했습니다. 엑셀 헤더를 확인하세요.")
 
-    # 코스트센터 / 부서명 Series로 변환
-    cost_center_raw = data.loc[:, cost_center_col]
-    cc_name_raw     = data.loc[:, cc_name_col]
-
-    if isinstance(cost_center_raw, pd.DataFrame):
-        cost_center_raw = cost_center_raw.iloc[:, 0]
-    if isinstance(cc_name_raw, pd.DataFrame):
-        cc_name_raw = cc_name_raw.iloc[:, 0]
-
-    cost_centers = cost_center_raw.astype(str).str.strip().reset_index(drop=True)
-    cc_names     = cc_name_raw.astype(str).str.strip().reset_index(drop=True)
-    n_rows       = len(cost_centers)
-
-    records = []
+    data = raw.iloc[4:]
+    n_rows = len(data)
 
     # meta 레벨에 비용 성질이 있을 수도 있음
-    cost_nature_meta_col = None
-    for col in data.columns:
-        if col[0] == "meta" and (
-            "성질" in str(col[1]) or
-            "비용성질" in str(col[1]) or
-            "cost_nature" in str(col[1]).lower()
-        ):
-            cost_nature_meta_col = col
-            break
-
-    # 월 라벨(문자/숫자 섞여도 처리)
-    raw_months = []
-    for m in month_row:
-        if m in ["meta", None]:
-            continue
-        if isinstance(m, float) and np.isnan(m):
-            continue
-        raw_months.append(m)
-
-    unique_months = sorted(set(raw_months), key=lambda x: str(x))
-
-    def _guess_cols(month_slice):
-        """
-        계정코드 / 계정명 / 금액 컬럼 이름 자동 추정
-        """
-        cols_ = list(month_slice.columns)
-
-        def pick(substrings, default_idx=None):
-            for c in cols_:
-                s = str(c)
-                if any(sub in s for sub in substrings):
-                    return c
-            if default_idx is not None and default_idx < len(cols_):
-                return cols_[default_idx]
-            return cols_[-1]
-
-        code_col = pick(["계정코드", "코드"], default_idx=0)
-        name_col = pick(["계정명", "계정 명", "명", "이름"], default_idx=1 if len(cols_) > 1 else 0)
-        amt_col  = pick(["실제원가", "금액", "원가"], default_idx=len(cols_) - 1)
-        return code_col, name_col, amt_col
-
-    for m in unique_months:
+    cost_nature_meta_pos = next((i for i in meta_pos if _is_cost_nature_field(field_row[i])), None)
+
+    # 월별 (계정코드, 계정명, 금액, 비용성질) 칼럼 위치 (비용성질 없음 = -1)
+    month_labels, code_pos, name_pos, amt_pos, nature_pos = [], [], [], [], []
+    for m in sorted(month_positions, key=lambda x: str(x)):
         ym_norm = _normalize_year_month(m)
         if ym_norm is None:
             continue
 
-        month_slice = data.loc[:, m]
+        positions = month_positions[m]
+        fields = [field_row[i] for i in positions]
 
-        needed = ["계정코드", "계정명", "실제원가"]
-        if all(col in month_slice.columns for col in needed):
-            code_col = "계정코드"
-            name_col = "계정명"
-            amt_col  = "실제원가"
-        else:
-            code_col, name_col, amt_col = _guess_cols(month_slice)
-
-        # ---- 전부 1차원 Series로 강제 ----
-        account_codes = _ensure_series(month_slice[code_col], n_rows)
-        account_names = _ensure_series(month_slice[name_col], n_rows)
-        amounts       = _ensure_series(month_slice[amt_col],  n_rows)
-
-        # 비용성질
-        if any(("성질" in str(c)) or ("비용성질" in str(c)) or ("cost_nature" in str(c).lower())
-               for c in month_slice.columns):
-            cn_col = None
-            for c in month_slice.columns:
-                if ("성질" in str(c)) or ("비용성질" in str(c)) or ("cost_nature" in str(c).lower()):
-                    cn_col = c
-                    break
-            cost_nature_series = _ensure_series(month_slice[cn_col], n_rows)
-        elif cost_nature_meta_col is not None:
-            cost_nature_series = _ensure_series(data[cost_nature_meta_col], n_rows)
-        else:
-            cost_nature_series = pd.Series([np.nan] * n_rows)
-
-        tmp = pd.DataFrame(
-            {
-                "cost_center":  cost_centers.values,
-                "cc_name":      cc_names.values,
-                "year_month":   np.array([ym_norm] * n_rows),
-                "account_code": account_codes.values,
-                "account_name": account_names.values,
-                "amount":       amounts.values,
-                "cost_nature":  cost_nature_series.values,
-            }
-        )
-        records.append(tmp)
+        def first_pos(field):
+            for i, f in zip(positions, fields):
+                if f == field or (pd.isna(f) and pd.isna(field)):
+                    return i
+            return positions[-1]
+
+        code_col, name_col, amt_col = _guess_month_fields(fields)
+        month_labels.append(ym_norm)
+        code_pos.append(first_pos(code_col))
+        name_pos.append(first_pos(name_col))
+        amt_pos.append(first_pos(amt_col))
+
+        cn = next((i for i, f in zip(positions, fields) if _is_cost_nature_field(f)), None)
+        nature_pos.append(cn if cn is not None else (cost_nature_meta_pos if cost_nature_meta_pos is not None else -1))
 
-    if not records:
+    if not month_labels:
         raise ValueError("월별 관리회계 데이터를 추출하지 못했습니다. 엑셀 구조를 다시 확인해 주세요.")
 
-    df_long = pd.concat(records, ignore_index=True)
+    n_months = len(month_labels)
+
+    def _stack(positions):
+        # (행 × 월) 블록 → 월 순서대로 이어 붙인 1차원 배열
+        return data.iloc[:, positions].to_numpy().ravel(order="F")
+
+    if any(p < 0 for p in nature_pos):
+        block = np.full((n_rows, n_months), np.nan, dtype=object)
+        for j, p in enumerate(nature_pos):
+            if p >= 0:
+                block[:, j] = data.iloc[:, p].to_numpy()
+        cost_nature = block.ravel(order="F")
+    else:
+        cost_nature = _stack(nature_pos)
+
+    cost_centers = data.iloc[:, meta_fields["코드"]].astype(str).str.strip().to_numpy()
+    cc_names = data.iloc[:, meta_fields["명"]].astype(str).str.strip().to_numpy()
+
+    df_long = pd.DataFrame(
+        {
+            "cost_center":  np.tile(cost_centers, n_months),
+            "cc_name":      np.tile(cc_names, n_months),
+            "year_month":   np.repeat(np.array(month_labels), n_rows),
+            "account_code": _stack(code_pos),
+            "account_name": _stack(name_pos),
+            "amount":       _stack(amt_pos),
+            "cost_nature":  cost_nature,
+        }
+    )
 
     # 숫자형 변환
     df_long["amount"] = pd.to_numeric(df_long["amount"], errors="coerce")
@@ -265,33 +239,24 @@ def detect_potential_missing(
         lookback_short = int(lookback_months)
 
     df = df.sort_values(["cost_center", "account_code", "year_month"]).copy()
-    df["year_month"] = df["year_month"].astype(str)
-
-    df["suspected_missing_3m"] = False
-    df["suspected_missing_12m"] = False
-    df["suspected_missing"] = False  # 호환용
+    df["year_month"] = as_key_str(df["year_month"])
 
-    for (cc, acc), grp in df.groupby(["cost_center", "account_code"], dropna=False):
-        grp = grp.sort_values("year_month")
-        values = grp["amount"].to_numpy()
-        idx = grp.index.to_numpy()
+    is_nan = pd.to_numeric(df["amount"], errors="coerce").isna()
+    keys = [df["cost_center"], df["account_code"]]
 
-        for i in range(len(grp)):
-            if not np.isnan(values[i]):
-                continue
+    # 그룹 내 직전 k행의 값 존재(NaN 아님) 개수 = 롤링 카운트
+    #  - 이번 행 이전까지의 누적 개수(before)에서 k행 전 누적 개수를 뺌
+    #  - k행 전이 그룹 밖이면 NaN → 창이 꽉 차지 않았으므로 플래그 없음
+    has_val = (~is_nan).astype(int)
+    before = has_val.groupby(keys, dropna=False, observed=True).cumsum() - has_val
 
-            start3 = max(0, i - lookback_short)
-            prev3 = values[start3:i]
-            if len(prev3) >= lookback_short and np.all(~np.isnan(prev3)):
-                df.loc[idx[i], "suspected_missing_3m"] = True
+    def _full_window(k):
+        older = before.groupby(keys, dropna=False, observed=True).shift(k)
+        return is_nan & ((before - older) == k)
 
-            start12 = max(0, i - lookback_long)
-            prev12 = values[start12:i]
-            if len(prev12) >= lookback_long and np.all(~np.isnan(prev12)):
-                df.loc[idx[i], "suspected_missing_12m"] = True
-
-            if df.loc[idx[i], "suspected_missing_3m"] or df.loc[idx[i], "suspected_missing_12m"]:
-                df.loc[idx[i], "suspected_missing"] = True
+    df["suspected_missing_3m"] = _full_window(lookback_short)
+    df["suspected_missing_12m"] = _full_window(lookback_long)
+    df["suspected_missing"] = df["suspected_missing_3m"] | df["suspected_missing_12m"]  # 호환용
 
     return df
 
@@ -301,26 +266,26 @@ def detect_potential_missing(
 # ============================================================
 def build_features(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    df["year_month"] = df["year_month"].astype(str)
+    df["year_month"] = as_key_str(df["year_month"])
 
     df["amount_signed_log1p"] = np.sign(df["amount"]) * np.log1p(np.abs(df["amount"].fillna(0)))
 
     df = df.sort_values(["cost_center", "account_code", "year_month"])
     group_cols = ["cost_center", "account_code"]
 
-    df["mean_12"] = df.groupby(group_cols)["amount"].transform("mean")
-    df["std_12"]  = df.groupby(group_cols)["amount"].transform("std")
+    df["mean_12"] = df.groupby(group_cols, observed=True)["amount"].transform("mean")
+    df["std_12"]  = df.groupby(group_cols, observed=True)["amount"].transform("std")
     df["cv_12"]   = df["std_12"] / (df["mean_12"].replace(0, np.nan)).abs()
 
     df["normal_upper"] = df["mean_12"] + 2 * df["std_12"]
     df["normal_lower"] = df["mean_12"] - 2 * df["std_12"]
 
     df["roll_mean_3"] = (
-        df.groupby(group_cols)["amount"]
+        df.groupby(group_cols, observed=True)["amount"]
         .transform(lambda s: s.rolling(window=3, min_periods=2).mean())
     )
     df["roll_std_3"] = (
-        df.groupby(group_cols)["amount"]
+        df.groupby(group_cols, observed=True)["amount"]
         .transform(lambda s: s.rolling(window=3, min_periods=2).std())
     )
 
@@ -328,19 +293,27 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
     df["zscore_12"] = (df["amount"] - df["mean_12"]) / (df["std_12"].replace(0, np.nan) + eps)
     df["dev_3m"]    = (df["amount"] - df["roll_mean_3"]) / (df["roll_std_3"].replace(0, np.nan) + eps)
 
-    df["prev_amount"] = df.groupby(group_cols)["amount"].shift(1)
+    df["prev_amount"] = df.groupby(group_cols, observed=True)["amount"].shift(1)
     df["prev_diff_rate"] = (df["amount"] - df["prev_amount"]) / (df["prev_amount"] + 1e-6) * 100
 
-    df["cost_nature"] = df["cost_nature"].astype(str)
+    df["cost_nature"] = as_key_str(df["cost_nature"])
     df["is_fixed"]    = df["cost_nature"].str.contains("고정", na=False).astype(int)
     df["is_variable"] = df["cost_nature"].str.contains("변동", na=False).astype(int)
     df["is_seasonal"] = df["cost_nature"].str.contains("계절|시즌", na=False).astype(int)
 
+    return encode_cost_nature(df)
+
+
+def encode_cost_nature(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    cost_nature → cost_nature_code (정렬된 고유값 순서 1..N)
+    코드표가 전체 행 기준이므로 파티션 실행 후에는 전체 frame에서 다시 호출
+    """
     nature_map = {}
     unique_natures = sorted(set(df["cost_nature"].dropna()))
     for i, v in enumerate(unique_natures):
         nature_map[v] = i + 1
-    df["cost_nature_code"] = df["cost_nature"].map(nature_map).fillna(0).astype(int)
+    df["cost_nature_code"] = map_keys(df["cost_nature"], nature_map, default=0).astype(int)
 
     return df
 
@@ -348,39 +321,199 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
 # ============================================================
 # 4. 코스트센터 내 계정 상관관계 기반 피처
 # ============================================================
-def compute_corr_pairs(df: pd.DataFrame, corr_threshold=0.9) -> pd.DataFrame:
-    df = df.copy()
-    df["year_month"] = df["year_month"].astype(str)
+CORR_PAIR_COLS = ["cost_center", "account_code", "corr_partner_acc", "corr_partner_coef"]
 
-    pair_info = {}
+# 코스트센터별 상관행렬 캐시: cost_center -> (이력 지문, 계정코드 배열, 상관행렬)
+_CORR_MATRIX_CACHE: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {}
+_CORR_CACHE_LOCK = threading.Lock()
 
-    for cc, grp in df.groupby("cost_center"):
-        if grp["account_code"].nunique() < 2:
+# 한 번에 묶어 계산할 코스트센터 수(계정 수가 비슷한 센터끼리 묶어 패딩 낭비를 줄임)
+CORR_BATCH_CENTERS = 64
+
+
+def _center_fingerprints(agg: pd.DataFrame) -> pd.Series:
+    """
+    코스트센터별 이력 지문 (year_month, account_code, amount) 행 해시의 합(mod 2^64)
+    - 행 순서와 무관, 금액 하나만 바뀌어도 달라짐
+    """
+    h = pd.util.hash_pandas_object(agg[["year_month", "account_code", "amount"]], index=False).to_numpy()
+    cc = agg["cost_center"].to_numpy()
+    order = np.argsort(cc, kind="mergesort")
+    cc_sorted = cc[order]
+    starts = np.flatnonzero(np.r_[True, cc_sorted[1:] != cc_sorted[:-1]])
+    sums = np.add.reduceat(h[order], starts)
+    return pd.Series(sums.astype(np.uint64), index=cc_sorted[starts])
+
+
+def _batched_nan_corr(cube: np.ndarray) -> np.ndarray:
+    """
+    cube: (센터 × 월 × 계정) 금액 배열(NaN = 값 없음)
+    반환: (센터 × 계정 × 계정) Pearson 상관행렬
+      - pandas DataFrame.corr()처럼 쌍별로 둘 다 값이 있는 월만 사용
+      - 분산이 0이거나 겹치는 월이 없으면 NaN
+    """
+    valid = ~np.isnan(cube)
+    vf = valid.astype(float)
+
+    # 계정별 평균으로 먼저 중심화(큰 금액에서의 자릿수 손실 방지)
+    cnt = vf.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(cnt > 0, np.nansum(cube, axis=1, keepdims=True) / np.maximum(cnt, 1), 0.0)
+    x = np.where(valid, cube - mean, 0.0)
+
+    n = np.einsum("cta,ctb->cab", vf, vf)
+    sx = np.einsum("cta,ctb->cab", x, vf)
+    sxx = np.einsum("cta,ctb->cab", x * x, vf)
+    sxy = np.einsum("cta,ctb->cab", x, x)
+    sy = sx.transpose(0, 2, 1)
+    syy = sxx.transpose(0, 2, 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vx = sxx - sx * sx / n
+        vy = syy - sy * sy / n
+        cov = sxy - sx * sy / n
+        corr = cov / np.sqrt(vx * vy)
+
+    tol = 1e-12
+    degenerate = (n < 1) | ~(vx > tol * sxx) | ~(vy > tol * syy)
+    corr[degenerate] = np.nan
+    return corr
+
+
+def compute_corr_matrices(df: pd.DataFrame, use_cache: bool = True) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    코스트센터별 계정 간 상관행렬 {cost_center: (계정코드 배열(정렬), 상관행렬)}
+    - 금액을 (센터 × 월 × 계정) 배열로 묶어 여러 센터를 한 번에 계산
+    - 이력 지문이 같은 센터는 캐시된 행렬을 그대로 사용
+    """
+    if df.empty:
+        return {}
+
+    agg = (
+        df.assign(year_month=as_key_str(df["year_month"]))
+        .groupby(["cost_center", "year_month", "account_code"], sort=True, observed=True)["amount"]
+        .mean()
+        .reset_index()
+    )
+    fingerprints = _center_fingerprints(agg)
+
+    result: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    todo = []
+    with _CORR_CACHE_LOCK:
+        for cc, fp in fingerprints.items():
+            hit = _CORR_MATRIX_CACHE.get(cc) if use_cache else None
+            if hit is not None and hit[0] == int(fp):
+                result[cc] = (hit[1], hit[2])
+            else:
+                todo.append(cc)
+
+    if not todo:
+        return result
+
+    sub = agg[agg["cost_center"].isin(todo)]
+    months = np.sort(np.asarray(sub["year_month"].unique(), dtype=object))
+    t_idx = np.searchsorted(months, sub["year_month"].to_numpy(dtype=object))
+    # 계정 코드 순서 = 문자열 순서이므로 코드의 센터 내 dense rank가 계정 위치
+    acc_codes = pd.Series(key_codes(sub["account_code"]), index=sub.index)
+    a_idx = acc_codes.groupby(sub["cost_center"], sort=False, observed=True).rank(method="dense").astype(int).to_numpy() - 1
+    accounts_by_cc = {
+        cc: np.asarray(sorted(g.unique()), dtype=object)
+        for cc, g in sub.groupby("cost_center", observed=True)["account_code"]
+    }
+
+    # 계정 수 기준으로 정렬 후 배치 단위로 패딩
+    todo_sorted = sorted(todo, key=lambda c: len(accounts_by_cc.get(c, ())))
+    cc_arr = sub["cost_center"].to_numpy(dtype=object)
+    amounts = sub["amount"].to_numpy(dtype=float)
+
+    computed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for b in range(0, len(todo_sorted), CORR_BATCH_CENTERS):
+        batch = todo_sorted[b:b + CORR_BATCH_CENTERS]
+        pos = {cc: i for i, cc in enumerate(batch)}
+        width = max(len(accounts_by_cc.get(cc, ())) for cc in batch)
+        if width == 0:
             continue
 
-        pivot = grp.pivot_table(index="year_month", columns="account_code", values="amount")
-        if pivot.shape[1] < 2:
+        in_batch = np.isin(cc_arr, batch)
+        c_idx = np.array([pos[c] for c in cc_arr[in_batch]], dtype=int)
+
+        cube = np.full((len(batch), len(months), width), np.nan)
+        cube[c_idx, t_idx[in_batch], a_idx[in_batch]] = amounts[in_batch]
+        corr = _batched_nan_corr(cube)
+
+        for cc, i in pos.items():
+            k = len(accounts_by_cc.get(cc, ()))
+            computed[cc] = (accounts_by_cc.get(cc, np.array([], dtype=object)), corr[i, :k, :k].copy())
+
+    with _CORR_CACHE_LOCK:
+        for cc, (accs, mat) in computed.items():
+            _CORR_MATRIX_CACHE[cc] = (int(fingerprints[cc]), accs, mat)
+
+    result.update(computed)
+    return result
+
+
+def compute_corr_pair_map(df: pd.DataFrame, use_cache: bool = True) -> pd.DataFrame:
+    """
+    코스트센터별로 상관계수 절댓값이 가장 큰 파트너 계정
+    반환 컬럼: cost_center, account_code, corr_partner_acc, corr_partner_coef
+    """
+    matrices = compute_corr_matrices(df, use_cache=use_cache)
+
+    parts = []
+    for cc, (accs, corr) in matrices.items():
+        if len(accs) < 2:
+            continue
+        corr = corr.copy()
+        np.fill_diagonal(corr, np.nan)
+        score = np.where(np.isnan(corr), -np.inf, np.abs(corr))
+        best = score.argmax(axis=0)
+        has = np.isfinite(score.max(axis=0))
+        if not has.any():
             continue
+        cols = np.flatnonzero(has)
+        parts.append(
+            pd.DataFrame(
+                {
+                    "cost_center": cc,
+                    "account_code": accs[cols],
+                    "corr_partner_acc": accs[best[cols]],
+                    "corr_partner_coef": corr[best[cols], cols],
+                }
+            )
+        )
+
+    if not parts:
+        return pd.DataFrame(columns=CORR_PAIR_COLS)
+    return pd.concat(parts, ignore_index=True)
 
-        corr = pivot.corr()
-
-        for acc in corr.columns:
-            series = corr[acc].dropna()
-            if acc in series.index:
-                series = series.drop(acc)
-            if series.empty:
-                continue
-            best_acc  = series.abs().idxmax()
-            best_corr = series[best_acc]
-            pair_info[(cc, acc)] = (best_acc, best_corr)
-
-    df["corr_partner_acc"]  = None
-    df["corr_partner_coef"] = np.nan
-    for idx, row in df.iterrows():
-        key = (row["cost_center"], row["account_code"])
-        if key in pair_info:
-            df.at[idx, "corr_partner_acc"]  = pair_info[key][0]
-            df.at[idx, "corr_partner_coef"] = pair_info[key][1]
+
+def compute_corr_pairs(df: pd.DataFrame, corr_threshold=0.9) -> pd.DataFrame:
+    pair_df = compute_corr_pair_map(df)
+    return attach_corr_partners(df, pair_df, corr_threshold=corr_threshold)
+
+
+def attach_corr_partners(df: pd.DataFrame, pair_df: pd.DataFrame, corr_threshold=0.9) -> pd.DataFrame:
+    """
+    compute_corr_pair_map() 결과(상관 파트너)를 (cost_center, account_code) 조인으로 붙이고
+    같은 달 파트너 계정의 z-score와 부호가 반대인지 플래그 계산
+    """
+    df = df.copy()
+    df["year_month"] = as_key_str(df["year_month"])
+    df = df.drop(columns=[c for c in CORR_PAIR_COLS[2:] if c in df.columns])
+
+    if pair_df is None or len(pair_df) == 0:
+        pair_df = pd.DataFrame(columns=CORR_PAIR_COLS)
+    pair_df = pair_df[CORR_PAIR_COLS]
+
+    # 키가 Categorical이면 파트너 맵도 같은 카테고리로 맞춰 코드 기준 조인(인코딩 유지)
+    key_dtypes = {c: df[c].dtype for c in ["cost_center", "account_code"] if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    if key_dtypes:
+        pair_df = pair_df.astype(key_dtypes)
+        pair_df = pair_df[pair_df["cost_center"].notna() & pair_df["account_code"].notna()]
+    df = df.merge(pair_df, on=["cost_center", "account_code"], how="left")
+    df["corr_partner_acc"] = df["corr_partner_acc"].astype(object).where(df["corr_partner_acc"].notna(), None)
+    df["corr_partner_coef"] = df["corr_partner_coef"].astype(float)
 
     df["corr_weight"] = df["corr_partner_coef"].abs()
 
@@ -416,20 +549,23 @@ def compute_corr_pairs(df: pd.DataFrame, corr_threshold=0.9) -> pd.DataFrame:
 # ============================================================
 # 5. IF + LOF 앙상블
 # ============================================================
+ENSEMBLE_FEATURE_COLS = [
+    "amount_signed_log1p",
+    "zscore_12",
+    "dev_3m",
+    "cv_12",
+    "cost_nature_code",
+    "is_fixed",
+    "is_variable",
+    "is_seasonal",
+    "corr_weight",
+]
+
+
 def run_ensemble_outlier(df: pd.DataFrame, contamination=0.05, random_state=42) -> pd.DataFrame:
     df = df.copy()
 
-    feature_cols = [
-        "amount_signed_log1p",
-        "zscore_12",
-        "dev_3m",
-        "cv_12",
-        "cost_nature_code",
-        "is_fixed",
-        "is_variable",
-        "is_seasonal",
-        "corr_weight",
-    ]
+    feature_cols = ENSEMBLE_FEATURE_COLS
 
     for col in feature_cols:
         if col not in df.columns:
@@ -483,21 +619,121 @@ def _format_won(x):
         return str(x)
 
 
+HISTORY_STAT_COLS = [
+    "hist_n_past",
+    "hist_consec_zero",
+    "hist_all_zero",
+    "hist_zero_3",
+    "hist_n_3",
+    "hist_zero_12",
+    "hist_n_12",
+]
+
+
+def add_history_stats(df: pd.DataFrame, short_window: int = 3, long_window: int = 12) -> pd.DataFrame:
+    """
+    (cost_center, account_code)별 '이번 달 이전' 이력 통계를 한 번에 계산
+      - hist_n_past      : 과거 값(NaN 제외) 개수
+      - hist_consec_zero : 과거 값(NaN 건너뜀) 끝에서부터 연속 0원 개월 수
+      - hist_all_zero    : 과거 값이 1개 이상이고 전부 0원
+      - hist_zero_3 / hist_n_3   : 직전 3행 중 0원 개수 / 값 존재 개수
+      - hist_zero_12 / hist_n_12 : 직전 12행 중 0원 개수 / 값 존재 개수
+
+    정렬된 배열 위에서 누적합(prefix sum) 차이로 계산하므로
+    행마다 전체 DataFrame을 다시 필터링하지 않음.
+    같은 월이 중복된 경우에도 '해당 월보다 이전'만 보도록 월 블록의 첫 행 기준 값을 공유.
+    """
+    df = df.copy()
+    df["year_month"] = as_key_str(df["year_month"])
+
+    n = len(df)
+    if n == 0:
+        for col in HISTORY_STAT_COLS:
+            df[col] = pd.Series(dtype=bool if col == "hist_all_zero" else int)
+        return df
+
+    ym_code = key_codes(df["year_month"])
+    acc_code = key_codes(df["account_code"])
+    cc_code = key_codes(df["cost_center"])
+    order = np.lexsort((ym_code, acc_code, cc_code))
+    s = df.iloc[order]
+
+    amt = pd.to_numeric(s["amount"], errors="coerce").to_numpy(dtype=float)
+    notna = ~np.isnan(amt)
+    is_zero = notna & (amt == 0.0)
+    is_nonzero = notna & ~is_zero
+
+    cc_s, acc_s, ym_s = cc_code[order], acc_code[order], ym_code[order]
+    grp_change = np.r_[True, (cc_s[1:] != cc_s[:-1]) | (acc_s[1:] != acc_s[:-1])]
+    blk_change = grp_change | np.r_[True, ym_s[1:] != ym_s[:-1]]
+
+    pos = np.arange(n)
+    grp_start = np.maximum.accumulate(np.where(grp_change, pos, 0))
+    blk_start = np.maximum.accumulate(np.where(blk_change, pos, 0))
+
+    # 배타적 누적합: C[p] = sum(x[:p])
+    def _prefix(x):
+        return np.r_[0, np.cumsum(x, dtype=np.int64)]
+
+    c_notna = _prefix(notna)
+    c_zero = _prefix(is_zero)
+    c_nonzero = _prefix(is_nonzero)
+
+    p = blk_start
+    g = grp_start[p]
+
+    n_past = c_notna[p] - c_notna[g]
+    nonzero_past = c_nonzero[p] - c_nonzero[g]
+
+    def _window(c, k):
+        lo = np.maximum(g, p - k)
+        return c[p] - c[lo]
+
+    # 직전 마지막 '0이 아닌 값' 위치 이후의 값 존재 개수 = 연속 0원 개월 수
+    last_nonzero = np.maximum.accumulate(np.where(is_nonzero, pos, -1))
+    prev_nonzero = np.where(p > 0, last_nonzero[np.maximum(p - 1, 0)], -1)
+    run_start = np.maximum(prev_nonzero + 1, g)
+    consec_zero = c_notna[p] - c_notna[run_start]
+
+    stats = {
+        "hist_n_past": n_past,
+        "hist_consec_zero": consec_zero,
+        "hist_all_zero": (n_past > 0) & (nonzero_past == 0),
+        "hist_zero_3": _window(c_zero, short_window),
+        "hist_n_3": _window(c_notna, short_window),
+        "hist_zero_12": _window(c_zero, long_window),
+        "hist_n_12": _window(c_notna, long_window),
+    }
+
+    for col, vals in stats.items():
+        out = np.empty(n, dtype=vals.dtype)
+        out[order] = vals
+        df[col] = out
+
+    return df
+
+
 def build_human_explanations(df: pd.DataFrame) -> pd.DataFrame:
     """
     ✅ 요구 반영:
     1) 결측 사유를 3개월/12개월로 분리해 각각 reason_kor에 출력
     2) 0원 이상치 사유에서 6개월 기준 제거, 3개월/12개월만 사용
+
+    과거 이력 통계(hist_*)가 없으면 add_history_stats()로 먼저 계산하고,
+    여기서는 행별 문자열 조립만 수행.
     """
-    df = df.copy()
-    df["year_month"] = df["year_month"].astype(str)
+    if any(col not in df.columns for col in HISTORY_STAT_COLS):
+        df = add_history_stats(df)
+    else:
+        df = df.copy()
+    df["year_month"] = as_key_str(df["year_month"])
 
     issue_types = []
     severities = []
     reasons = []
     reason_tags_all = []
 
-    for _, row in df.iterrows():
+    for row in df.to_dict(orient="records"):
         amt  = row.get("amount", np.nan)
         z    = row.get("zscore_12", np.nan)
         dev3 = row.get("dev_3m", np.nan)
@@ -564,37 +800,23 @@ def build_human_explanations(df: pd.DataFrame) -> pd.DataFrame:
 
         # ======================================================
         # 1) 0원 처리 (✅ 6개월 기준 제거, 3개월/12개월만 사용)
+        #    - 과거 이력 통계는 add_history_stats()에서 미리 계산된 컬럼 사용
         # ======================================================
-        cc_mask = (df["cost_center"] == row["cost_center"]) & (df["account_code"] == row["account_code"])
-        hist_grp = df[cc_mask].sort_values("year_month")
-        hist_before = hist_grp[hist_grp["year_month"] < row["year_month"]]
-        past_vals = hist_before["amount"]
-        past_non_nan = past_vals.dropna()
-        total_past_months = len(past_non_nan)
-
-        consec_zero_months = 0
-        for v in reversed(past_non_nan.tolist()):
-            try:
-                if float(v) == 0.0:
-                    consec_zero_months += 1
-                else:
-                    break
-            except Exception:
-                break
-
-        last3 = past_vals.tail(3).dropna()
-        zero3 = int((last3 == 0).sum()) if len(last3) > 0 else 0
-        n3 = len(last3)
+        total_past_months  = int(row.get("hist_n_past", 0))
+        consec_zero_months = int(row.get("hist_consec_zero", 0))
+        past_all_zero      = bool(row.get("hist_all_zero", False))
+
+        zero3 = int(row.get("hist_zero_3", 0))
+        n3    = int(row.get("hist_n_3", 0))
 
         # ✅ 12개월 기준 추가
-        last12 = past_vals.tail(12).dropna()
-        zero12 = int((last12 == 0).sum()) if len(last12) > 0 else 0
-        n12 = len(last12)
+        zero12 = int(row.get("hist_zero_12", 0))
+        n12    = int(row.get("hist_n_12", 0))
 
         force_zero_anomaly = False
 
         if (not pd.isna(amt)) and is_zero_like:
-            if total_past_months > 0 and past_non_nan.eq(0).all():
+            if past_all_zero:
                 tags.append("지속적 0원 패턴")
                 msg = "과거에도 지속적으로 0원으로 발생한 계정입니다."
                 msg_detail = f" 과거 {total_past_months}개월 동안 기록된 월은 모두 0원이었습니다."
@@ -738,7 +960,7 @@ def build_human_explanations(df: pd.DataFrame) -> pd.DataFrame:
 # 7. 엑셀 리포트 저장 (단독 분석 스크립트용 유틸)
 # ============================================================
 def save_report(df, output_path="AI_anomaly_report.xlsx", target_ym=None):
-    df = df.copy()
+    df = decode_keys(df.copy())
     df["year_month"] = df["year_month"].astype(str)
     df["is_issue"] = df["issue_type"] != "정상"
 
@@ -857,7 +1079,8 @@ def main():
     print("[5] IF+LOF 앙상블 이상치 스코어 계산...")
     df = run_ensemble_outlier(df, contamination=0.05, random_state=42)
 
-    print("[6] 사람이 읽을 수 있는 한글 설명 생성...")
+    print("[6] 과거 이력 통계 계산 + 사람이 읽을 수 있는 한글 설명 생성...")
+    df = add_history_stats(df)
     df = build_human_explanations(df)
 
     print("[7] 터미널 요약 출력...")
@@ -0,0 +1,397 @@
+"""
+입력 데이터셋 버전 + 파생 캐시 관리
+
+- 입력(폴더 또는 파일)마다 내용 지문(version) 계산
+  · 파일별 sha256을 (크기, mtime_ns) 기준으로 기억해 두고, stat이 바뀐 파일만 다시 해시
+  · 폴더 버전 = (파일명, sha256) 목록의 sha256, 파일이 없으면 "missing"
+  · 계산한 버전은 INPUT_CHECK_TTL_S 동안 재사용(그 사이에는 파일 stat도 하지 않음)
+    → 앱이 입력 파일을 직접 쓰면 touch_input(name)으로 바로 무효화
+- 파생 캐시(cache/*.pkl)는 만들 때 사용한 입력 버전을 인덱스 폴더(dataset_index/)에 기록
+  · 캐시마다 작은 JSON 하나(cache.<이름>.json), 입력마다 파일 해시 메모 하나(files.<이름>.json)
+    → gunicorn 워커 여러 개가 서로 다른 캐시를 갱신해도 다른 기록을 덮어쓰지 않음
+  · 기록 파일의 stat(mtime_ns, 크기)이 바뀌었을 때만 다시 읽음 → 다른 워커가 만든 캐시도 인식
+  → 신선도 판정 = 현재 입력 버전과 기록된 버전의 dict 비교(피클은 열지 않음)
+- get(name): 신선하면 피클 로딩, 아니면 등록된 build(이전 값)로 해당 캐시만 다시 만듦
+  (이전 값을 넘겨 주므로 build에서 증분 갱신 가능)
+  · build+저장은 dataset_index/<이름>.lock 파일 락 안에서 실행, 락을 잡은 뒤 신선도 재확인
+    → 워커 여러 개가 동시에 시작해도 한 워커만 만들고 나머지는 그 결과를 읽음
+- 캐시 구조가 바뀌면 register_cache(version=...)를 올림 → 다른 버전 기록은 stale
+- register_cache(memory=True): 마지막 값을 입력 버전과 함께 프로세스 메모리에 보관
+  → 입력 버전이 같으면 피클을 다시 열지 않음(작고 자주 읽는 캐시용)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from file_lock import file_lock
+
+INDEX_DIR_NAME = "dataset_index"
+
+INDEX_VERSION = 2
+
+MISSING = "missing"
+
+INPUT_CHECK_TTL_S = float(os.environ.get("DATASET_INPUT_TTL_S", 2))
+
+
+def _file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return int(st.st_mtime_ns), int(st.st_size)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[dataset_versions] {path.name} load error:", e)
+        return None
+    if not isinstance(data, dict) or data.get("index_version") != INDEX_VERSION:
+        return None
+    return data
+
+
+def _tmp_path(path: Path) -> Path:
+    # 임시 파일명에 pid/스레드를 넣어 여러 워커가 같은 파일을 동시에 써도 섞이지 않게 함
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index_version": INDEX_VERSION, **data}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CacheManager:
+    def __init__(self, cache_dir: Path, input_ttl_s: float = INPUT_CHECK_TTL_S):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir = self.cache_dir / INDEX_DIR_NAME
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.input_ttl_s = float(input_ttl_s)
+        self._inputs: Dict[str, Tuple[Path, Tuple[str, ...]]] = {}
+        self._caches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._memory: Dict[str, Tuple[Dict[str, str], Any]] = {}
+        # 입력명 → (확인 시각 monotonic, 버전)
+        self._checked: Dict[str, Tuple[float, str]] = {}
+        # 입력명 → {파일 경로: [크기, mtime_ns, sha256]}
+        self._file_memo: Dict[str, Dict[str, List[Any]]] = {}
+        # 캐시명 → (기록 파일 stat, 기록)
+        self._metas: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+    # ------------------------------
+    # 인덱스(입력별 파일 해시 메모 + 캐시별 입력 버전)
+    # ------------------------------
+    def _lock_path(self, name: str) -> Path:
+        return self.index_dir / f"{name}.lock"
+
+    def _meta_path(self, name: str) -> Path:
+        return self.index_dir / f"cache.{name}.json"
+
+    def _files_path(self, name: str) -> Path:
+        return self.index_dir / f"files.{name}.json"
+
+    def _meta(self, name: str) -> Dict[str, Any]:
+        """
+        캐시 name의 기록(없으면 빈 dict), 기록 파일 stat이 그대로면 메모리 값 사용
+        """
+        path = self._meta_path(name)
+        key = _stat_key(path)
+        if key is None:
+            self._metas.pop(name, None)
+            return {}
+        memo = self._metas.get(name)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        meta = _read_json(path) or {}
+        self._metas[name] = (key, meta)
+        return meta
+
+    def _load_file_memo(self, name: str) -> Dict[str, List[Any]]:
+        data = _read_json(self._files_path(name)) or {}
+        return dict(data.get("files") or {})
+
+    # ------------------------------
+    # 등록
+    # ------------------------------
+    def register_input(self, name: str, path: Path, exts: Tuple[str, ...] = (".xlsx", ".xls")) -> None:
+        self._inputs[name] = (Path(path), tuple(e.lower() for e in exts))
+
+    def register_cache(
+        self,
+        name: str,
+        filename: str,
+        inputs: List[str],
+        build: Optional[Callable[[Optional[Any]], Any]] = None,
+        version: Any = 1,
+        memory: bool = False,
+    ) -> None:
+        unknown = [i for i in inputs if i not in self._inputs]
+        if unknown:
+            raise KeyError(f"등록되지 않은 입력: {', '.join(unknown)}")
+        self._caches[name] = {
+            "path": self.cache_dir / filename,
+            "inputs": list(inputs),
+            "build": build,
+            "version": str(version),
+            "memory": bool(memory),
+        }
+        self._build_locks.setdefault(name, threading.Lock())
+
+    def cache_names(self) -> List[str]:
+        return list(self._caches)
+
+    # ------------------------------
+    # 입력 버전
+    # ------------------------------
+    def _source_files(self, path: Path, exts: Tuple[str, ...]) -> List[Path]:
+        if path.is_file():
+            return [path]
+        if not path.is_dir():
+            return []
+        return [
+            p for p in sorted(path.iterdir())
+            if p.is_file() and p.suffix.lower() in exts and not p.name.startswith("~$")
+        ]
+
+    def _file_hash(self, memo: Dict[str, List[Any]], path: Path) -> Tuple[str, bool]:
+        st = path.stat()
+        key = str(path.resolve())
+        hit = memo.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2], False
+        sha = _file_sha256(path)
+        memo[key] = [int(st.st_size), int(st.st_mtime_ns), sha]
+        return sha, True
+
+    def _compute_input_version(self, name: str) -> str:
+        path, exts = self._inputs[name]
+        files = self._source_files(path, exts)
+        if not files:
+            return MISSING
+        memo = self._file_memo.get(name)
+        if memo is None:
+            memo = self._file_memo[name] = self._load_file_memo(name)
+        keys = [str(p.resolve()) for p in files]
+        if any(k not in memo for k in keys):
+            # 다른 워커가 이미 해시해 둔 파일이면 그 메모를 사용
+            memo.update({k: v for k, v in self._load_file_memo(name).items() if k not in memo})
+        h = hashlib.sha256()
+        changed = False
+        for p in files:
+            sha, hashed = self._file_hash(memo, p)
+            changed = changed or hashed
+            h.update(p.name.encode("utf-8"))
+            h.update(sha.encode("ascii"))
+        if changed or len(memo) != len(keys):
+            # 지금 있는 파일만 남겨 저장(지워진 파일 메모 정리)
+            self._file_memo[name] = {k: memo[k] for k in keys}
+            _write_json(self._files_path(name), {"files": self._file_memo[name]})
+        return h.hexdigest()
+
+    def input_version(self, name: str) -> str:
+        with self._lock:
+            checked = self._checked.get(name)
+            now = time.monotonic()
+            if checked is not None and now - checked[0] < self.input_ttl_s:
+                return checked[1]
+            version = self._compute_input_version(name)
+            self._checked[name] = (now, version)
+            return version
+
+    def input_versions(self, names: Optional[List[str]] = None) -> Dict[str, str]:
+        names = list(self._inputs) if names is None else names
+        with self._lock:
+            return {n: self.input_version(n) for n in names}
+
+    def touch_input(self, name: str) -> None:
+        """
+        입력 파일을 앱에서 직접 바꿨을 때 호출 → 다음 조회에서 TTL과 무관하게 다시 확인
+        """
+        with self._lock:
+            self._checked.pop(name, None)
+
+    def current_versions(self, name: str) -> Dict[str, str]:
+        """
+        캐시 name이 의존하는 입력들의 현재 버전 (build 시작 전에 찍어 두고 put에 넘김)
+        """
+        return self.input_versions(self._caches[name]["inputs"])
+
+    # ------------------------------
+    # 캐시 조회 / 저장
+    # ------------------------------
+    def is_fresh(self, name: str, versions: Optional[Dict[str, str]] = None) -> bool:
+        spec = self._caches[name]
+        meta = self._meta(name)
+        if not meta or meta.get("version") != spec["version"] or not spec["path"].exists():
+            return False
+        versions = self.current_versions(name) if versions is None else versions
+        return meta.get("inputs") == versions
+
+    def load_fresh(self, name: str) -> Optional[Any]:
+        """
+        신선하면 캐시 값, 아니면(또는 읽기 실패) None
+        """
+        versions = self.current_versions(name)
+        memo = self._memory.get(name)
+        if memo is not None and memo[0] == versions:
+            return memo[1]
+        if not self.is_fresh(name, versions):
+            return None
+        value = self._read(name)
+        if value is not None:
+            self._remember(name, value, versions)
+        return value
+
+    def _read(self, name: str) -> Optional[Any]:
+        path = self._caches[name]["path"]
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"[dataset_versions] {name} load error:", e)
+            return None
+
+    def put(self, name: str, value: Any, versions: Optional[Dict[str, str]] = None) -> None:
+        spec = self._caches[name]
+        versions = self.current_versions(name) if versions is None else versions
+        tmp_path = _tmp_path(spec["path"])
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, spec["path"])
+        self._remember(name, value, versions)
+        meta = {
+            "version": spec["version"],
+            "inputs": dict(versions),
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            _write_json(self._meta_path(name), meta)
+
+    def _remember(self, name: str, value: Any, versions: Dict[str, str]) -> None:
+        if self._caches[name]["memory"]:
+            self._memory[name] = (dict(versions), value)
+
+    def get(self, name: str, force: bool = False) -> Any:
+        """
+        신선하면 캐시 값, stale(또는 force)이면 build(이전 값)로 다시 만들어 저장 후 반환
+        force=True 이면 이전 값 없이(None) 처음부터 만듦
+        """
+        spec = self._caches[name]
+        if spec["build"] is None:
+            raise ValueError(f"{name}: build 함수가 등록되지 않았습니다.")
+
+        with self._build_locks[name]:
+            versions = self.current_versions(name)
+            memo = self._memory.get(name)
+            if not force and memo is not None and memo[0] == versions:
+                return memo[1]
+
+            if not force:
+                value = self._read_fresh(name, versions)
+                if value is not None:
+                    return value
+
+            # 워커 간 락: 콜드 스타트에 워커마다 같은 캐시를 다시 만들지 않도록 한 곳만 build
+            with file_lock(self._lock_path(name)):
+                meta = self._meta(name)
+                previous = None
+                if not force and spec["path"].exists():
+                    # 락을 기다리는 동안 다른 워커가 만들었으면 그대로 사용
+                    value = self._read_fresh(name, versions)
+                    if value is not None:
+                        return value
+                    if meta.get("version") == spec["version"]:
+                        previous = self._read(name)
+
+                stale = [i for i in spec["inputs"] if (meta.get("inputs") or {}).get(i) != versions[i]]
+                print(f"[dataset_versions] rebuild {name} (stale inputs: {', '.join(stale) or '-'})")
+                value = spec["build"](previous)
+                try:
+                    self.put(name, value, versions)
+                except Exception as e:
+                    print(f"[dataset_versions] {name} save error:", e)
+                    self._remember(name, value, versions)
+                return value
+
+    def _read_fresh(self, name: str, versions: Dict[str, str]) -> Any:
+        if not self._caches[name]["path"].exists() or not self.is_fresh(name, versions):
+            return None
+        value = self._read(name)
+        if value is not None:
+            self._remember(name, value, versions)
+        return value
+
+    def invalidate(self, name: Optional[str] = None) -> List[str]:
+        names = list(self._caches) if name is None else [name]
+        with self._lock:
+            for n in names:
+                try:
+                    self._meta_path(n).unlink()
+                except FileNotFoundError:
+                    pass
+                self._metas.pop(n, None)
+                self._memory.pop(n, None)
+        return names
+
+    def refresh(self, names: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """
+        stale인 캐시만(force면 전부) 다시 만듦, build가 없는 캐시는 건너뜀
+        반환: {캐시명: "fresh" | "rebuilt" | "skipped" | "error: ..."}
+        """
+        out: Dict[str, str] = {}
+        for n in (list(self._caches) if names is None else names):
+            spec = self._caches[n]
+            if not force and self.is_fresh(n):
+                out[n] = "fresh"
+                continue
+            if spec["build"] is None:
+                out[n] = "skipped"
+                continue
+            try:
+                self.get(n, force=force)
+                out[n] = "rebuilt"
+            except Exception as e:
+                out[n] = f"error: {e}"
+        return out
+
+    def status(self) -> Dict[str, Any]:
+        versions = self.input_versions()
+        caches = {}
+        for n, spec in self._caches.items():
+            meta = self._meta(n)
+            current = {i: versions[i] for i in spec["inputs"]}
+            caches[n] = {
+                "file": spec["path"].name,
+                "inputs": spec["inputs"],
+                "fresh": self.is_fresh(n, current),
+                "built_at": meta.get("built_at"),
+                "stale_inputs": [i for i in spec["inputs"] if (meta.get("inputs") or {}).get(i) != current[i]],
+            }
+        return {
+            "inputs": {n: {"path": str(p), "version": versions[n]} for n, (p, _) in self._inputs.items()},
+            "caches": caches,
+        }
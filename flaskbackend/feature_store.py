@@ -0,0 +1,235 @@
+"""
+코스트센터 이상탐지용 피처 스토어
+
+- centercost_data 전체 이력에 대해 파이프라인을 한 번 돌린 결과(행 단위 피처)를
+  (cost_center, account_code, year_month) 키로 cache/에 저장
+- 신규 월 업로드 시에는 저장된 이력 중 '윈도우가 닿는 구간'만 꺼내 쓰고,
+  그룹 전체 통계(mean_12/std_12, 누적 0원 통계)는 계열별 상태(series state)로 이어서 계산
+"""
+
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from key_codec import as_key_str, map_keys
+
+
+FEATURE_STORE_VERSION = 3
+
+# 신규 월 계산 시 꺼내 쓸 직전 이력 길이(개월)
+#  - 결측 12개월 룩백 / 롤링 3·6개월 / 직전 12개월 유효값 플래그를 모두 덮는 길이
+CONTEXT_MONTHS = 12
+
+KEY_COLS = ["cost_center", "account_code"]
+
+RAW_COLS = [
+    "cost_center", "cc_name", "account_code", "account_name",
+    "amount", "year_month", "year", "month", "cost_nature",
+]
+
+# 저장 시 제외(행별 설명 문자열은 신규 월에서만 다시 만듦)
+_DROP_ON_SAVE = ["reason_kor", "reason_tags"]
+
+
+# ============================================================
+# 1. 원천 파일 매니페스트
+# ============================================================
+def source_manifest(directory: Path, exts: Tuple[str, ...] = (".xlsx", ".xls")) -> List[Tuple[str, int, int]]:
+    """
+    폴더 내 원천 파일의 (파일명, 크기, mtime_ns) 목록.
+    피처 스토어가 어떤 입력으로 만들어졌는지 비교하는 용도.
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+
+    out: List[Tuple[str, int, int]] = []
+    for fname in sorted(os.listdir(str(directory))):
+        if not fname.lower().endswith(exts):
+            continue
+        st = (directory / fname).stat()
+        out.append((fname, int(st.st_size), int(st.st_mtime_ns)))
+    return out
+
+
+# ============================================================
+# 2. 계열별 상태(그룹 전체 통계 이어 붙이기용)
+# ============================================================
+def _ym_to_index(ym: str) -> int:
+    s = str(ym)
+    return int(s[:4]) * 12 + int(s[5:7]) - 1
+
+
+def _index_to_ym(idx: int) -> str:
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+def _object_index(index: pd.MultiIndex) -> pd.MultiIndex:
+    # Categorical 키 레벨 → object 문자열 (신규 월 행은 카테고리 구성이 달라도 reindex 가능)
+    return pd.MultiIndex.from_arrays(
+        [index.get_level_values(i).astype(object) for i in range(index.nlevels)], names=index.names
+    )
+
+
+def build_series_state(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    (cost_center, account_code)별 누적 상태
+      - n_amt / mean_amt / m2_amt : NaN 제외 금액의 개수 / 평균 / 편차제곱합 (mean_12, std_12 이어서 계산)
+      - any_nonzero               : 0이 아닌 값이 한 번이라도 있었는지
+      - consec_zero               : 마지막 행까지 포함한 끝자리 연속 0원 개월 수
+    """
+    amt = pd.to_numeric(df["amount"], errors="coerce")
+    g = amt.groupby([df[c] for c in KEY_COLS], dropna=False, observed=True)
+
+    n = g.count()
+    state = pd.DataFrame(
+        {
+            "n_amt": n,
+            "mean_amt": g.mean(),
+            "m2_amt": (g.var(ddof=1) * (n - 1)).fillna(0.0),
+            "any_nonzero": (amt.notna() & (amt != 0)).groupby([df[c] for c in KEY_COLS], dropna=False, observed=True).any(),
+        }
+    )
+
+    # 마지막 행의 hist_consec_zero(직전까지) + 마지막 행 자체 반영
+    state.index = _object_index(state.index)
+    last = df.sort_values("year_month").groupby(KEY_COLS, dropna=False, observed=True).tail(1).set_index(KEY_COLS)
+    last.index = _object_index(last.index)
+    last_amt = pd.to_numeric(last["amount"], errors="coerce")
+    prev_run = last["hist_consec_zero"].astype(int) if "hist_consec_zero" in last.columns else 0
+    consec = np.where(last_amt.isna(), prev_run, np.where(last_amt == 0, prev_run + 1, 0))
+    state["consec_zero"] = pd.Series(consec, index=last.index).reindex(state.index).fillna(0).astype(int)
+
+    return state
+
+
+def apply_series_state(new_df: pd.DataFrame, store: Dict[str, Any]) -> pd.DataFrame:
+    """
+    신규 월 행에 대해, 저장된 이력과 합쳤을 때의 그룹 전체 통계로 덮어쓰기
+      - mean_12 / std_12 / cv_12 / zscore_12 / normal_upper / normal_lower (Welford 갱신)
+      - hist_n_past / hist_all_zero / hist_consec_zero
+      - cost_nature_code (저장된 코드표 기준)
+    """
+    df = new_df.copy()
+    state: pd.DataFrame = store["state"]
+
+    keys = pd.MultiIndex.from_frame(df[KEY_COLS].astype(object))
+    st = state.reindex(keys)
+
+    n0 = st["n_amt"].fillna(0).to_numpy(dtype=float)
+    mean0 = st["mean_amt"].fillna(0.0).to_numpy(dtype=float)
+    m2_0 = st["m2_amt"].fillna(0.0).to_numpy(dtype=float)
+
+    x = pd.to_numeric(df["amount"], errors="coerce").to_numpy(dtype=float)
+    has_x = ~np.isnan(x)
+
+    n1 = n0 + has_x
+    delta = np.where(has_x, x - mean0, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean1 = np.where(n1 > 0, mean0 + delta / np.maximum(n1, 1), np.nan)
+        m2_1 = m2_0 + np.where(has_x, delta * (x - mean1), 0.0)
+        std1 = np.where(n1 > 1, np.sqrt(np.maximum(m2_1, 0.0) / np.maximum(n1 - 1, 1)), np.nan)
+
+    df["mean_12"] = mean1
+    df["std_12"] = std1
+    df["cv_12"] = df["std_12"] / (df["mean_12"].replace(0, np.nan)).abs()
+    df["normal_upper"] = df["mean_12"] + 2 * df["std_12"]
+    df["normal_lower"] = df["mean_12"] - 2 * df["std_12"]
+
+    eps = 1e-6
+    df["zscore_12"] = (df["amount"] - df["mean_12"]) / (df["std_12"].replace(0, np.nan) + eps)
+
+    if "hist_n_past" in df.columns:
+        df["hist_n_past"] = n0.astype(int)
+        df["hist_all_zero"] = (n0 > 0) & ~st["any_nonzero"].fillna(False).astype(bool).to_numpy()
+        df["hist_consec_zero"] = st["consec_zero"].fillna(0).to_numpy(dtype=int)
+
+    nature_map: Dict[str, int] = dict(store.get("nature_map") or {})
+    natures = as_key_str(df["cost_nature"])
+    for v in sorted(set(natures) - set(nature_map)):
+        nature_map[v] = max(nature_map.values(), default=0) + 1
+    df["cost_nature_code"] = map_keys(natures, nature_map, default=0).astype(int)
+
+    return df
+
+
+# ============================================================
+# 3. 저장 / 로딩
+# ============================================================
+def save_feature_store(
+    path: str,
+    df: pd.DataFrame,
+    manifest: List[Tuple[str, int, int]],
+    pair_info: Optional[pd.DataFrame],
+) -> Dict[str, Any]:
+    frame = df.drop(columns=[c for c in _DROP_ON_SAVE if c in df.columns]).copy()
+    frame["year_month"] = as_key_str(frame["year_month"])
+    frame = frame.sort_values("year_month", kind="mergesort").reset_index(drop=True)
+
+    nature_map: Dict[str, int] = {}
+    if "cost_nature_code" in frame.columns:
+        pairs = frame[["cost_nature", "cost_nature_code"]].drop_duplicates().astype({"cost_nature": str})
+        nature_map = {str(k): int(v) for k, v in zip(pairs["cost_nature"], pairs["cost_nature_code"])}
+
+    store = {
+        "version": FEATURE_STORE_VERSION,
+        "manifest": list(manifest),
+        "last_ym": str(frame["year_month"].iloc[-1]) if len(frame) else None,
+        "frame": frame,
+        "state": build_series_state(frame),
+        "pair_info": pair_info.copy() if pair_info is not None else None,
+        "nature_map": nature_map,
+    }
+
+    # 임시 파일명에 pid/스레드를 넣어 여러 워커가 동시에 만들어도 서로의 쓰기를 덮지 않게 함
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return store
+
+
+def load_feature_store(path: str, manifest: List[Tuple[str, int, int]]) -> Optional[Dict[str, Any]]:
+    """
+    저장된 스토어가 현재 원천 파일 매니페스트와 일치할 때만 반환 (아니면 None)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            store = pickle.load(f)
+    except Exception as e:
+        print("[feature_store] load error:", e)
+        return None
+
+    if store.get("version") != FEATURE_STORE_VERSION:
+        return None
+    if [tuple(x) for x in store.get("manifest") or []] != [tuple(x) for x in manifest]:
+        return None
+    return store
+
+
+def context_frame(store: Dict[str, Any], target_ym: str, months: int = CONTEXT_MONTHS) -> pd.DataFrame:
+    """
+    target_ym 직전 `months`개월 구간의 저장 행 (year_month 정렬 배열에서 이진 탐색)
+    """
+    frame: pd.DataFrame = store["frame"]
+    lo_ym = _index_to_ym(_ym_to_index(target_ym) - int(months))
+    ym = frame["year_month"]
+    if isinstance(ym.dtype, pd.CategoricalDtype):
+        # 카테고리가 문자열 정렬 순서 → 경계 월을 코드로 바꿔 정수 배열에서 탐색
+        cats = np.asarray(ym.cat.categories, dtype=object)
+        yms = ym.cat.codes.to_numpy()
+        lo_key = np.searchsorted(cats, lo_ym, side="left")
+        hi_key = np.searchsorted(cats, str(target_ym), side="left")
+    else:
+        yms = ym.to_numpy()
+        lo_key, hi_key = lo_ym, str(target_ym)
+    lo = int(np.searchsorted(yms, lo_key, side="left"))
+    hi = int(np.searchsorted(yms, hi_key, side="left"))
+    return frame.iloc[lo:hi]
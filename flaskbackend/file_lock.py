@@ -0,0 +1,34 @@
+"""
+프로세스 간 파일 락 (gunicorn 워커끼리 같은 캐시/저장소를 고칠 때)
+
+- file_lock(path): path 파일에 fcntl.flock 배타 락을 잡고 with 블록 실행
+  · 열 때마다 새 파일 디스크립터 → 같은 프로세스의 다른 스레드끼리도 서로 기다림
+  · 프로세스가 죽으면 OS가 락을 풀어 줌(남은 .lock 파일은 지우지 않고 재사용)
+- fcntl이 없는 플랫폼(Windows)에서는 락 없이 실행(단일 프로세스 개발 서버 가정)
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # close가 락도 풀어 줌
+        os.close(fd)
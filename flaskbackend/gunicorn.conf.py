@@ -0,0 +1,14 @@
+"""
+gunicorn 설정 (flaskbackend 디렉터리에서 `gunicorn app:app` 실행 시 자동으로 읽음)
+
+- post_worker_init: 워커가 app을 로딩한 직후, 요청 스레드를 만들기 전에 파티션 프로세스 풀을 띄움
+  (pipeline_executor: 스레드가 생긴 뒤에는 새로 fork하지 않음)
+- 풀 크기는 ANOMALY_PIPELINE_WORKERS, 없으면 CPU 코어 수 / WEB_CONCURRENCY(최대 4)
+"""
+
+
+def post_worker_init(worker):
+    from pipeline_executor import prestart_pool
+
+    n = prestart_pool()
+    worker.log.info("partition pool started: %d worker(s)", n)
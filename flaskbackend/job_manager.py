@@ -0,0 +1,508 @@
+"""
+백그라운드 작업 관리자 (요청 안에서 돌리기 무거운 분석 / 리포트 생성 / 재학습)
+
+- 제한된 스레드 풀(max_workers)에서 실행, 대기 작업이 max_pending을 넘으면 JobQueueFull
+- 작업 id / 상태(queued → running → succeeded | failed | cancelled) / 단계·진행률·상세 보고
+- 끝난 작업의 결과는 ttl_s 동안 보관 후 정리(종류별 가장 최근 작업은 상태 조회용으로 유지)
+- 취소: 대기 중이면 즉시, 실행 중이면 협조적
+  (작업 함수가 JobContext.stage / check_cancelled를 부를 때 JobCancelled)
+- dedupe_key: 같은 키의 작업이 대기·실행 중이면 새로 만들지 않고 그 작업을 반환(재학습 중복 실행 방지)
+- wait(): 작업 상태가 바뀌거나(since 이후 version 증가) 끝날 때까지 대기 → long-poll
+- store(JobStore)를 주면 상태·결과를 디스크에도 기록 → gunicorn 워커 여러 개 중 어느 워커에서도
+  조회 / 결과 / 취소 가능(실행은 작업을 만든 워커, 다른 워커의 취소는 표시 파일로 전달)
+  작업을 실행하던 프로세스가 없어졌으면 failed로 보고
+"""
+
+import itertools
+import json
+import os
+import pickle
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_WORKERS = int(os.environ.get("BACKGROUND_JOB_WORKERS", 2))
+JOB_MAX_PENDING = 16
+JOB_TTL_S = 1800
+
+# 다른 워커가 실행 중인 작업을 기다릴 때 디스크 확인 간격
+JOB_STORE_POLL_S = 0.25
+
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid or pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Windows의 os.kill은 프로세스를 종료시킴 → 확인하지 않음
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ============================================================
+# 1. 작업 상태 / 결과 디스크 보관 (워커 간 공유)
+# ============================================================
+class JobStore:
+    """
+    작업 하나당 파일 몇 개 (작업 id로 구분, 쓰는 쪽은 그 작업을 실행하는 프로세스뿐)
+      - <id>.json: 상태 스냅샷 + 실행 프로세스 pid / dedupe_key / 생성·종료 시각(epoch)
+      - <id>.pkl: 성공한 작업 결과
+      - <id>.cancel: 다른 워커에서 받은 취소 요청 표시
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str) -> Optional[Path]:
+        if not _JOB_ID_RE.match(str(job_id)):
+            return None
+        return self.directory / f"{job_id}{suffix}"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, record: Dict[str, Any]) -> None:
+        path = self._path(record["job"]["job_id"], ".json")
+        self._write(path, json.dumps(record, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(job_id, ".json")
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[job_manager] {path.name} load error:", e)
+            return None
+
+    def records(self) -> List[Dict[str, Any]]:
+        out = []
+        for p in self.directory.glob("*.json"):
+            record = self.load(p.stem)
+            if record is not None:
+                out.append(record)
+        return out
+
+    def save_result(self, job_id: str, value: Any) -> None:
+        self._write(self._path(job_id, ".pkl"), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def load_result(self, job_id: str) -> Any:
+        path = self._path(job_id, ".pkl")
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[job_manager] {path.name} load error:", e)
+            return None
+
+    def request_cancel(self, job_id: str) -> None:
+        self._path(job_id, ".cancel").touch()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        path = self._path(job_id, ".cancel")
+        return path is not None and path.exists()
+
+    def drop_result(self, job_id: str) -> None:
+        self._path(job_id, ".pkl").unlink(missing_ok=True)
+
+    def delete(self, job_id: str) -> None:
+        for suffix in (".pkl", ".cancel", ".json"):
+            self._path(job_id, suffix).unlink(missing_ok=True)
+
+
+# ============================================================
+# 2. 작업 함수에 넘기는 진행 보고 / 취소 확인 핸들
+# ============================================================
+class JobContext:
+    def __init__(self, manager: "JobManager", job_id: str):
+        self._manager = manager
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self._manager._cancel_requested(self.job_id)
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled("작업이 취소되었습니다.")
+
+    def stage(self, name: str, progress: Optional[float] = None) -> None:
+        """
+        단계 시작 보고(StageProfiler on_stage로도 사용) - 취소 요청이 있으면 여기서 중단
+        """
+        self.check_cancelled()
+        self._manager._update(self.job_id, stage=name, progress=progress, stage_done=True)
+
+    def progress(self, progress: Optional[float] = None, detail: Optional[Dict[str, Any]] = None) -> None:
+        self._manager._update(self.job_id, progress=progress, detail=detail)
+
+
+# ============================================================
+# 3. 작업 관리자
+# ============================================================
+class JobManager:
+    def __init__(
+        self,
+        max_workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        ttl_s: float = JOB_TTL_S,
+        store: Optional[JobStore] = None,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = int(max_pending)
+        self.ttl_s = float(ttl_s)
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._latest: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._versions = itertools.count(1)
+        self._seq = itertools.count(1)
+
+    # ------------------------------
+    # 제출 / 실행
+    # ------------------------------
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[JobContext], Any],
+        *,
+        dedupe_key: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        fn(ctx) → 결과(JSON으로 보낼 값), 반환: 작업 스냅샷(+ "deduplicated": 기존 작업 반환 여부)
+        """
+        with self._cond:
+            self._purge()
+            self._purge_store()
+            if dedupe_key is not None:
+                for job in self._jobs.values():
+                    if job["dedupe_key"] == dedupe_key and job["status"] not in TERMINAL:
+                        return {**self._snapshot(job), "deduplicated": True}
+                # 다른 워커에서 실행 중인 같은 작업
+                for record in self._remote_records():
+                    if record.get("dedupe_key") == dedupe_key and record["job"]["status"] not in TERMINAL:
+                        return {**record["job"], "deduplicated": True}
+
+            pending = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"대기 중인 작업이 너무 많습니다({pending}건). 잠시 후 다시 시도해 주세요.")
+
+            job_id = uuid.uuid4().hex[:16]
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "stage": None,
+                "stages_done": 0,
+                "progress": None,
+                "detail": None,
+                "meta": meta or {},
+                "error": None,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "cancel_requested": False,
+                "result_expired": False,
+                "version": next(self._versions),
+                "dedupe_key": dedupe_key,
+                "_seq": next(self._seq),
+                "_result": None,
+                "_created_t": time.time(),
+                "_finished_t": None,
+                "_finished_wall_t": None,
+                "_future": None,
+            }
+            self._jobs[job_id] = job
+            self._latest[kind] = job_id
+            self._persist(job)
+            job["_future"] = self._pool.submit(self._run, job_id, fn)
+            return {**self._snapshot(job), "deduplicated": False}
+
+    def _run(self, job_id: str, fn: Callable[[JobContext], Any]) -> None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return
+            if self._cancel_requested(job_id):
+                self._finish(job, "cancelled", error="작업이 취소되었습니다.")
+                return
+            job.update(status="running", started_at=_now())
+            self._touch(job)
+
+        try:
+            result = fn(JobContext(self, job_id))
+        except JobCancelled as e:
+            with self._cond:
+                self._finish(job, "cancelled", error=str(e))
+            return
+        except Exception as e:
+            print(f"[job_manager] {job['kind']} {job_id} failed:", e)
+            trace = traceback.format_exc()[-5000:]
+            with self._cond:
+                job["detail"] = {**(job["detail"] or {}), "trace": trace}
+                self._finish(job, "failed", error=str(e))
+            return
+
+        if self.store is not None:
+            # 상태가 succeeded로 보이기 전에 결과 파일부터
+            try:
+                self.store.save_result(job_id, result)
+            except Exception as e:
+                print(f"[job_manager] {job['kind']} {job_id} result save error:", e)
+        with self._cond:
+            job["_result"] = result
+            job["progress"] = 1.0
+            self._finish(job, "succeeded")
+
+    # ------------------------------
+    # 조회 / 대기 / 취소
+    # ------------------------------
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._snapshot(job)
+        return self._remote_snapshot(job_id)
+
+    def latest(self, kind: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(self._latest.get(kind, ""))
+            best = (job["_created_t"], self._snapshot(job)) if job is not None else None
+            for record in self._remote_records():
+                if record["job"]["kind"] == kind and (best is None or record["created_t"] > best[0]):
+                    best = (record["created_t"], self._remote_view(record))
+            return best[1] if best is not None else None
+
+    def list(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._cond:
+            self._purge()
+            self._purge_store()
+            items = [(j["_created_t"], j["_seq"], self._snapshot(j)) for j in self._jobs.values()]
+            items += [(r["created_t"], 0, self._remote_view(r)) for r in self._remote_records()]
+            items = [t for t in items if kind is None or t[2]["kind"] == kind]
+            return [t[2] for t in sorted(items, key=lambda t: (t[0], t[1]), reverse=True)]
+
+    def result(self, job_id: str) -> Any:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job["_result"]
+        return self.store.load_result(job_id) if self.store is not None else None
+
+    def wait(self, job_id: str, timeout: float, since: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        since가 없으면 끝날 때까지, 있으면 version이 since보다 커질 때까지(최대 timeout초) 대기
+        (다른 워커의 작업은 디스크 상태를 JOB_STORE_POLL_S 간격으로 확인)
+        """
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._cond:
+            local = job_id in self._jobs
+            while local:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None
+                if job["status"] in TERMINAL or (since is not None and job["version"] > since):
+                    return self._snapshot(job)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._snapshot(job)
+                self._cond.wait(remaining)
+
+        while True:
+            job = self._remote_snapshot(job_id)
+            if job is None or job["status"] in TERMINAL or (since is not None and job["version"] > since):
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            time.sleep(min(JOB_STORE_POLL_S, remaining))
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job["status"] not in TERMINAL:
+                    job["cancel_requested"] = True
+                    if job["status"] == "queued" and job["_future"].cancel():
+                        self._finish(job, "cancelled", error="작업이 취소되었습니다.")
+                    else:
+                        self._touch(job)
+                return self._snapshot(job)
+
+        # 다른 워커의 작업: 표시 파일을 남기면 실행 중인 워커가 다음 단계 경계에서 확인
+        job = self._remote_snapshot(job_id)
+        if job is not None and job["status"] not in TERMINAL:
+            self.store.request_cancel(job_id)
+            job["cancel_requested"] = True
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.list():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "ttl_s": self.ttl_s,
+            "shared_store": self.store is not None,
+            "jobs": counts,
+        }
+
+    # ------------------------------
+    # 내부 (_touch / _finish / _purge는 self._cond 잡은 상태에서 호출)
+    # ------------------------------
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if not job["cancel_requested"] and self.store is not None and self.store.cancel_requested(job_id):
+                job["cancel_requested"] = True
+                self._touch(job)
+            return job["cancel_requested"]
+
+    def _update(
+        self,
+        job_id: str,
+        stage: Optional[str] = None,
+        progress: Optional[float] = None,
+        detail: Optional[Dict[str, Any]] = None,
+        stage_done: bool = False,
+    ) -> None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if stage is not None:
+                job["stage"] = stage
+            if stage_done:
+                job["stages_done"] += 1
+            if progress is not None:
+                job["progress"] = round(min(max(float(progress), 0.0), 1.0), 4)
+            if detail:
+                job["detail"] = {**(job["detail"] or {}), **detail}
+            self._touch(job)
+
+    def _touch(self, job: Dict[str, Any]) -> None:
+        job["version"] = next(self._versions)
+        self._cond.notify_all()
+        self._persist(job)
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.save(
+                {
+                    "job": self._snapshot(job),
+                    "pid": os.getpid(),
+                    "dedupe_key": job["dedupe_key"],
+                    "created_t": job["_created_t"],
+                    "finished_t": job["_finished_wall_t"],
+                }
+            )
+        except Exception as e:
+            print(f"[job_manager] {job['job_id']} save error:", e)
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        job.update(
+            status=status, error=error, finished_at=_now(), _finished_t=time.monotonic(), _finished_wall_t=time.time()
+        )
+        self._touch(job)
+
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - self.ttl_s
+        keep = set(self._latest.values())
+        for job_id, job in list(self._jobs.items()):
+            if job["_finished_t"] is None or job["_finished_t"] >= cutoff:
+                continue
+            if job_id in keep:
+                # 상태는 남기고 결과만 버림
+                if not job["result_expired"]:
+                    job["_result"] = None
+                    job["result_expired"] = True
+                    if self.store is not None:
+                        self.store.drop_result(job_id)
+                    self._persist(job)
+            else:
+                del self._jobs[job_id]
+                if self.store is not None:
+                    self.store.delete(job_id)
+
+    def _purge_store(self) -> None:
+        # 이미 없어진 프로세스가 남긴 기록만 정리(살아 있는 워커의 기록은 그 워커가 정리)
+        if self.store is None:
+            return
+        cutoff = time.time() - self.ttl_s
+        for record in self._remote_records():
+            if not _pid_alive(record.get("pid")) and (record.get("finished_t") or record["created_t"]) < cutoff:
+                self.store.delete(record["job"]["job_id"])
+
+    # ------------------------------
+    # 다른 워커의 작업 (디스크 기록)
+    # ------------------------------
+    def _remote_records(self) -> List[Dict[str, Any]]:
+        if self.store is None:
+            return []
+        return [r for r in self.store.records() if r["job"]["job_id"] not in self._jobs]
+
+    def _remote_view(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        job = dict(record["job"])
+        if job["status"] in TERMINAL:
+            return job
+        if not _pid_alive(record.get("pid")):
+            job.update(status="failed", error="작업을 실행하던 서버 프로세스가 종료되었습니다. 다시 요청해 주세요.")
+        elif self.store.cancel_requested(job["job_id"]):
+            job["cancel_requested"] = True
+        return job
+
+    def _remote_snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.store is None:
+            return None
+        record = self.store.load(job_id)
+        return self._remote_view(record) if record is not None else None
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in job.items() if not k.startswith("_") and k != "dedupe_key"}
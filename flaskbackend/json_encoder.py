@@ -0,0 +1,155 @@
+"""
+공용 JSON 응답 인코더
+
+- OrjsonProvider: Flask app.json 교체 → 모든 jsonify / app.json.dumps가 orjson으로 직렬화(요청 파싱은 기본 그대로)
+  (numpy 배열·스칼라 직접 직렬화, NaN/Inf → null, 키 정렬은 Flask 기본과 동일)
+  날짜는 Flask 기본과 같은 HTTP 날짜 문자열, orjson이 못 다루는 값이면 Flask 기본 경로로 대체
+- frame_records: DataFrame → records(list of dict)를 열 단위로 일괄 변환
+  (df.to_dict(orient="records") + 행별 float()/pd.notna 대신, NaN/NaT/pd.NA → None, 날짜 → 문자열)
+- orjson이 없으면 Flask 기본 provider 그대로(frame_records는 그대로 동작)
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+_DAY_NAMES = np.array(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], dtype=object)
+_MONTH_NAMES = np.array(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], dtype=object
+)
+
+
+# ============================================================
+# 1. 값 변환 (orjson이 직접 못 다루는 값)
+# ============================================================
+def _default(o: Any) -> Any:
+    # NaT / pd.NA 먼저(NaT는 datetime 하위 타입)
+    if o is pd.NaT or o is pd.NA:
+        return None
+    if isinstance(o, date):
+        # Flask 기본 provider와 같은 형식
+        return http_date(o)
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# ============================================================
+# 2. Flask JSON provider
+# ============================================================
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    dumps의 separators / ensure_ascii 인자는 무시(항상 compact + UTF-8), indent가 있으면 2칸 들여쓰기
+    orjson이 거부하는 값(64비트 초과 정수, 문자열이 아닌 numpy 키 등)은 Flask 기본 경로로 다시 직렬화
+    """
+
+    default = staticmethod(_default)
+
+    def _options(self, sort_keys: bool, indent: bool) -> int:
+        opt = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            opt |= orjson.OPT_SORT_KEYS
+        if indent:
+            opt |= orjson.OPT_INDENT_2
+        return opt
+
+    def dumps_bytes(self, obj: Any, *, sort_keys: Optional[bool] = None, indent: bool = False) -> bytes:
+        sort_keys = self.sort_keys if sort_keys is None else sort_keys
+        try:
+            return orjson.dumps(obj, default=_default, option=self._options(sort_keys, indent))
+        except orjson.JSONEncodeError as e:
+            print("[json_encoder] orjson fallback:", e)
+            kwargs: Dict[str, Any] = {"sort_keys": sort_keys, "ensure_ascii": False}
+            kwargs.update({"indent": 2} if indent else {"separators": (",", ":")})
+            return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj, sort_keys=kwargs.get("sort_keys"), indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def install_json_provider(app) -> bool:
+    """
+    app.json을 OrjsonProvider로 교체, orjson이 없으면 그대로 두고 False
+    """
+    if not _HAS_ORJSON:
+        print("[json_encoder] orjson not installed, using Flask default JSON provider")
+        return False
+    app.json = OrjsonProvider(app)
+    return True
+
+
+# ============================================================
+# 3. DataFrame → records (열 단위 일괄 변환)
+# ============================================================
+def _http_dates(s: pd.Series) -> np.ndarray:
+    # 고유 값만 문자열로 만들고 코드로 펼침(strftime은 행마다 느리고 로캘에 따라 요일/월 이름이 바뀜)
+    if s.dt.tz is not None:
+        s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+    codes, uniques = pd.factorize(s)
+    iso = np.datetime_as_string(uniques.to_numpy().astype("datetime64[s]"), unit="s")
+    dow = uniques.dayofweek.to_numpy()
+    texts = np.array(
+        [f"{_DAY_NAMES[d]}, {x[8:10]} {_MONTH_NAMES[int(x[5:7]) - 1]} {x[0:4]} {x[11:19]} GMT" for d, x in zip(dow, iso)]
+        + [None],
+        dtype=object,
+    )
+    # NaT 코드 -1 → 마지막 None
+    return texts[codes]
+
+
+def _column_values(s: pd.Series) -> List[Any]:
+    dtype = s.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _http_dates(s).tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind in "biu":
+        return s.to_numpy().tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        arr = s.to_numpy()
+        out = arr.astype(object)
+        out[np.isnan(arr)] = None
+        return out.tolist()
+    # object / category / nullable(Int64, boolean, string) 등
+    arr = s.to_numpy(dtype=object)
+    mask = pd.isna(arr)
+    if mask.any():
+        arr = arr.copy()
+        arr[mask] = None
+    return arr.tolist()
+
+
+def frame_records(df: pd.DataFrame, columns: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    """
+    df.to_dict(orient="records")와 같은 모양(키 = 컬럼명, 컬럼 순서 유지)
+      - NaN / NaT / pd.NA → None, numpy 정수·실수·불리언 → 파이썬 값
+      - datetime64 열 → HTTP 날짜 문자열(jsonify가 Timestamp를 직렬화하던 형식)
+      - object 열의 그 밖의 값(리스트, numpy 스칼라 등)은 그대로 두고 provider가 처리
+    """
+    if columns is not None:
+        df = df.loc[:, list(columns)]
+    keys = list(df.columns)
+    values = [_column_values(df.iloc[:, i]) for i in range(len(keys))]
+    return [{k: v for k, v in zip(keys, row)} for row in zip(*values)]
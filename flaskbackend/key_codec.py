@@ -0,0 +1,91 @@
+"""
+코스트센터 파이프라인 키 컬럼 인코딩
+
+- cost_center / cc_name / account_code / account_name / year_month / cost_nature 를
+  적재 시점에 한 번 pandas Categorical(정수 코드 + 문자열 사전)로 변환
+  → groupby / sort / merge 가 문자열 대신 정수 코드로 동작, 메모리 절감
+- 카테고리는 문자열 정렬 순서로 생성 → 코드 순서 = 문자열 순서
+  (sort_values / 연속 구간 파티션 / 'YYYY-MM' 비교 결과가 object 문자열과 동일)
+- JSON 응답 직전에만 decode_keys()로 object 문자열로 되돌림
+
+[NOTE] 카테고리가 다른 Categorical끼리 concat 하면 object로 풀리므로
+       concat 이후에는 encode_keys()로 다시 인코딩
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+KEY_CATEGORICAL_COLS: List[str] = [
+    "cost_center",
+    "cc_name",
+    "account_code",
+    "account_name",
+    "year_month",
+    "cost_nature",
+]
+
+
+def _is_str_categorical(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.CategoricalDtype) and s.cat.categories.dtype == object
+
+
+def encode_keys(df: pd.DataFrame, cols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    키 컬럼을 문자열 카테고리(정렬)의 Categorical로 변환 (NaN은 코드 -1 로 유지)
+    이미 같은 형태로 인코딩된 컬럼은 그대로 둠
+    """
+    cols = KEY_CATEGORICAL_COLS if cols is None else list(cols)
+    for col in cols:
+        if col not in df.columns or _is_str_categorical(df[col]):
+            continue
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(object)
+        values = s.where(s.isna(), s.astype(str))
+        df[col] = pd.Categorical(values)
+    return df
+
+
+def decode_keys(df: pd.DataFrame, cols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Categorical 키 컬럼을 object 문자열로 복원 (JSON 응답 / 외부 저장 직전)
+    """
+    cols = KEY_CATEGORICAL_COLS if cols is None else list(cols)
+    for col in cols:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def as_key_str(s: pd.Series) -> pd.Series:
+    """
+    문자열 키 보장: 문자열 Categorical은 그대로, 그 외에는 astype(str)
+    """
+    if _is_str_categorical(s):
+        if not s.hasnans:
+            return s
+        # astype(str)과 같게 NaN은 'nan' 문자열로(드문 경로)
+        return pd.Series(pd.Categorical(s.astype(str)), index=s.index, name=s.name)
+    return s.astype(str)
+
+
+def key_codes(s: pd.Series) -> np.ndarray:
+    """
+    정렬 순서가 문자열 순서와 같은 정수 코드 (lexsort / 그룹 경계 계산용)
+    """
+    if _is_str_categorical(s):
+        return s.cat.codes.to_numpy()
+    return pd.factorize(s.astype(str), sort=True)[0]
+
+
+def map_keys(s: pd.Series, mapping: Dict[str, object], default=np.nan) -> pd.Series:
+    """
+    키 → 값 매핑 (Categorical은 카테고리 단위로 한 번만 매핑 후 코드로 펼침)
+    """
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.map(mapping).fillna(default)
+    # 코드 -1(NaN)은 마지막 칸(default)을 가리킴
+    lut = np.array([mapping.get(c, default) for c in s.cat.categories] + [default], dtype=object)
+    return pd.Series(lut[s.cat.codes.to_numpy()], index=s.index).infer_objects()
@@ -0,0 +1,243 @@
+"""
+anomaly_model.py
+
+- 코스트센터 이상탐지용 IF + LOF 앙상블을 학습해 버전 붙은 아티팩트로 저장
+  (StandardScaler / IsolationForest / novelty 모드 LocalOutlierFactor)
+- 점수 전용(score-only) 모드: 저장된 모델로 신규 월 행만 점수 계산
+  (LOF 정규화 구간, 플래그 임계값은 학습 데이터 기준으로 고정)
+- 재학습 정책: 요청 시(force) 또는 학습 이후 이력이 N개월 이상 늘었을 때
+
+[NOTE] 전체 이력 재계산(run_ensemble_outlier)은 기존대로 매번 학습.
+       이 모듈은 신규 월 증분 경로에서만 사용.
+"""
+
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.neighbors import LocalOutlierFactor
+from sklearn.preprocessing import StandardScaler
+
+# =========================================================
+# 기본 설정
+# =========================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODEL_PATH = os.path.join(BASE_DIR, "cost_anomaly_ensemble.pkl")
+
+# 아티팩트 구조가 바뀌면 올림(다른 버전 파일은 재학습 대상)
+ANOMALY_MODEL_VERSION = 1
+
+# [CFG] 학습 이후 이력이 이만큼(개월) 늘어나면 재학습
+RETRAIN_AFTER_MONTHS = 3
+
+DEFAULT_CONTAMINATION = 0.05
+DEFAULT_RANDOM_STATE = 42
+
+
+# =========================================================
+# 유틸 함수
+# =========================================================
+
+def _ym_to_index(ym: str) -> int:
+    s = str(ym)
+    return int(s[:4]) * 12 + int(s[5:7]) - 1
+
+
+def _feature_matrix(df: pd.DataFrame, feature_cols: List[str]) -> np.ndarray:
+    return df.reindex(columns=feature_cols).fillna(0.0).to_numpy(dtype=float)
+
+
+def _combine_scores(payload: Dict[str, Any], iso_scores: np.ndarray, lof_raw: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    run_ensemble_outlier와 같은 방식으로 점수 결합
+    (단, LOF 정규화 min/max는 학습 데이터 기준)
+    """
+    lof_min = payload["lof_raw_min"]
+    lof_max = payload["lof_raw_max"]
+    lof_scores = -(lof_raw - lof_min) / (lof_max - lof_min + 1e-6)
+    final_score = 0.5 * iso_scores + 0.5 * lof_scores
+    return {"iso_score": iso_scores, "lof_score": lof_scores, "anomaly_score": final_score}
+
+
+# =========================================================
+# 학습 / 점수
+# =========================================================
+
+def fit_anomaly_models(
+    df: pd.DataFrame,
+    feature_cols: List[str],
+    last_ym: Optional[str] = None,
+    contamination: float = DEFAULT_CONTAMINATION,
+    random_state: int = DEFAULT_RANDOM_STATE,
+) -> Dict[str, Any]:
+    """
+    이력 피처 행 전체로 scaler / IF / novelty LOF 학습 후 아티팩트 dict 반환
+    """
+    X = _feature_matrix(df, feature_cols)
+    if len(X) < 2:
+        raise ValueError("이상탐지 모델 학습에 필요한 이력 행이 부족합니다.")
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    iso = IsolationForest(
+        n_estimators=300,
+        max_samples="auto",
+        contamination=contamination,
+        random_state=random_state,
+        n_jobs=-1
+    )
+    iso.fit(X_scaled)
+
+    lof = LocalOutlierFactor(
+        n_neighbors=min(20, len(X) - 1),
+        contamination=contamination,
+        novelty=True,
+        n_jobs=-1
+    )
+    lof.fit(X_scaled)
+
+    payload: Dict[str, Any] = {
+        "version": ANOMALY_MODEL_VERSION,
+        "feature_cols": list(feature_cols),
+        "scaler": scaler,
+        "iso": iso,
+        "lof": lof,
+        "contamination": float(contamination),
+        "lof_raw_min": float(lof.negative_outlier_factor_.min()),
+        "lof_raw_max": float(lof.negative_outlier_factor_.max()),
+        "last_ym": str(last_ym) if last_ym else None,
+        "n_train": int(len(X)),
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    # 임계값: 학습 데이터 점수 분포의 (1 - contamination) 분위수
+    train_scores = _combine_scores(
+        payload,
+        -iso.decision_function(X_scaled),
+        lof.negative_outlier_factor_,
+    )["anomaly_score"]
+    payload["threshold"] = float(np.quantile(train_scores, 1 - contamination))
+    return payload
+
+
+def score_anomaly(payload: Dict[str, Any], df: pd.DataFrame) -> pd.DataFrame:
+    """
+    점수 전용 모드: 저장된 모델로 df 행만 점수 계산
+    iso_score / lof_score / anomaly_score / anomaly_flag 컬럼 추가
+    """
+    df = df.copy()
+    if df.empty:
+        for col in ["iso_score", "lof_score", "anomaly_score"]:
+            df[col] = pd.Series(dtype=float)
+        df["anomaly_flag"] = pd.Series(dtype=bool)
+        return df
+
+    X_scaled = payload["scaler"].transform(_feature_matrix(df, payload["feature_cols"]))
+    scores = _combine_scores(
+        payload,
+        -payload["iso"].decision_function(X_scaled),
+        payload["lof"].score_samples(X_scaled),
+    )
+    for col, values in scores.items():
+        df[col] = values
+    df["anomaly_flag"] = df["anomaly_score"] >= payload["threshold"]
+    return df
+
+
+# =========================================================
+# 저장 / 로딩 / 재학습 정책
+# =========================================================
+
+def save_anomaly_models(payload: Dict[str, Any], path: str = MODEL_PATH) -> None:
+    # 임시 파일명에 pid/스레드를 넣어 여러 워커가 동시에 재학습해도 서로의 쓰기를 덮지 않게 함
+    suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    # 직전 아티팩트는 .bak 으로 한 세대 보관
+    if os.path.exists(path):
+        tmp_bak = f"{path}.bak.{suffix}"
+        shutil.copyfile(path, tmp_bak)
+        os.replace(tmp_bak, f"{path}.bak")
+    tmp_path = f"{path}.{suffix}"
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def artifact_stamp(path: str = MODEL_PATH) -> Optional[Tuple[int, int]]:
+    """
+    아티팩트 파일 (mtime_ns, 크기), 없으면 None → 다른 워커가 재학습·저장했는지 확인용
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return int(st.st_mtime_ns), int(st.st_size)
+
+
+def load_anomaly_models(path: str = MODEL_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception as e:
+        print("[anomaly_model] load error:", e)
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != ANOMALY_MODEL_VERSION:
+        return None
+    return payload
+
+
+def needs_retrain(
+    payload: Optional[Dict[str, Any]],
+    feature_cols: List[str],
+    last_ym: Optional[str],
+    retrain_after_months: int = RETRAIN_AFTER_MONTHS,
+) -> bool:
+    if payload is None:
+        return True
+    if list(payload.get("feature_cols") or []) != list(feature_cols):
+        return True
+    if not last_ym:
+        return False
+    if not payload.get("last_ym"):
+        return True
+    return _ym_to_index(last_ym) - _ym_to_index(payload["last_ym"]) >= int(retrain_after_months)
+
+
+def model_stamp(payload: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    """
+    결과 캐시 키용 모델 식별값 (학습마다 달라짐: 학습 시각 + 학습 구간 + 임계값)
+    """
+    if payload is None:
+        return None
+    return (
+        payload.get("version"),
+        payload.get("trained_at"),
+        payload.get("last_ym"),
+        payload.get("n_train"),
+        payload.get("threshold"),
+    )
+
+
+def model_info(payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    API 응답용 요약 (모델 객체 제외)
+    """
+    if payload is None:
+        return {"trained": False}
+    return {
+        "trained": True,
+        "version": payload.get("version"),
+        "last_ym": payload.get("last_ym"),
+        "n_train": payload.get("n_train"),
+        "trained_at": payload.get("trained_at"),
+        "threshold": payload.get("threshold"),
+        "retrain_after_months": RETRAIN_AFTER_MONTHS,
+    }
@@ -0,0 +1,517 @@
+"""
+월별 코스트센터 엑셀 → 컬럼형(Parquet) 저장소
+
+- centercost_data의 월별 엑셀을 한 번만 파싱해 파일별 Parquet 파티션으로 저장
+- manifest.json: 원본 파일명 / 크기 / mtime_ns / sha256 / 파티션 파일 / 행 수
+- 이후 로딩은 Parquet 파티션만 읽고, 변경(크기·mtime 다름 + 해시 다름)된 파일만 다시 파싱
+  (크기·mtime만 바뀌고 내용이 같으면 매니페스트만 갱신)
+- pyarrow가 없으면 pickle 파티션으로 저장(동작은 동일, 속도만 차이)
+- 새로 파싱할 파일이 여러 개면 프로세스 풀로 병렬 파싱(워커 수: MONTHLY_INGEST_WORKERS, 기본 CPU 코어 수)
+  결과는 항상 파일명 순서로 매니페스트에 기록, 파일별 오류는 출력 후 건너뜀
+  다른 스레드가 있는 프로세스(서버 요청 중)에서는 fork하지 않고 순차 파싱(일괄 적재는 warm_cache.py)
+- 동기화 전체를 저장소 폴더의 .lock 파일 락(flock)으로 감쌈 → gunicorn 워커가 동시에 불러도
+  한 워커만 파싱·매니페스트 갱신·파티션 정리, 나머지는 끝난 매니페스트를 그대로 사용
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from file_lock import file_lock
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except ImportError:
+    _HAS_PARQUET = False
+
+MONTHLY_STORE_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+LOCK_NAME = ".lock"
+
+INGEST_WORKERS = int(os.environ.get("MONTHLY_INGEST_WORKERS", os.cpu_count() or 1))
+
+SOURCE_EXTS = (".xlsx", ".xls")
+
+_store_lock = threading.Lock()
+
+
+# ============================================================
+# 0. 단일 월 엑셀 파싱 (유연 파서)
+# ============================================================
+def _normalize_year_month_label(label: str) -> Tuple[str, int, int]:
+    s = str(label)
+
+    # 1) "2024년 4월" / "2024년4월" / "2024년 10 월" 전부 허용
+    m = re.search(r"(20\d{2})\s*년\s*([0-9]{1,2})\s*월", s)
+    if not m:
+        # 2) 보조: "2024-04", "2024/04" 같은 형식도 허용
+        m = re.search(r"(20\d{2})\D+([0-9]{1,2})\b", s)
+
+    if not m:
+        raise ValueError(f"연-월 정보를 찾을 수 없습니다: {label}")
+
+    year = int(m.group(1))
+    month = int(m.group(2))
+    if not (1 <= month <= 12):
+        raise ValueError(f"월(month) 값이 범위를 벗어났습니다: {label}")
+
+    ym = f"{year:04d}-{month:02d}"
+    return ym, year, month
+
+
+# 스트리밍 파서에서 pandas.read_excel과 같은 값을 NaN으로 보기 위한 목록
+_EXCEL_ERROR_VALUES = {"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"}
+# pandas 2.0.3 read_excel/read_csv 기본 NA 문자열(pandas._libs.parsers.STR_NA_VALUES)과 같은 목록
+# (비공개 API라 직접 import하지 않음 - pandas를 올리면 기본 목록이 바뀌었는지 확인)
+_NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+_MONTH_HEADER_RE = re.compile(r"20\d{2}\s*년\s*\d{1,2}\s*월")
+
+PARSED_COLS = [
+    "cost_center", "cc_name", "account_code", "account_name",
+    "amount", "year_month", "year", "month", "cost_nature",
+]
+
+
+def _cell_value(v):
+    """
+    openpyxl values_only 값 → pandas.read_excel 과 같은 스칼라(NA는 None)
+    """
+    if v is None:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, str) and (v in _NA_STRINGS or v in _EXCEL_ERROR_VALUES):
+        return None
+    return v
+
+
+def _header_columns(header: List[Any]) -> Optional[Dict[str, int]]:
+    """
+    첫 행(헤더)에서 컬럼 위치 결정. 스트리밍으로 처리할 수 없는 헤더면 None
+      - 'YYYY년 MM월' 컬럼이 없음(마지막 컬럼 fallback은 전체 폭을 알아야 함)
+      - 사용할 컬럼의 헤더가 비어 있음(pandas에서 숫자 dtype이 될 수 있음)
+    """
+    header_str = ["nan" if v is None else str(v) for v in header]
+
+    month_col_idx = None
+    for i, v in enumerate(header_str):
+        if _MONTH_HEADER_RE.search(v):
+            month_col_idx = i
+            break
+    if month_col_idx is None:
+        return None
+
+    def find_col(keyword_list, default_idx):
+        for i, v in enumerate(header_str):
+            for kw in keyword_list:
+                if kw in v:
+                    return i
+        return default_idx
+
+    rename_map = {
+        find_col(["코스트센터코드", "코스트센터 코드", "코스트센터"], 0): "cost_center",
+        find_col(["코스트센터명", "코스트센터 명"], 1): "cc_name",
+        find_col(["계정코드", "계정 코드"], 2): "account_code",
+        find_col(["계정명", "계정 명"], 3): "account_name",
+        month_col_idx: "amount",
+    }
+    cols = {name: idx for idx, name in rename_map.items()}
+    if any(idx >= len(header) or header[idx] is None for idx in cols.values()):
+        return None
+    cols["__month_label__"] = month_col_idx
+    return cols
+
+
+def parse_single_month_excel(file_stream: io.BytesIO) -> pd.DataFrame:
+    """
+    단일 월 코스트센터 엑셀 파싱 (openpyxl read-only 스트리밍)
+      - 첫 행에서 헤더/‘YYYY년 MM월’ 컬럼을 찾고, 이후 행은 필요한 5개 셀만 읽어 컬럼 배열로 바로 적재
+      - 결과는 pandas.read_excel 기반 파서(_parse_single_month_excel_frame)와 동일
+      - openpyxl로 열 수 없는 파일(.xls 등)이나 비정형 헤더는 pandas 파서로 처리
+    """
+    try:
+        wb = load_workbook(file_stream, read_only=True, data_only=True, keep_links=False)
+    except Exception:
+        file_stream.seek(0)
+        return _parse_single_month_excel_frame(file_stream)
+
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+
+        header = [_cell_value(v) for v in next(rows, ())]
+        cols = _header_columns(header)
+        if cols is None:
+            file_stream.seek(0)
+            return _parse_single_month_excel_frame(file_stream)
+
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+
+        i_cc, i_ccn = cols["cost_center"], cols["cc_name"]
+        i_acc, i_accn = cols["account_code"], cols["account_name"]
+        i_amt = cols["amount"]
+        need = max(i_cc, i_ccn, i_acc, i_accn, i_amt) + 1
+
+        cc_list: List[str] = []
+        ccn_list: List[str] = []
+        acc_list: List[str] = []
+        accn_list: List[str] = []
+
+        # 금액은 코스트센터가 빈 행까지 모아 변환(pandas 파서와 같은 dtype이 되도록), 이후 keep으로 선택
+        amt_list: List[Any] = []
+        keep: List[bool] = []
+        pending_empty = 0
+        has_gap_nan = False
+
+        def _text(v) -> str:
+            return "nan" if v is None else str(v).strip()
+
+        for row in rows:
+            # 전체 폭(헤더 포함 가장 긴 행, 끝의 빈 셀 제외) 추적 → 컬럼 수 검사용
+            n = len(row)
+            while n and (row[n - 1] is None or row[n - 1] == ""):
+                n -= 1
+            if n > width:
+                width = n
+            if n == 0:
+                # 중간의 빈 행은 pandas에서 금액 NaN 행(→ float), 끝의 빈 행은 잘림
+                pending_empty += 1
+                continue
+            if pending_empty:
+                has_gap_nan = True
+                pending_empty = 0
+
+            if len(row) < need:
+                row = tuple(row) + (None,) * (need - len(row))
+
+            v = _cell_value(row[i_amt])
+            amt_list.append(np.nan if v is None else v)
+
+            cc = _text(_cell_value(row[i_cc]))
+            keep.append(cc != "nan")
+            if cc == "nan":
+                continue
+            cc_list.append(cc)
+            ccn_list.append(_text(_cell_value(row[i_ccn])))
+            acc_list.append(_text(_cell_value(row[i_acc])))
+            accn_list.append(_text(_cell_value(row[i_accn])))
+    finally:
+        wb.close()
+
+    if width < 5:
+        raise ValueError("예상보다 적은 컬럼 수입니다. 업로드 양식을 확인하세요.")
+
+    year_month, year, month = _normalize_year_month_label(header[cols["__month_label__"]])
+
+    amount = pd.to_numeric(pd.Series(amt_list, dtype=object), errors="coerce")
+    if has_gap_nan:
+        amount = amount.astype(float)
+    amount = amount[np.asarray(keep, dtype=bool)].reset_index(drop=True)
+
+    n = len(cc_list)
+    df = pd.DataFrame(
+        {
+            "cost_center": cc_list,
+            "cc_name": ccn_list,
+            "account_code": acc_list,
+            "account_name": accn_list,
+            "amount": amount,
+            "year_month": [year_month] * n,
+            "year": np.full(n, year, dtype=np.int64),
+            "month": np.full(n, month, dtype=np.int64),
+            "cost_nature": ["기타"] * n,
+        },
+        columns=PARSED_COLS,
+    )
+    return df
+
+
+def _parse_single_month_excel_frame(file_stream: io.BytesIO) -> pd.DataFrame:
+    """
+    pandas.read_excel 기반 파서 (.xls 등 openpyxl로 못 여는 파일 / 헤더가 비정형인 파일용)
+    """
+    raw = pd.read_excel(file_stream, header=None)
+
+    if raw.shape[1] < 5:
+        raise ValueError("예상보다 적은 컬럼 수입니다. 업로드 양식을 확인하세요.")
+
+    header = raw.iloc[0]
+    header_str = header.astype(str)
+
+    month_col_idx = None
+    for i, v in enumerate(header_str):
+        if re.search(r"20\d{2}\s*년\s*\d{1,2}\s*월", v):
+            month_col_idx = i
+            break
+    if month_col_idx is None:
+        month_col_idx = raw.shape[1] - 1
+
+    month_label = header.iloc[month_col_idx]
+    year_month, year, month = _normalize_year_month_label(month_label)
+
+    df = raw.iloc[1:].copy()
+
+    def find_col(keyword_list, default_idx):
+        for i, v in enumerate(header_str):
+            for kw in keyword_list:
+                if kw in v:
+                    return i
+        return default_idx
+
+    cc_code_idx = find_col(["코스트센터코드", "코스트센터 코드", "코스트센터"], 0)
+    cc_name_idx = find_col(["코스트센터명", "코스트센터 명"], 1)
+    acc_code_idx = find_col(["계정코드", "계정 코드"], 2)
+    acc_name_idx = find_col(["계정명", "계정 명"], 3)
+
+    rename_map = {
+        cc_code_idx: "cost_center",
+        cc_name_idx: "cc_name",
+        acc_code_idx: "account_code",
+        acc_name_idx: "account_name",
+        month_col_idx: "amount",
+    }
+
+    df = df.rename(columns=rename_map)
+
+    needed_cols = ["cost_center", "cc_name", "account_code", "account_name", "amount"]
+    missing = [c for c in needed_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼이 누락되었습니다: {', '.join(missing)}")
+
+    df = df[needed_cols]
+
+    for col in ["cost_center", "cc_name", "account_code", "account_name"]:
+        df[col] = df[col].astype(str).str.strip()
+
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+
+    df["year_month"] = year_month
+    df["year"] = year
+    df["month"] = month
+
+    if "cost_nature" not in df.columns:
+        df["cost_nature"] = "기타"
+
+    df = df[df["cost_center"].notna() & (df["cost_center"].astype(str) != "nan")]
+    return df.reset_index(drop=True)
+
+
+# ============================================================
+# 1. 유틸
+# ============================================================
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _partition_ext() -> str:
+    return ".parquet" if _HAS_PARQUET else ".pkl"
+
+
+def _tmp_path(path: Path) -> Path:
+    # pid/스레드별 임시 파일(다른 프로세스의 쓰기와 겹치지 않음)
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _write_partition(df: pd.DataFrame, path: Path) -> None:
+    tmp_path = _tmp_path(path)
+    if path.suffix == ".parquet":
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_partition(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _load_manifest(store_dir: Path) -> Dict[str, Any]:
+    path = store_dir / MANIFEST_NAME
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MONTHLY_STORE_VERSION:
+                return manifest
+        except Exception as e:
+            print("[monthly_store] manifest load error:", e)
+    return {"version": MONTHLY_STORE_VERSION, "files": {}}
+
+
+def _save_manifest(store_dir: Path, manifest: Dict[str, Any]) -> None:
+    path = store_dir / MANIFEST_NAME
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_source_files(src_dir: Path, exts: Tuple[str, ...] = SOURCE_EXTS) -> List[str]:
+    return [f for f in sorted(os.listdir(str(src_dir))) if f.lower().endswith(exts)]
+
+
+# ============================================================
+# 2. 파일 1개 변환 (프로세스 풀 워커에서도 실행)
+# ============================================================
+def _ingest_file(
+    job: Tuple[str, str, str, int, int, str],
+    parse_fn: Callable[[io.BytesIO], pd.DataFrame],
+) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    job: (파일명, 원본 경로, 저장소 경로, 크기, mtime_ns, sha256)
+    반환: (파일명, 매니페스트 항목 또는 None, 오류 메시지 또는 None)
+    """
+    fname, fpath, store_dir, size, mtime_ns, sha = job
+    try:
+        with open(fpath, "rb") as f:
+            df = parse_fn(io.BytesIO(f.read()))
+        partition = f"{sha[:16]}{_partition_ext()}"
+        _write_partition(df, Path(store_dir) / partition)
+    except Exception as e:
+        return fname, None, str(e)
+
+    entry = {
+        "size": int(size),
+        "mtime_ns": int(mtime_ns),
+        "sha256": sha,
+        "partition": partition,
+        "rows": int(len(df)),
+    }
+    return fname, entry, None
+
+
+def _run_ingest_jobs(
+    jobs: List[Tuple[str, str, str, int, int, str]],
+    parse_fn: Callable[[io.BytesIO], pd.DataFrame],
+    workers: int,
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    jobs 순서 그대로 결과 반환(병렬이어도 순서 고정)
+    """
+    workers = max(1, min(int(workers), len(jobs)))
+    # fork는 스레드가 하나뿐일 때만(요청 스레드 / 작업 스레드에서 부르면 순차 파싱, pipeline_executor와 같은 규칙)
+    if workers <= 1 or threading.active_count() > 1:
+        return [_ingest_file(job, parse_fn) for job in jobs]
+
+    fn = partial(_ingest_file, parse_fn=parse_fn)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, jobs))
+
+
+# ============================================================
+# 3. 동기화(변경 파일만 재파싱) / 로딩
+# ============================================================
+def sync_monthly_store(
+    src_dir: Path,
+    store_dir: Path,
+    parse_fn: Callable[[io.BytesIO], pd.DataFrame] = parse_single_month_excel,
+    workers: Optional[int] = None,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    원본 폴더와 저장소를 맞춤
+    반환: (매니페스트, 새로 파싱한 파일명 목록)
+      - 변경 파일은 workers개 프로세스로 병렬 파싱(None이면 INGEST_WORKERS)
+      - 파싱 실패 파일은 오류 출력 후 건너뜀(매니페스트에서도 제외)
+      - 원본에서 사라진 파일의 파티션은 삭제
+    """
+    src_dir = Path(src_dir)
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    with _store_lock, file_lock(store_dir / LOCK_NAME):
+        manifest = _load_manifest(store_dir)
+        old_files: Dict[str, Any] = manifest.get("files", {})
+        new_files: Dict[str, Any] = {}
+        ingested: List[str] = []
+        jobs: List[Tuple[str, str, str, int, int, str]] = []
+
+        for fname in list_source_files(src_dir):
+            fpath = src_dir / fname
+            st = fpath.stat()
+            entry = old_files.get(fname)
+
+            if (
+                entry is not None
+                and entry["size"] == st.st_size
+                and entry["mtime_ns"] == st.st_mtime_ns
+                and (store_dir / entry["partition"]).exists()
+            ):
+                new_files[fname] = entry
+                continue
+
+            sha = file_sha256(fpath)
+            if entry is not None and entry["sha256"] == sha and (store_dir / entry["partition"]).exists():
+                new_files[fname] = {**entry, "size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+                continue
+
+            jobs.append((fname, str(fpath), str(store_dir), int(st.st_size), int(st.st_mtime_ns), sha))
+
+        results = _run_ingest_jobs(jobs, parse_fn, INGEST_WORKERS if workers is None else workers) if jobs else []
+        for fname, entry, err in results:
+            if entry is None:
+                print(f"[monthly_store] {fname} 읽는 중 오류:", err)
+                continue
+            new_files[fname] = entry
+            ingested.append(fname)
+            print(f"[monthly_store] ingested {fname}, rows={entry['rows']}")
+        new_files = {k: new_files[k] for k in sorted(new_files)}
+
+        # 더 이상 참조되지 않는 파티션 / 중단된 쓰기의 임시 파일 정리
+        # (파일 락을 잡고 있으므로 다른 워커가 쓰는 중인 파일은 없음)
+        keep = {e["partition"] for e in new_files.values()}
+        for p in store_dir.iterdir():
+            if p.suffix == ".tmp" or (p.suffix in (".parquet", ".pkl") and p.name not in keep):
+                p.unlink(missing_ok=True)
+
+        manifest = {"version": MONTHLY_STORE_VERSION, "files": new_files}
+        if ingested or new_files != old_files:
+            _save_manifest(store_dir, manifest)
+
+        return manifest, ingested
+
+
+def load_monthly_store(
+    store_dir: Path, manifest: Dict[str, Any], files: Optional[List[str]] = None
+) -> List[pd.DataFrame]:
+    """
+    매니페스트 순서(원본 파일명 정렬)대로 파티션을 읽어 source_file 컬럼을 붙여 반환
+    files: 지정하면 해당 원본 파일의 파티션만 읽음
+    """
+    store_dir = Path(store_dir)
+    wanted = None if files is None else set(files)
+    out: List[pd.DataFrame] = []
+    for fname in sorted(manifest.get("files", {})):
+        if wanted is not None and fname not in wanted:
+            continue
+        entry = manifest["files"][fname]
+        df = _read_partition(store_dir / entry["partition"])
+        df["source_file"] = fname
+        out.append(df)
+    return out
@@ -0,0 +1,165 @@
+"""
+코스트센터 단위 파티션 병렬 실행기
+
+- long DataFrame을 cost_center 기준 연속 구간(정렬 순서)으로 나눠 프로세스 풀에서 같은 단계 함수를 실행
+- 파티션은 정렬된 코스트센터의 연속 구간이고, 결과는 파티션 순서대로 이어 붙임
+  → 단계 함수가 (cost_center, ...) 순으로 정렬해 반환하면 순차 실행과 같은 행 순서
+- 워커 수: 환경변수 ANOMALY_PIPELINE_WORKERS, 1 이하이면 현재 프로세스에서 실행
+  (기본: CPU 코어 수 / WEB_CONCURRENCY(gunicorn 워커 수), 최대 MAX_DEFAULT_WORKERS
+   → 웹 워커마다 풀을 띄워도 전체 자식 프로세스 수가 코어 수 정도)
+- fork 컨텍스트: 자식이 이미 로딩된 app 모듈(단계 함수, 모델)을 그대로 물려받음
+  (spawn/forkserver는 자식마다 app.py를 다시 import → 모델 로딩 반복, __main__ 실행 시 단계 함수를 못 찾음)
+- fork는 스레드가 하나뿐일 때만: 다른 스레드가 잡은 락(logging, 캐시 락, 작업 스레드 등)이 자식에 복사되지 않도록
+  서버는 스레드를 만들기 전에 prestart_pool() (gunicorn.conf.py post_worker_init / app.py __main__)
+  그 뒤 스레드가 있는 상태에서 풀이 없으면 새로 fork하지 않고 순차 실행
+  (Python 3.11 fork 풀은 첫 작업 때 워커를 모두 띄우고 이후 다시 fork하지 않음)
+- 풀 워커가 죽으면(OOM, 시그널 → BrokenProcessPool) 그 풀은 버리고 해당 단계는 현재 프로세스에서 순차 실행
+  (스레드가 있으면 새로 fork하지 않으므로 이후에도 순차 실행, 스레드가 없으면 다음 호출 때 새 풀)
+- fork를 지원하지 않는 플랫폼(Windows 등)에서는 순차 실행
+"""
+
+import atexit
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MAX_DEFAULT_WORKERS = 4
+
+
+def _default_workers() -> int:
+    web_workers = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+    return max(1, min(MAX_DEFAULT_WORKERS, (os.cpu_count() or 1) // web_workers))
+
+
+PIPELINE_WORKERS = int(os.environ.get("ANOMALY_PIPELINE_WORKERS", _default_workers()))
+
+# 파티션 하나당 최소 행 수(너무 잘게 나누면 직렬화 비용이 더 큼)
+MIN_PARTITION_ROWS = 2000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_warned_threads = False
+
+
+def _get_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    global _pool, _pool_workers, _warned_threads
+
+    if "fork" not in mp.get_all_start_methods():
+        return None
+
+    with _pool_lock:
+        if _pool is not None and _pool_workers == workers:
+            return _pool
+
+        # 다른 스레드가 있으면 fork하지 않음(기존 풀은 이미 떠 있는 워커를 그대로 씀)
+        if threading.active_count() > 1:
+            if not _warned_threads:
+                print("[pipeline_executor] 스레드 실행 중이라 풀을 새로 띄우지 않음(순차 실행), prestart_pool()을 먼저 호출하세요")
+                _warned_threads = True
+            return _pool
+
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork"))
+        # fork 풀은 첫 작업 때 워커를 모두 fork → 스레드가 없는 지금 띄움
+        list(pool.map(abs, range(workers)))
+        _pool, _pool_workers = pool, workers
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def prestart_pool(workers: Optional[int] = None) -> int:
+    """
+    풀 워커 프로세스를 미리 모두 띄움
+      - 여러 스레드를 만들기 전에 호출하면 이후 스레드 안에서 run_partitioned를 써도 새로 fork하지 않음
+        (다른 스레드가 잡고 있던 락이 자식 프로세스에 복사되는 문제 방지)
+    반환: 띄운 워커 수(풀을 쓰지 않으면 0)
+    """
+    workers = PIPELINE_WORKERS if workers is None else int(workers)
+    pool = _get_pool(workers) if workers > 1 else None
+    return _pool_workers if pool is not None else 0
+
+
+def partition_by_center(df: pd.DataFrame, n_parts: int, key: str = "cost_center") -> List[pd.DataFrame]:
+    """
+    정렬된 코스트센터를 행 수가 비슷한 n_parts개의 연속 구간으로 나눔
+    (파티션 내 행 순서는 원본 그대로, NaN 코스트센터는 마지막 파티션)
+    """
+    if n_parts <= 1 or df.empty:
+        return [df]
+
+    codes, uniques = pd.factorize(df[key], sort=True)
+    codes = np.where(codes < 0, len(uniques), codes)
+    counts = np.bincount(codes, minlength=len(uniques) + 1)
+
+    # 누적 행 수 기준으로 구간 경계 결정
+    cum = np.cumsum(counts)
+    bounds = np.searchsorted(cum, np.arange(1, n_parts) * (cum[-1] / n_parts), side="left") + 1
+    part_of_code = np.searchsorted(np.unique(bounds), np.arange(len(counts)), side="right")
+
+    part_idx = part_of_code[codes]
+    return [df[part_idx == p] for p in np.unique(part_idx)]
+
+
+def run_partitioned(
+    df: pd.DataFrame,
+    fn: Callable[[pd.DataFrame], pd.DataFrame],
+    workers: Optional[int] = None,
+    ignore_index: bool = False,
+    key: str = "cost_center",
+) -> pd.DataFrame:
+    """
+    fn(파티션) 을 코스트센터 파티션별로 실행 후 파티션 순서대로 concat
+      - fn은 모듈 최상위 함수(또는 functools.partial)여야 함(프로세스 간 전달)
+      - ignore_index=True: 단계 함수가 인덱스를 새로 매기는 경우(merge 등) 전체 기준으로 다시 매김
+      - fn이 (DataFrame, 부가정보)를 반환하면 (concat 결과, 파티션별 부가정보 list) 반환
+    """
+    workers = PIPELINE_WORKERS if workers is None else int(workers)
+    n_parts = min(workers, max(1, len(df) // MIN_PARTITION_ROWS))
+
+    pool = _get_pool(workers) if n_parts > 1 else None
+    results = None
+    if pool is not None:
+        try:
+            results = list(pool.map(fn, partition_by_center(df, n_parts, key=key)))
+        except BrokenProcessPool as e:
+            print("[pipeline_executor] 풀 워커 비정상 종료, 풀을 버리고 순차 실행:", e)
+            _discard_pool(pool)
+    if results is None:
+        results = [fn(df)]
+
+    extras = None
+    if isinstance(results[0], tuple):
+        extras = [r[1] for r in results]
+        results = [r[0] for r in results]
+
+    if len(results) == 1:
+        out = results[0].reset_index(drop=True) if ignore_index else results[0]
+    else:
+        out = pd.concat(results, ignore_index=ignore_index)
+    return (out, extras) if extras is not None else out
@@ -0,0 +1,76 @@
+"""
+미리 직렬화·압축해 둔 JSON 응답
+
+- 응답 본문(JSON bytes)을 데이터 버전마다 한 번만 만들고 gzip / brotli로 압축해 보관
+  (원문은 보관하지 않고, 압축을 못 받는 클라이언트에만 gzip을 풀어서 보냄)
+- ETag = 원문 sha256 (강한 ETag), 인코딩별로 접미사(-br / -gz)를 붙이고
+  If-None-Match는 같은 원문이면 접미사와 관계없이 304
+- brotli 패키지가 없으면 gzip만 사용
+"""
+
+import gzip
+import hashlib
+from typing import Any, Dict, Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except ImportError:
+    _HAS_BROTLI = False
+
+GZIP_LEVEL = 9
+
+# 11은 9보다 25% 정도 작지만 수 MB JSON에서 압축 시간이 수십 배(데이터 변경 후 첫 요청이 부담)
+BROTLI_QUALITY = 9
+
+
+def compress_body(raw: bytes) -> Dict[str, Any]:
+    """
+    JSON bytes → {"etag", "size", "gzip", "br"(없으면 None)}
+    """
+    return {
+        "etag": hashlib.sha256(raw).hexdigest()[:32],
+        "size": len(raw),
+        # mtime=0: 같은 원문이면 같은 압축 결과
+        "gzip": gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0),
+        "br": brotli.compress(raw, quality=BROTLI_QUALITY) if _HAS_BROTLI else None,
+    }
+
+
+def _pick_encoding(body: Dict[str, Any]) -> Optional[str]:
+    accept = request.accept_encodings
+    if body.get("br") is not None and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def precompressed_response(body: Dict[str, Any], mimetype: str = "application/json") -> Response:
+    """
+    Accept-Encoding에 맞는 압축본으로 응답, If-None-Match가 같은 원문 ETag면 304
+    """
+    encoding = _pick_encoding(body)
+    etag = body["etag"] + {"br": "-br", "gzip": "-gz"}.get(encoding, "")
+
+    inm = request.if_none_match
+    if inm.star_tag or any(inm.contains(body["etag"] + suffix) for suffix in ("", "-br", "-gz")):
+        resp = Response(status=304)
+    else:
+        if encoding == "br":
+            data = body["br"]
+        elif encoding == "gzip":
+            data = body["gzip"]
+        else:
+            data = gzip.decompress(body["gzip"])
+        resp = Response(data, mimetype=mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+
+    resp.set_etag(etag)
+    resp.headers["Vary"] = "Accept-Encoding"
+    # 매번 재검증(304) - 데이터 버전이 바뀌면 곧바로 새 본문
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
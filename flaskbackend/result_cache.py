@@ -0,0 +1,139 @@
+"""
+분석 결과 캐시 (content-addressed, 디스크 LRU)
+
+- 키: 업로드 파일 바이트 해시 + 버전 문자열(모델/파이프라인) → sha256
+- 네임스페이스: 기준 이력 지문(centercost_data 매니페스트 해시)
+  → 이력이 바뀌면 다른 네임스페이스의 항목은 모두 삭제(명시적 무효화)
+- 용량 상한(max_bytes)을 넘으면 가장 오래 전에 사용한 항목부터 삭제
+  (사용 시각 = 파일 mtime, 적중 시 갱신)
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SUFFIX = ".pkl"
+
+
+def fingerprint(parts: Iterable[Any]) -> str:
+    """
+    bytes / str / 기타(repr) 조각들을 이어 붙인 sha256
+    """
+    h = hashlib.sha256()
+    for p in parts:
+        if isinstance(p, (bytes, bytearray, memoryview)):
+            b = bytes(p)
+        else:
+            b = repr(p).encode("utf-8")
+        h.update(len(b).to_bytes(8, "little"))
+        h.update(b)
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._namespace: Optional[str] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------
+    # 내부 유틸
+    # ------------------------------
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.directory / f"{namespace[:16]}-{key}{_SUFFIX}"
+
+    def _entries(self) -> List[Tuple[Path, int, int]]:
+        out: List[Tuple[Path, int, int]] = []
+        for p in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            out.append((p, int(st.st_size), int(st.st_mtime_ns)))
+        return out
+
+    def _sync_namespace(self, namespace: str) -> None:
+        if self._namespace == namespace:
+            return
+        removed = self.invalidate(keep_namespace=namespace)
+        if removed:
+            print(f"[result_cache] 기준 이력 변경 → {removed}개 항목 삭제")
+        self._namespace = namespace
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for p, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------
+    # 공개 API
+    # ------------------------------
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            self._sync_namespace(namespace)
+            path = self._path(namespace, key)
+            if not path.exists():
+                return None
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            except Exception as e:
+                print("[result_cache] load error:", e)
+                path.unlink(missing_ok=True)
+                return None
+            os.utime(path)
+            return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._sync_namespace(namespace)
+            path = self._path(namespace, key)
+            # 여러 워커가 같은 키를 동시에 저장해도 임시 파일이 겹치지 않게 pid/스레드 포함
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def invalidate(self, keep_namespace: Optional[str] = None) -> int:
+        """
+        keep_namespace 이외의 항목 삭제 (None이면 전체 삭제), 삭제 개수 반환
+        """
+        prefix = f"{keep_namespace[:16]}-" if keep_namespace else None
+        removed = 0
+        for p, _, _ in self._entries():
+            if prefix and p.name.startswith(prefix):
+                continue
+            try:
+                p.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            self._namespace = None
+            return self.invalidate()
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,220 @@
+"""
+분석 결과 서버측 페이지 조회 (result id + cursor)
+
+- 결과 문서는 이미 서버에 저장돼 있음(기본 분석: cache_manager, 업로드 분석: ResultCache)
+  → result id로 다시 찾고, 최근 조회한 문서만 프로세스 LRU로 보관(페이지마다 피클을 열지 않음)
+- issues / centers 목록을 필터 → 정렬 → 커서 구간으로 잘라서 반환
+- 필터·정렬한 행 번호 목록은 조건 지문별로 LRU entry에 보관(다음 페이지는 잘라내기만 함)
+- 커서 = offset + 필터·정렬 지문(base64url JSON), 결과 문서는 바뀌지 않으므로 offset으로도 안정적
+  다른 필터·정렬로 만든 커서를 쓰면 ValueError
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RESULT_LRU_SIZE = 4
+
+# 결과 하나당 보관하는 조건별 행 번호 목록 수
+ORDER_CACHE_SIZE = 16
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# 목록별 허용 필터(쉼표 목록) / 정렬 필드 / 텍스트 검색 대상
+LIST_SPECS: Dict[str, Dict[str, Any]] = {
+    "issues": {
+        "filters": {
+            "status": str,
+            "severity_rank": int,
+            "cost_center": str,
+            "account_code": str,
+            "issue_type": str,
+            "display_issue_type": str,
+        },
+        "sort": ["amount", "severity_rank", "mom_change_pct", "zscore_12", "cost_center", "account_code"],
+        "search": ["cost_center", "cc_name", "account_code", "account_name", "reason_kor", "reason_summary"],
+    },
+    "centers": {
+        "filters": {"cost_center": str},
+        "sort": ["issue_rows", "issue_ratio", "total_amount", "total_rows", "cost_center"],
+        "search": ["cost_center", "cc_name"],
+    },
+}
+
+
+# ============================================================
+# 1. 결과 문서 LRU
+# ============================================================
+class ResultLRU:
+    """
+    result id → {"result": 결과 문서, "search": 목록별 검색 문자열, "order": 조건 지문 → 행 번호 목록,
+                 "history_pos": 이력 키 → 계열 번호}
+    결과 문서는 전체 응답(jsonify)과 같은 객체일 수 있으므로 건드리지 않고, 파생 값은 entry에만 둠
+    """
+
+    def __init__(self, size: int = RESULT_LRU_SIZE):
+        self.size = int(size)
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, result_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._items.get(result_id)
+            if entry is not None:
+                self._items.move_to_end(result_id)
+                return entry
+        result = loader(result_id)
+        if result is None:
+            return None
+        return self.put(result_id, result)
+
+    def put(self, result_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {"result": result, "search": {}, "order": OrderedDict(), "history_pos": None}
+        with self._lock:
+            self._items[result_id] = entry
+            self._items.move_to_end(result_id)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return entry
+
+
+# ============================================================
+# 2. 조건 파싱 / 커서
+# ============================================================
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in str(value or "").split(",") if v.strip()]
+
+
+def parse_query(list_name: str, args: Dict[str, str]) -> Dict[str, Any]:
+    """
+    요청 인자 → {"filters", "tags", "q", "sort", "limit", "cursor"}
+      - 필터: 필드=값1,값2 (값 중 하나와 일치), tag=태그1,태그2 (reason_tags에 하나라도 포함, issues만)
+      - q: 검색 대상 필드 부분 문자열(대소문자 무시)
+      - sort: 필드 또는 -필드(내림차순), 쉼표로 여러 개, 생략 시 분석 결과 순서
+    """
+    spec = LIST_SPECS[list_name]
+    filters: Dict[str, List[Any]] = {}
+    for field, cast in spec["filters"].items():
+        values = _split(args.get(field))
+        if values:
+            try:
+                filters[field] = [cast(v) for v in values]
+            except ValueError:
+                raise ValueError(f"{field} 값이 올바르지 않습니다: {args.get(field)}")
+
+    sort: List[Tuple[str, bool]] = []
+    for item in _split(args.get("sort")):
+        desc = item.startswith("-")
+        field = item.lstrip("-+")
+        if field not in spec["sort"]:
+            raise ValueError(f"정렬할 수 없는 필드: {field} (가능: {', '.join(spec['sort'])})")
+        sort.append((field, desc))
+
+    try:
+        limit = int(args.get("limit") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError(f"limit 값이 올바르지 않습니다: {args.get('limit')}")
+
+    return {
+        "filters": filters,
+        "tags": _split(args.get("tag")) if list_name == "issues" else [],
+        "q": str(args.get("q") or "").strip().lower(),
+        "sort": sort,
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "cursor": args.get("cursor") or None,
+    }
+
+
+def _query_fingerprint(list_name: str, query: Dict[str, Any]) -> str:
+    key = [list_name, sorted(query["filters"].items()), query["tags"], query["q"], query["sort"]]
+    return hashlib.sha256(json.dumps(key, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(offset: int, fp: str) -> str:
+    raw = json.dumps({"o": int(offset), "f": fp}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fp: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except Exception:
+        raise ValueError("cursor 값이 올바르지 않습니다.")
+    if data.get("f") != fp or offset < 0:
+        raise ValueError("cursor가 현재 필터·정렬 조건과 맞지 않습니다.")
+    return offset
+
+
+# ============================================================
+# 3. 필터 / 정렬 / 페이지
+# ============================================================
+def _search_text(entry: Dict[str, Any], list_name: str) -> List[str]:
+    # 행별 검색 문자열은 결과마다 한 번만 만듦(LRU entry에 보관)
+    cache = entry["search"]
+    if list_name not in cache:
+        fields = LIST_SPECS[list_name]["search"]
+        cache[list_name] = [
+            " ".join(str(row.get(f) or "") for f in fields).lower() for row in entry["result"].get(list_name) or []
+        ]
+    return cache[list_name]
+
+
+def _sort_indices(rows: List[Dict[str, Any]], idx: List[int], sort: List[Tuple[str, bool]]) -> List[int]:
+    # 뒤쪽 키부터 안정 정렬, None은 방향과 관계없이 맨 뒤
+    for field, desc in reversed(sort):
+        present = [i for i in idx if rows[i].get(field) is not None]
+        present.sort(key=lambda i: rows[i][field], reverse=desc)
+        idx = present + [i for i in idx if rows[i].get(field) is None]
+    return idx
+
+
+def _filtered_order(entry: Dict[str, Any], list_name: str, query: Dict[str, Any]) -> List[int]:
+    rows: List[Dict[str, Any]] = entry["result"].get(list_name) or []
+    idx = list(range(len(rows)))
+    for field, values in query["filters"].items():
+        allowed = set(values)
+        idx = [i for i in idx if rows[i].get(field) in allowed]
+    if query["tags"]:
+        tags = set(query["tags"])
+        idx = [i for i in idx if tags.intersection(rows[i].get("reason_tags") or [])]
+    if query["q"]:
+        text = _search_text(entry, list_name)
+        idx = [i for i in idx if query["q"] in text[i]]
+    if query["sort"]:
+        idx = _sort_indices(rows, idx, query["sort"])
+    return idx
+
+
+def page_rows(entry: Dict[str, Any], list_name: str, query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    entry = ResultLRU.get/put 반환값
+    반환: {"total", "count", "items", "next_cursor"} (total = 필터 후 전체 건수)
+    """
+    rows: List[Dict[str, Any]] = entry["result"].get(list_name) or []
+    fp = _query_fingerprint(list_name, query)
+    offset = decode_cursor(query["cursor"], fp) if query["cursor"] else 0
+
+    # 같은 조건의 행 번호 목록은 결과마다 한 번만 만듦(지문에 목록 이름 포함)
+    order = entry["order"]
+    idx = order.get(fp)
+    if idx is None:
+        idx = _filtered_order(entry, list_name, query)
+        order[fp] = idx
+        while len(order) > ORDER_CACHE_SIZE:
+            order.popitem(last=False)
+    else:
+        order.move_to_end(fp)
+
+    end = offset + query["limit"]
+    return {
+        "total": len(idx),
+        "count": len(idx[offset:end]),
+        "items": [rows[i] for i in idx[offset:end]],
+        "next_cursor": encode_cursor(end, fp) if end < len(idx) else None,
+    }
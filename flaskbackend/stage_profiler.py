@@ -0,0 +1,175 @@
+"""
+이상탐지 파이프라인 단계별 프로파일링
+
+- 단계마다 wall 시간 / CPU 시간 / 입력·출력 행 수 / (선택) tracemalloc 최대 메모리 기록
+- 실행 1회분 기록은 ring buffer(최근 RING_SIZE건)에 보관 → 진단 API에서 조회
+- 파티션(프로세스 풀) 실행 단계는 워커에서 run_stages()로 기록 후 부모에서 merge_partition_records()로 합산
+  (wall/cpu/행 수는 합, 메모리는 최댓값)
+
+- on_stage: 단계 시작마다 단계 이름으로 호출(백그라운드 작업 진행 보고 / 취소 확인용, 예외는 그대로 전파)
+
+[NOTE] tracemalloc은 오버헤드가 커서 trace_memory=True일 때만 켬
+"""
+
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+RING_SIZE = 50
+
+_ring: deque = deque(maxlen=RING_SIZE)
+_ring_lock = threading.Lock()
+
+# tracemalloc은 프로세스 전역 → 한 번에 한 실행만 메모리 추적
+_trace_lock = threading.Lock()
+
+
+def _rows(obj: Any) -> Optional[int]:
+    if isinstance(obj, pd.DataFrame):
+        return int(len(obj))
+    if isinstance(obj, tuple) and obj and isinstance(obj[0], pd.DataFrame):
+        return int(len(obj[0]))
+    return None
+
+
+class StageProfiler:
+    def __init__(
+        self,
+        pipeline: str,
+        trace_memory: bool = False,
+        keep: bool = True,
+        exclusive: bool = True,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ):
+        self.pipeline = pipeline
+        self.on_stage = on_stage
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.records: List[Dict[str, Any]] = []
+        self.keep = keep
+        self._summary: Optional[Dict[str, Any]] = None
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+        # exclusive=False: 파티션 워커(별도 프로세스)에서는 전역 락 없이 추적
+        self._exclusive = bool(trace_memory) and exclusive
+        self.trace_memory = bool(trace_memory) and (not exclusive or _trace_lock.acquire(blocking=False))
+        self._own_trace = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_trace = True
+
+    # ------------------------------
+    # 단계 기록
+    # ------------------------------
+    def begin(self, name: str, data_in: Any = None) -> Dict[str, Any]:
+        if self.on_stage is not None:
+            self.on_stage(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        return {
+            "stage": name,
+            "rows_in": _rows(data_in),
+            "_t": time.perf_counter(),
+            "_c": time.process_time(),
+        }
+
+    def end(self, rec: Dict[str, Any], data_out: Any = None, rows_out: Optional[int] = None) -> None:
+        rec["wall_s"] = round(time.perf_counter() - rec.pop("_t"), 4)
+        rec["cpu_s"] = round(time.process_time() - rec.pop("_c"), 4)
+        rec["rows_out"] = rows_out if rows_out is not None else _rows(data_out)
+        if self.trace_memory:
+            rec["peak_mem_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        self.records.append(rec)
+
+    def run(self, name: str, fn: Callable, data: Any, *args, **kwargs) -> Any:
+        rec = self.begin(name, data)
+        out = fn(data, *args, **kwargs)
+        self.end(rec, out)
+        return out
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        self.records.extend(records)
+
+    # ------------------------------
+    # 마무리
+    # ------------------------------
+    def finish(self) -> Dict[str, Any]:
+        if self._summary is not None:
+            return self._summary
+
+        summary = {
+            "run_id": self.run_id,
+            "pipeline": self.pipeline,
+            "started_at": self.started_at,
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(time.process_time() - self._c0, 4),
+            "trace_memory": self.trace_memory,
+            "stages": list(self.records),
+        }
+
+        if self.trace_memory:
+            if self._own_trace:
+                tracemalloc.stop()
+            if self._exclusive:
+                _trace_lock.release()
+            self.trace_memory = False
+
+        if self.keep:
+            with _ring_lock:
+                _ring.append(summary)
+        self._summary = summary
+        return summary
+
+
+def run_stages(
+    df: pd.DataFrame,
+    stages: List[Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]],
+    trace_memory: bool = False,
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    단계 목록을 순서대로 실행하고 (결과, 단계 기록) 반환 (파티션 워커용)
+    """
+    prof = StageProfiler("partition", trace_memory=trace_memory, keep=False, exclusive=False)
+    for name, fn in stages:
+        df = prof.run(name, fn, df)
+    records = list(prof.records)
+    prof.finish()
+    return df, records
+
+
+def merge_partition_records(parts: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    파티션별 단계 기록을 단계 이름 기준으로 합산(등장 순서 유지)
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for records in parts:
+        for rec in records:
+            cur = merged.get(rec["stage"])
+            if cur is None:
+                merged[rec["stage"]] = {**rec, "partitions": 1}
+                continue
+            cur["partitions"] += 1
+            for k in ["wall_s", "cpu_s"]:
+                cur[k] = round(cur[k] + rec[k], 4)
+            for k in ["rows_in", "rows_out"]:
+                if cur.get(k) is not None and rec.get(k) is not None:
+                    cur[k] += rec[k]
+            if "peak_mem_mb" in rec:
+                cur["peak_mem_mb"] = max(cur.get("peak_mem_mb", 0.0), rec["peak_mem_mb"])
+    return list(merged.values())
+
+
+def recent_runs(limit: Optional[int] = None, pipeline: Optional[str] = None) -> List[Dict[str, Any]]:
+    with _ring_lock:
+        runs = list(_ring)
+    if pipeline:
+        runs = [r for r in runs if r["pipeline"] == pipeline]
+    runs.reverse()
+    return runs[:limit] if limit else runs
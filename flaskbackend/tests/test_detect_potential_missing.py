@@ -0,0 +1,123 @@
+"""
+detect_potential_missing(그룹 롤링 카운트 버전) == 기존 행 단위 루프 결과
+
+- 기준 구현(_reference_detect_potential_missing)은 벡터화 이전 cost_center.py 루프를 그대로 옮긴 것
+- centercost_data 원본은 금액이 모두 있어 플래그가 하나도 안 나오므로 금액 일부를 NaN으로 비우고
+  (행 일부를 지워 계열 중간이 빠진 경우 포함) 비교
+- 키 컬럼은 object 문자열 / Categorical(encode_keys) 둘 다 확인
+
+사용:
+    cd flaskbackend && python -m pytest -q tests
+"""
+
+import io
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from cost_center import detect_potential_missing  # noqa: E402
+from key_codec import encode_keys  # noqa: E402
+from monthly_store import parse_single_month_excel  # noqa: E402
+
+FLAG_COLS = ["suspected_missing_3m", "suspected_missing_12m", "suspected_missing"]
+
+
+def _reference_detect_potential_missing(
+    df: pd.DataFrame,
+    lookback_months: Optional[int] = None,
+    lookback_short: int = 3,
+    lookback_long: int = 12,
+) -> pd.DataFrame:
+    # 벡터화 이전 구현 (계열별 행 루프)
+    if lookback_months is not None:
+        lookback_short = int(lookback_months)
+
+    df = df.sort_values(["cost_center", "account_code", "year_month"]).copy()
+    df["year_month"] = df["year_month"].astype(str)
+
+    df["suspected_missing_3m"] = False
+    df["suspected_missing_12m"] = False
+    df["suspected_missing"] = False
+
+    for (cc, acc), grp in df.groupby(["cost_center", "account_code"], dropna=False):
+        grp = grp.sort_values("year_month")
+        values = grp["amount"].to_numpy()
+        idx = grp.index.to_numpy()
+
+        for i in range(len(grp)):
+            if not np.isnan(values[i]):
+                continue
+
+            start3 = max(0, i - lookback_short)
+            prev3 = values[start3:i]
+            if len(prev3) >= lookback_short and np.all(~np.isnan(prev3)):
+                df.loc[idx[i], "suspected_missing_3m"] = True
+
+            start12 = max(0, i - lookback_long)
+            prev12 = values[start12:i]
+            if len(prev12) >= lookback_long and np.all(~np.isnan(prev12)):
+                df.loc[idx[i], "suspected_missing_12m"] = True
+
+            if df.loc[idx[i], "suspected_missing_3m"] or df.loc[idx[i], "suspected_missing_12m"]:
+                df.loc[idx[i], "suspected_missing"] = True
+
+    return df
+
+
+@pytest.fixture(scope="module")
+def monthly_long() -> pd.DataFrame:
+    files = sorted((BASE_DIR / "centercost_data").glob("*.xlsx"))
+    if not files:
+        pytest.skip("centercost_data 없음")
+    frames = [parse_single_month_excel(io.BytesIO(f.read_bytes())) for f in files]
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def reference_cache() -> dict:
+    # 기준 루프는 느려서 (데이터 조건, lookback)마다 한 번만 계산
+    return {}
+
+
+def _blank(df: pd.DataFrame, frac: float, drop_frac: float = 0.0, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    out = df.copy()
+    out["amount"] = out["amount"].astype(float)
+    out.loc[rng.random(len(out)) < frac, "amount"] = np.nan
+    if drop_frac:
+        out = out[rng.random(len(out)) >= drop_frac]
+    return out.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("frac,drop_frac", [(0.03, 0.0), (0.2, 0.0), (0.2, 0.05)])
+@pytest.mark.parametrize("lookback_months", [None, 3, 6])
+@pytest.mark.parametrize("categorical", [False, True])
+def test_matches_reference_loop(monthly_long, reference_cache, frac, drop_frac, lookback_months, categorical):
+    df = _blank(monthly_long, frac, drop_frac)
+    key = (frac, drop_frac, lookback_months)
+    if key not in reference_cache:
+        reference_cache[key] = _reference_detect_potential_missing(df, lookback_months=lookback_months)
+    expected = reference_cache[key]
+    # 비교가 의미 있도록 플래그가 실제로 나오는 데이터인지 확인
+    assert expected["suspected_missing_3m"].any() and expected["suspected_missing_12m"].any()
+
+    src = encode_keys(df.copy()) if categorical else df
+    got = detect_potential_missing(src, lookback_months=lookback_months)
+
+    assert list(got.index) == list(expected.index)
+    for col in FLAG_COLS:
+        assert got[col].dtype == bool
+        np.testing.assert_array_equal(got[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+    assert (got["year_month"].astype(str).to_numpy() == expected["year_month"].to_numpy()).all()
+
+
+def test_no_nan_means_no_flags(monthly_long):
+    got = detect_potential_missing(monthly_long.copy(), lookback_months=3)
+    assert not got[FLAG_COLS].any().any()
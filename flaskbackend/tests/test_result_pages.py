@@ -0,0 +1,221 @@
+"""
+result_pages 서버측 페이지 조회 (result id + cursor)
+
+- 페이지 연속성: next_cursor를 따라가며 모은 행 == 한 번에 조회한 행 (중복·누락 없음)
+- 정렬 안정성: 같은 값은 분석 결과 순서 유지(내림차순 포함), None은 방향과 관계없이 맨 뒤
+- 잘못된 cursor / 다른 조건으로 만든 cursor → ValueError, 엔드포인트에서는 400
+
+사용:
+    cd flaskbackend && python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from result_pages import MAX_PAGE_SIZE, ResultLRU, encode_cursor, page_rows, parse_query  # noqa: E402
+
+# 금액은 일부러 같은 값(동률)과 None을 섞음
+AMOUNTS = [300, 100, None, 200, 100, 500, 200, None, 100, 400, 300, 0, 250, 100, None, 50, 200, 700, 300, 10, 100, 60, 90]
+
+
+def _issue(i: int, amount):
+    return {
+        "row": i,
+        "cost_center": f"CC{i % 4}",
+        "cc_name": f"센터{i % 4}",
+        "account_code": f"{5000 + i}",
+        "account_name": f"계정{i}",
+        "amount": amount,
+        "severity_rank": i % 3,
+        "status": "issue" if i % 2 else "check",
+        "reason_tags": ["급증"] if i % 5 == 0 else [],
+        "reason_kor": "전월 대비 급증" if i % 5 == 0 else "",
+    }
+
+
+@pytest.fixture()
+def entry():
+    result = {
+        "summary": {"year_month": "2025-12"},
+        "issues": [_issue(i, a) for i, a in enumerate(AMOUNTS)],
+        "centers": [{"cost_center": f"CC{i}", "issue_rows": i % 2} for i in range(7)],
+    }
+    return ResultLRU().put("test-result", result)
+
+
+def _walk(entry, list_name, args, limit):
+    # next_cursor를 따라가며 전체 행 모음
+    rows, cursor, pages = [], None, 0
+    while True:
+        query = parse_query(list_name, {**args, "limit": str(limit), **({"cursor": cursor} if cursor else {})})
+        page = page_rows(entry, list_name, query)
+        assert page["count"] == len(page["items"]) <= limit
+        rows.extend(page["items"])
+        pages += 1
+        # cursor가 앞으로 가지 않으면 무한 반복 대신 실패
+        assert pages <= len(AMOUNTS) + 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, page["total"], pages
+
+
+def _rows(items):
+    return [r["row"] for r in items]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {},
+        {"sort": "-amount"},
+        {"sort": "amount,cost_center"},
+        {"sort": "-severity_rank,-amount"},
+        {"status": "issue", "sort": "-amount"},
+        {"tag": "급증"},
+        {"q": "센터1"},
+    ],
+)
+@pytest.mark.parametrize("limit", [1, 4, 7, 50])
+def test_pages_are_continuous(entry, args, limit):
+    rows, total, pages = _walk(entry, "issues", args, limit)
+    whole = page_rows(entry, "issues", parse_query("issues", {**args, "limit": str(MAX_PAGE_SIZE)}))
+
+    assert _rows(rows) == _rows(whole["items"])
+    assert len(set(_rows(rows))) == len(rows) == total == whole["total"]
+    assert pages == max(1, -(-total // limit))
+
+
+def test_filters_match_rows(entry):
+    rows, total, _ = _walk(entry, "issues", {"status": "issue", "cost_center": "CC1,CC3"}, 3)
+    expected = [i for i, _ in enumerate(AMOUNTS) if i % 2 and i % 4 in (1, 3)]
+    assert sorted(_rows(rows)) == expected
+    assert total == len(expected)
+
+
+def test_same_cursor_returns_same_page(entry):
+    first = page_rows(entry, "issues", parse_query("issues", {"sort": "-amount", "limit": "5"}))
+    args = {"sort": "-amount", "limit": "5", "cursor": first["next_cursor"]}
+    again = [page_rows(entry, "issues", parse_query("issues", args)) for _ in range(2)]
+    assert _rows(again[0]["items"]) == _rows(again[1]["items"])
+    assert not set(_rows(first["items"])) & set(_rows(again[0]["items"]))
+
+
+def test_sort_keeps_original_order_for_ties(entry):
+    for sort in ("amount", "-amount"):
+        items = page_rows(entry, "issues", parse_query("issues", {"sort": sort, "limit": str(MAX_PAGE_SIZE)}))["items"]
+        amounts = [r["amount"] for r in items]
+        present = [a for a in amounts if a is not None]
+
+        # None은 방향과 관계없이 맨 뒤(원래 순서 유지)
+        assert amounts[len(present):] == [None] * (len(amounts) - len(present))
+        assert _rows(items[len(present):]) == [i for i, a in enumerate(AMOUNTS) if a is None]
+        assert present == sorted(present, reverse=sort.startswith("-"))
+
+        # 같은 금액끼리는 분석 결과 순서(row 오름차순) 유지
+        for value in set(present):
+            tied = [r["row"] for r in items if r["amount"] == value]
+            assert tied == sorted(tied)
+
+
+def test_multi_key_sort(entry):
+    items = page_rows(entry, "issues", parse_query("issues", {"sort": "-severity_rank,amount", "limit": "100"}))["items"]
+    keys = [(r["severity_rank"], r["amount"], r["row"]) for r in items]
+    expected = sorted(
+        keys,
+        key=lambda k: (-k[0], k[1] is None, k[1] if k[1] is not None else 0, k[2]),
+    )
+    assert keys == expected
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        "!!!",
+        encode_cursor(5, "other-fingerprint"),
+    ],
+)
+def test_invalid_cursor_raises(entry, cursor):
+    with pytest.raises(ValueError):
+        page_rows(entry, "issues", parse_query("issues", {"cursor": cursor}))
+
+
+def test_cursor_from_other_query_raises(entry):
+    page = page_rows(entry, "issues", parse_query("issues", {"sort": "-amount", "limit": "5"}))
+    with pytest.raises(ValueError):
+        page_rows(entry, "issues", parse_query("issues", {"sort": "amount", "limit": "5", "cursor": page["next_cursor"]}))
+    with pytest.raises(ValueError):
+        page_rows(entry, "centers", parse_query("centers", {"limit": "5", "cursor": page["next_cursor"]}))
+
+
+# ============================================================
+# 엔드포인트 (/api/cost-center/results/<result_id>/<list_name>)
+# ============================================================
+@pytest.fixture(scope="module")
+def client():
+    import models.closing_forecast_model as forecast_model
+
+    # 예측(Prophet) 모델은 이 테스트와 무관 → import 때 로드/재학습(모델 파일 덮어쓰기) 생략
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(forecast_model, "load_or_train", lambda: None)
+        import app as app_module
+
+    app_module.app.config["TESTING"] = True
+    return app_module
+
+
+@pytest.fixture()
+def result_id(client, entry):
+    rid = "test-result-pages"
+    client.result_lru.put(rid, entry["result"])
+    return rid
+
+
+def test_endpoint_walks_pages(client, result_id):
+    http = client.app.test_client()
+    rows, cursor = [], None
+    for _ in range(len(AMOUNTS)):
+        url = f"/api/cost-center/results/{result_id}/issues?sort=-amount&limit=4"
+        res = http.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert res.status_code == 200
+        body = res.get_json()
+        rows.extend(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert cursor is None
+    assert len(rows) == len({r["row"] for r in rows}) == len(AMOUNTS)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "cursor=not-a-cursor",
+        "sort=-amount&cursor=" + encode_cursor(4, "other-fingerprint"),
+        "sort=no_such_field",
+        "limit=abc",
+        "severity_rank=high",
+    ],
+)
+def test_endpoint_rejects_bad_query(client, result_id, query):
+    res = client.app.test_client().get(f"/api/cost-center/results/{result_id}/issues?{query}")
+    assert res.status_code == 400
+    assert res.get_json()["ok"] is False
+
+
+def test_endpoint_rejects_cursor_from_other_sort(client, result_id):
+    http = client.app.test_client()
+    first = http.get(f"/api/cost-center/results/{result_id}/issues?sort=-amount&limit=4").get_json()
+    res = http.get(f"/api/cost-center/results/{result_id}/issues?sort=amount&limit=4&cursor={first['next_cursor']}")
+    assert res.status_code == 400
+
+
+def test_endpoint_unknown_list_or_result(client, result_id):
+    http = client.app.test_client()
+    assert http.get(f"/api/cost-center/results/{result_id}/nope").status_code == 404
+    assert http.get("/api/cost-center/results/unknown-id/issues").status_code == 404
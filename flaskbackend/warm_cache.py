@@ -0,0 +1,183 @@
+"""
+캐시 워밍업 / 일괄 적재 명령 (배포 직후·데이터 반영 후, 워커가 트래픽을 받기 전에 실행)
+
+사용:
+    python warm_cache.py                      # stale 캐시만 다시 만듦
+    python warm_cache.py --force              # 전부 처음부터 다시 만듦
+    python warm_cache.py --only costData_wide pl_report_df
+    python warm_cache.py --list               # 단계 목록만 출력
+
+순서:
+  0) app import - Prophet 모델 로딩(없으면 학습, load_or_train)
+  1) 입력 폴더 버전 계산(파일 해시 인덱스 갱신) + 월별 엑셀 적재(centercost_data → cache/monthly_store)
+  2) 파생 캐시를 스레드 풀로 병렬 갱신 (단계 묶음 안에서는 순서대로)
+     - 이상탐지: default_anomaly_result → 피처 스토어 → 금액 큐브 → IF+LOF 모델
+     - costData_wide → init_data_body / advanced_class_map / pl_report_df / 결산 기간 목록
+  3) 단계별 결과·소요 시간 출력, 하나라도 실패하면 종료 코드 1
+
+[NOTE] 파티션 프로세스 풀은 스레드를 만들기 전에 미리 띄움(prestart_pool)
+"""
+
+import argparse
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+_print_lock = threading.Lock()
+
+
+def _log(msg: str) -> None:
+    with _print_lock:
+        print(f"[warm_cache] {msg}", flush=True)
+
+
+# ============================================================
+# 단계 정의
+# ============================================================
+def _cache_step(app_mod, name: str, force: bool) -> Callable[[], str]:
+    def run() -> str:
+        status = app_mod.cache_manager.refresh([name], force=force)[name]
+        if status.startswith("error: "):
+            raise RuntimeError(status[len("error: "):])
+        return status
+
+    return run
+
+
+def _build_groups(app_mod, force: bool) -> List[List[Tuple[str, Callable[[], str]]]]:
+    """
+    단계 묶음 목록 - 묶음끼리는 병렬, 묶음 안의 단계는 순서대로
+    """
+    def feature_store() -> str:
+        store = app_mod.load_or_build_feature_store()
+        if store is None:
+            raise RuntimeError("피처 스토어를 만들지 못했습니다.")
+        return f"last_ym={store['last_ym']}"
+
+    def amount_cube() -> str:
+        cube = app_mod.get_amount_cube(app_mod.load_or_build_feature_store())
+        if cube is None:
+            raise RuntimeError("금액 큐브를 만들지 못했습니다.")
+        return f"{cube.meta['n_series']}x{cube.meta['n_months']}"
+
+    def anomaly_model() -> str:
+        payload = app_mod.get_anomaly_models(app_mod.load_or_build_feature_store(), force_retrain=force)
+        return f"last_ym={payload.get('last_ym')}"
+
+    def pl_periods() -> str:
+        from pl_cause import list_available_periods
+
+        return f"{len(list_available_periods())} period(s)"
+
+    anomaly_chain = [("default_anomaly_result", _cache_step(app_mod, "default_anomaly_result", force))]
+    anomaly_chain += [("feature_store", feature_store), ("amount_cube", amount_cube), ("anomaly_model", anomaly_model)]
+
+    # 다른 캐시를 읽어 만드는 캐시는 그 캐시 다음에 같은 묶음에서
+    after = {"init_data_body": "costData_wide"}
+
+    groups = [anomaly_chain]
+    for name in app_mod.cache_manager.cache_names():
+        if name == "default_anomaly_result" or name in after:
+            continue
+        group = [(name, _cache_step(app_mod, name, force))]
+        group += [(n, _cache_step(app_mod, n, force)) for n, dep in after.items() if dep == name]
+        groups.append(group)
+    groups.append([("pl_periods", pl_periods)])
+    return groups
+
+
+def _run_group(group: List[Tuple[str, Callable[[], str]]], results: Dict[str, Tuple[bool, str, float]]) -> None:
+    for i, (name, fn) in enumerate(group):
+        _log(f"{name} ...")
+        t = time.perf_counter()
+        try:
+            status = fn()
+            ok = True
+        except Exception as e:
+            traceback.print_exc()
+            status, ok = f"error: {e}", False
+        elapsed = time.perf_counter() - t
+        results[name] = (ok, status, elapsed)
+        _log(f"{name} {status} ({elapsed:.1f}s)")
+        if not ok:
+            # 뒤 단계는 앞 단계 결과에 의존 → 건너뜀
+            for rest, _ in group[i + 1:]:
+                results[rest] = (False, f"skipped ({name} 실패)", 0.0)
+            return
+
+
+# ============================================================
+# main
+# ============================================================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="derived cache warm-up / bulk ingest")
+    parser.add_argument("--force", action="store_true", help="신선한 캐시도 처음부터 다시 만듦")
+    parser.add_argument("--only", nargs="+", metavar="STEP", help="지정한 단계만 실행(--list로 이름 확인)")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 갱신할 단계 묶음 수")
+    parser.add_argument("--list", action="store_true", help="단계 목록만 출력")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    _log("app import (Prophet 모델 로딩 포함) ...")
+    import app as app_mod
+    from pipeline_executor import prestart_pool
+
+    _log(f"app import done ({time.perf_counter() - t0:.1f}s)")
+
+    groups = _build_groups(app_mod, args.force)
+    steps = [name for group in groups for name, _ in group]
+    if args.list:
+        for group in groups:
+            print(" -> ".join(name for name, _ in group))
+        return 0
+
+    if args.only:
+        unknown = [s for s in args.only if s not in steps]
+        if unknown:
+            _log("알 수 없는 단계: " + ", ".join(unknown))
+            return 2
+        groups = [[(n, fn) for n, fn in group if n in args.only] for group in groups]
+        groups = [g for g in groups if g]
+
+    # 1) 입력 버전 + 월별 엑셀 적재 (이후 캐시들이 모두 이 결과를 읽음)
+    t = time.perf_counter()
+    for name, version in app_mod.cache_manager.input_versions().items():
+        _log(f"input {name}: {version[:12]}")
+    try:
+        _, ingested = app_mod.sync_monthly_store(app_mod.COST_MONTHLY_DIR, app_mod.MONTHLY_STORE_DIR)
+    except Exception as e:
+        traceback.print_exc()
+        _log(f"monthly ingest error: {e}")
+        return 1
+    _log(f"monthly ingest: {len(ingested)} file(s) parsed ({time.perf_counter() - t:.1f}s)")
+
+    # 2) 파생 캐시 병렬 갱신
+    if prestart_pool():
+        _log("partition pool started")
+    results: Dict[str, Tuple[bool, str, float]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(_run_group, group, results) for group in groups]
+        for fut in as_completed(futures):
+            fut.result()
+
+    # 3) 요약
+    failed = [n for n, (ok, _, _) in results.items() if not ok]
+    print()
+    for group in groups:
+        for name, _ in group:
+            ok, status, elapsed = results[name]
+            print(f"  {'OK ' if ok else 'ERR'} {name:<24} {elapsed:7.1f}s  {status}")
+    print(f"\n total {time.perf_counter() - t0:.1f}s, failed {len(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,87 @@ import { getIconStyle, chipBase } from "./components/sidebar/sidebarStyles";
 // ===== Flask API 베이스 =====
 const API_BASE = process.env.REACT_APP_API_BASE || "http://localhost:5000";
 
+// ===== 백그라운드 작업(?async=1): 제출 → 상태 long-poll → 결과 =====
+//  - 202 + job_id면 /api/jobs/<id>?wait=초&since=version 으로 끝날 때까지 대기 후 /result
+//  - 서버가 바로 200으로 답하면(동기 처리) 그 본문을 그대로 사용
+const JOB_POLL_WAIT_S = 20;
+const JOB_TERMINAL = ["succeeded", "failed", "cancelled"];
+
+async function runBackgroundJob(path, init = {}, onStatus) {
+  const sep = path.includes("?") ? "&" : "?";
+  const res = await fetch(`${API_BASE}${path}${sep}async=1`, init);
+  const body = await res.json().catch(() => ({}));
+  if (res.status !== 202) {
+    if (!res.ok) throw new Error(body.error || `HTTP ${res.status}`);
+    return body;
+  }
+
+  let job = body;
+  while (!JOB_TERMINAL.includes(job.status)) {
+    if (onStatus) onStatus(job);
+    const st = await fetch(
+      `${API_BASE}/api/jobs/${job.job_id}?wait=${JOB_POLL_WAIT_S}&since=${job.version}`
+    );
+    const data = await st.json().catch(() => ({}));
+    if (!st.ok) {
+      throw new Error(data.error || `작업 상태 조회 실패 (HTTP ${st.status})`);
+    }
+    job = data;
+  }
+  if (onStatus) onStatus(job);
+
+  const out = await fetch(`${API_BASE}/api/jobs/${job.job_id}/result`);
+  const result = await out.json().catch(() => ({}));
+  if (!out.ok) {
+    throw new Error(result.error || `작업 결과 조회 실패 (HTTP ${out.status})`);
+  }
+  return result;
+}
+
+// ===== 분석 결과 페이지 조회 (?view=page) =====
+//  - 분석 응답은 summary + issues/centers 첫 페이지 + result_id만 (첫 화면은 작은 페이지로)
+//  - 다음 페이지는 /api/cost-center/results/<id>/issues?cursor=next_cursor
+//  - costData 등 나머지 항목은 /api/cost-center/results/<id>?fields=... 로 따로
+const RESULT_PAGE_SIZE = 50;
+
+async function fetchResultPage(resultId, listName, params = {}) {
+  const qs = new URLSearchParams({ limit: String(RESULT_PAGE_SIZE), ...params });
+  const res = await fetch(
+    `${API_BASE}/api/cost-center/results/${encodeURIComponent(resultId)}/${listName}?${qs}`
+  );
+  const body = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(body.error || `HTTP ${res.status}`);
+  return body;
+}
+
+async function fetchResultFields(resultId, fields) {
+  const res = await fetch(
+    `${API_BASE}/api/cost-center/results/${encodeURIComponent(resultId)}?fields=${fields.join(",")}`
+  );
+  const body = await res.json().catch(() => ({}));
+  if (!res.ok) throw new Error(body.error || `HTTP ${res.status}`);
+  return body;
+}
+
+// 백엔드 이슈 row → 화면용 (id는 이미 불러온 건수 다음 번호부터)
+const normalizeIssueRows = (issues, startId = 1) =>
+  issues.map((r, idx) => ({
+    ...r,
+    id: startId + idx,
+    year_month: r.year_month,
+    amount: r.amount,
+    issue_type: r.issue_type,
+    severity_rank: r.severity_rank,
+    account_code: r.account_code,
+    account_name: r.account_name,
+    cost_center: r.cost_center,
+    cc_name: r.cc_name,
+    reason_kor: r.reason_kor,
+    patternMean: r.patternMean ?? r.pattern_mean ?? r.pattern_avg ?? null,
+    patternUpper: r.patternUpper ?? r.pattern_upper ?? null,
+    patternLower: r.patternLower ?? r.pattern_lower ?? null,
+  }));
+
 // 숫자 포맷 helper
 const formatNumber = (v) =>
   typeof v === "number" ? v.toLocaleString("ko-KR") : v;
@@ -156,6 +237,84 @@ function App() {
     console.log("anomalyData length:", anomalyData ? anomalyData.length : 0);
   }, [anomalyData]);
 
+  // ==========================
+  // ✅ 분석 결과(?view=page) 반영 + 이슈 다음 페이지
+  // ==========================
+  const [issuesPageLoading, setIssuesPageLoading] = useState(false);
+  const [issuesPageError, setIssuesPageError] = useState(null);
+  // 다음 페이지 응답이 늦게 와도 그 사이 새로 분석한 결과에는 붙이지 않도록
+  const analysisSeqRef = useRef(0);
+
+  // 첫 페이지로 화면을 먼저 그림
+  //  - loadCostData: 업로드 분석 결과의 costData(업로드 월 반영)는 이어서 따로 조회
+  //    (기본 분석은 init-data의 costData를 그대로 사용)
+  const applyPagedAnalysis = (
+    result,
+    { loadCostData = false, isActive = () => true } = {}
+  ) => {
+    const page = result.issues || {};
+    const items = Array.isArray(page.items) ? page.items : [];
+    analysisSeqRef.current += 1;
+
+    setAnomalyResult({
+      result_id: result.result_id,
+      summary: result.summary,
+      issues: items,
+      issuesTotal: page.total ?? items.length,
+      issuesNextCursor: page.next_cursor || null,
+    });
+    setAnomalyData(normalizeIssueRows(items));
+    setIssuesPageError(null);
+
+    if (result.summary && result.summary.year_month) {
+      setSelectedMonth(result.summary.year_month);
+    }
+
+    if (!loadCostData || !result.result_id) return;
+    fetchResultFields(result.result_id, ["costData"])
+      .then((data) => {
+        if (!isActive()) return;
+        if (Array.isArray(data.costData) && data.costData.length > 0) {
+          setCostData(data.costData);
+        }
+      })
+      .catch((err) => console.error("costData fetch error", err));
+  };
+
+  const loadMoreIssues = async () => {
+    const cursor = anomalyResult?.issuesNextCursor;
+    if (!cursor || issuesPageLoading) return;
+
+    const seq = analysisSeqRef.current;
+    setIssuesPageLoading(true);
+    setIssuesPageError(null);
+    try {
+      const page = await fetchResultPage(anomalyResult.result_id, "issues", {
+        cursor,
+      });
+      if (seq !== analysisSeqRef.current) return;
+
+      const items = Array.isArray(page.items) ? page.items : [];
+      setAnomalyResult((prev) => ({
+        ...prev,
+        issues: [...prev.issues, ...items],
+        issuesTotal: page.total ?? prev.issuesTotal,
+        issuesNextCursor: page.next_cursor || null,
+      }));
+      setAnomalyData((prev) => [
+        ...prev,
+        ...normalizeIssueRows(items, prev.length + 1),
+      ]);
+    } catch (err) {
+      console.error("issues page fetch error", err);
+      if (seq === analysisSeqRef.current) {
+        setIssuesPageError(err.message || String(err));
+      }
+    } finally {
+      setIssuesPageLoading(false);
+    }
+  };
+
   // ==========================
   // ✅ 백엔드 초기 데이터 로드 + default 분석 + stage 전환
   // ==========================
@@ -220,50 +379,20 @@ function App() {
           setAnomalyError(null);
           setInitProgress(60);
 
-          const res2 = await fetch(
-            `${API_BASE}/api/cost-center/analyze-default`
+          // 백그라운드 작업으로 제출하고 단계 진행에 맞춰 로딩 바 갱신
+          const result = await runBackgroundJob(
+            `/api/cost-center/analyze-default?view=page&limit=${RESULT_PAGE_SIZE}`,
+            {},
+            (job) => {
+              if (!mounted) return;
+              setInitProgress(Math.min(89, 60 + (job.stages_done || 0) * 2));
+            }
           );
+          console.log("anomalyResult(default):", result);
 
-          if (!res2.ok) {
-            const msg = `analyze-default HTTP ${res2.status}`;
-            console.error(msg);
-            if (mounted) setAnomalyError(msg);
-          } else {
-            const result = await res2.json();
-            console.log("anomalyResult(default):", result);
-
-            if (!mounted) return;
-
-            setAnomalyResult(result);
-
-            const issues = Array.isArray(result.issues) ? result.issues : [];
-            const normalized = issues.map((r, idx) => ({
-              ...r,
-              id: idx + 1,
-              year_month: r.year_month,
-              amount: r.amount,
-              issue_type: r.issue_type,
-              severity_rank: r.severity_rank,
-              account_code: r.account_code,
-              account_name: r.account_name,
-              cost_center: r.cost_center,
-              cc_name: r.cc_name,
-              reason_kor: r.reason_kor,
-              patternMean:
-                r.patternMean ?? r.pattern_mean ?? r.pattern_avg ?? null,
-              patternUpper: r.patternUpper ?? r.pattern_upper ?? null,
-              patternLower: r.patternLower ?? r.pattern_lower ?? null,
-            }));
-            setAnomalyData(normalized);
-
-            if (Array.isArray(result.costData) && result.costData.length > 0) {
-              setCostData(result.costData);
-            }
+          if (!mounted) return;
 
-            if (result.summary && result.summary.year_month) {
-              setSelectedMonth(result.summary.year_month);
-            }
-          }
+          applyPagedAnalysis(result, { isActive: () => mounted });
         } catch (err2) {
           console.error("analyze-default fetch error", err2);
           if (mounted) setAnomalyError(err2.message || String(err2));
@@ -423,44 +552,16 @@ function App() {
       setAnomalyLoading(true);
       setAnomalyError(null);
 
-      const res = await fetch(`${API_BASE}/api/cost-center/analyze`, {
-        method: "POST",
-        body: formData,
-      });
-
-      if (!res.ok) throw new Error(`HTTP ${res.status}`);
-
-      const result = await res.json();
+      const result = await runBackgroundJob(
+        `/api/cost-center/analyze?view=page&limit=${RESULT_PAGE_SIZE}`,
+        {
+          method: "POST",
+          body: formData,
+        }
+      );
       console.log("[Frontend] analyze result:", result);
 
-      setAnomalyResult(result);
-
-      const issues = Array.isArray(result.issues) ? result.issues : [];
-      const normalized = issues.map((r, idx) => ({
-        ...r,
-        id: idx + 1,
-        year_month: r.year_month,
-        amount: r.amount,
-        issue_type: r.issue_type,
-        severity_rank: r.severity_rank,
-        account_code: r.account_code,
-        account_name: r.account_name,
-        cost_center: r.cost_center,
-        cc_name: r.cc_name,
-        reason_kor: r.reason_kor,
-        patternMean: r.patternMean ?? r.pattern_mean ?? r.pattern_avg ?? null,
-        patternUpper: r.patternUpper ?? r.pattern_upper ?? null,
-        patternLower: r.patternLower ?? r.pattern_lower ?? null,
-      }));
-      setAnomalyData(normalized);
-
-      if (Array.isArray(result.costData) && result.costData.length > 0) {
-        setCostData(result.costData);
-      }
-
-      if (result.summary && result.summary.year_month) {
-        setSelectedMonth(result.summary.year_month);
-      }
+      applyPagedAnalysis(result, { loadCostData: true });
 
       setCostDataUploaded(true);
 
@@ -2017,6 +2118,11 @@ function App() {
             // ✅ (추가) 백엔드 심화분류 맵 전달
             advancedByCcAcc={advancedByCcAcc}
             advancedByAcc={advancedByAcc}
+            apiBase={API_BASE}
+            // ✅ 이슈 목록 다음 페이지(cursor) 조회
+            onLoadMoreIssues={loadMoreIssues}
+            issuesPageLoading={issuesPageLoading}
+            issuesPageError={issuesPageError}
           />
         )}
 
@@ -33,6 +33,29 @@ const clampN = (text, n = 50) => {
   return s.slice(0, n - 1).trimEnd() + "…";
 };
 
+// -------------------------
+// ✅ 컬럼형 이력(backend history, layout="columnar") → { "코스트센터|계정코드": [월별 row] }
+// -------------------------
+const historyColumnsToMap = (cols) => {
+  if (!cols || cols.layout !== "columnar") return cols || {};
+  const out = {};
+  const { keys = [], offsets = [], months = [], monthIdx = [] } = cols;
+  keys.forEach((key, i) => {
+    const rows = [];
+    for (let j = offsets[i]; j < offsets[i + 1]; j += 1) {
+      rows.push({
+        month: months[monthIdx[j]],
+        amount: cols.amount[j],
+        normalUpper: cols.normalUpper[j],
+        normalLower: cols.normalLower[j],
+        anomalyFlag: Boolean(cols.anomalyFlag[j]),
+      });
+    }
+    out[key] = rows;
+  });
+  return out;
+};
+
 // -------------------------
 // ✅ 심화분류 정규화 (표기 통일)
 // - 원하는 출력: 고정비 / 변동비 / 시즌/이벤트성
@@ -250,6 +273,14 @@ export default function ClosingTab({
   // ✅ 백엔드에서 받은 맵
   advancedByCcAcc = {},
   advancedByAcc = {},
+
+  // ✅ 결과 페이지/이력 조회용 API 주소 (App.js의 API_BASE)
+  apiBase = "",
+
+  // ✅ 이슈 다음 페이지 (anomalyResult.issuesNextCursor가 있을 때)
+  onLoadMoreIssues,
+  issuesPageLoading = false,
+  issuesPageError = null,
 }) {
   const rows = closingAnalysis?.rows || [];
   const hasBackend = !!(anomalyResult && anomalyResult.summary);
@@ -327,10 +358,23 @@ export default function ClosingTab({
     boxShadow: enabled ? "0 1px 2px rgba(0,0,0,0.08)" : "none",
   });
 
+  // ✅ 계열별 이력: analyze 응답에 history가 없으면 선택한 계열만 서버에서 조회
+  const [lazyHistory, setLazyHistory] = useState({});
+  // 조회에 실패한 키 → 안내 문구 (다시 요청하지 않음)
+  const [historyErrors, setHistoryErrors] = useState({});
+
+  // 이슈 페이지를 더 불러와도(같은 result_id) 받아 둔 이력은 유지
+  const activeResultId = anomalyResult?.result_id;
+  useEffect(() => {
+    setLazyHistory({});
+    setHistoryErrors({});
+  }, [activeResultId]);
+
   const historyMap = useMemo(() => {
-    if (hasBackend && anomalyResult.history) return anomalyResult.history;
+    if (hasBackend && anomalyResult.history) return historyColumnsToMap(anomalyResult.history);
+    if (hasBackend && anomalyResult.result_id) return lazyHistory;
     return closingAnalysis?.history || {};
-  }, [hasBackend, anomalyResult, closingAnalysis]);
+  }, [hasBackend, anomalyResult, closingAnalysis, lazyHistory]);
 
   // ✅ 이슈 rows 생성
   const issueRows = useMemo(() => {
@@ -508,8 +552,14 @@ export default function ClosingTab({
     const base = anomalyResult?.summary || {};
     const baseRows = issueRows || [];
 
-    const missingCnt = baseRows.filter((r) => r.status === "issue").length;
-    const anomalyCnt = baseRows.filter((r) => r.status === "check").length;
+    // 이슈를 일부 페이지만 불러온 상태면 건수는 서버 summary 기준
+    const partial = hasBackend && !!anomalyResult.issuesNextCursor;
+    const missingCnt = partial
+      ? Number(base.missing_rows || 0)
+      : baseRows.filter((r) => r.status === "issue").length;
+    const anomalyCnt = partial
+      ? Number(base.anomaly_rows || 0)
+      : baseRows.filter((r) => r.status === "check").length;
 
     const totalRows = base.total_rows ?? base.totalRows ?? baseRows.length ?? 0;
     const okRows =
@@ -526,17 +576,70 @@ export default function ClosingTab({
       reviewed_rows: reviewedRows.length,
       issue_ratio: issueRatio,
     };
-  }, [anomalyResult, issueRows, closingKpi, reviewedRows.length]);
+  }, [hasBackend, anomalyResult, issueRows, closingKpi, reviewedRows.length]);
 
-  const historyForSelected = useMemo(() => {
-    if (!selectedIssue || !historyMap) return [];
-    let histKey = selectedIssue.key;
-    if (!histKey && selectedIssue.costCenter && selectedIssue.accountCode) {
-      histKey = `${selectedIssue.costCenter}|${selectedIssue.accountCode}`;
+  const selectedHistKey = useMemo(() => {
+    if (!selectedIssue) return null;
+    if (selectedIssue.key) return selectedIssue.key;
+    if (selectedIssue.costCenter && selectedIssue.accountCode) {
+      return `${selectedIssue.costCenter}|${selectedIssue.accountCode}`;
     }
-    if (!histKey) return [];
-    return historyMap[histKey] || [];
-  }, [selectedIssue, historyMap]);
+    return null;
+  }, [selectedIssue]);
+
+  useEffect(() => {
+    const resultId = hasBackend && !anomalyResult.history ? anomalyResult.result_id : null;
+    if (!resultId || !selectedHistKey) return;
+    if (lazyHistory[selectedHistKey] || historyErrors[selectedHistKey]) return;
+
+    const key = selectedHistKey;
+    const recordError = (message) =>
+      setHistoryErrors((prev) => ({ ...prev, [key]: message }));
+
+    let cancelled = false;
+    fetch(
+      `${apiBase}/api/cost-center/results/${encodeURIComponent(resultId)}/history?keys=${encodeURIComponent(key)}`
+    )
+      .then(async (res) => {
+        if (cancelled) return;
+        if (!res.ok) {
+          // 404 = 결과 id 만료(기준 이력이 바뀌었거나 서버 재시작)
+          recordError(
+            res.status === 404
+              ? "분석 결과가 만료되어 히스토리를 불러오지 못했습니다. 다시 분석해 주세요."
+              : `히스토리를 불러오지 못했습니다 (HTTP ${res.status}).`
+          );
+          return;
+        }
+        const data = await res.json();
+        if (cancelled) return;
+        if (!data || !data.history) {
+          recordError("히스토리를 불러오지 못했습니다.");
+          return;
+        }
+        setLazyHistory((prev) => {
+          const next = { ...prev, ...data.history };
+          // 이력이 없는 키는 빈 목록으로 기록(다시 요청하지 않음)
+          (data.missing || []).forEach((k) => {
+            next[k] = [];
+          });
+          return next;
+        });
+      })
+      .catch((err) => {
+        console.error("history fetch error", err);
+        if (!cancelled) recordError("히스토리를 불러오지 못했습니다 (서버 연결 오류).");
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [apiBase, hasBackend, anomalyResult, selectedHistKey, lazyHistory, historyErrors]);
+
+  const historyForSelected = useMemo(() => {
+    if (!selectedHistKey || !historyMap) return [];
+    return historyMap[selectedHistKey] || [];
+  }, [selectedHistKey, historyMap]);
 
   const prevMonthInfo = useMemo(() => {
     if (!selectedIssue || !historyForSelected?.length) return null;
@@ -1142,6 +1245,42 @@ export default function ClosingTab({
               </table>
             </div>
           )}
+
+          {/* ✅ 서버 페이지(cursor)로 남은 이슈 불러오기 */}
+          {hasBackend && anomalyResult.issuesNextCursor && (
+            <div
+              style={{
+                display: "flex",
+                alignItems: "center",
+                justifyContent: "center",
+                gap: 8,
+                paddingTop: 6,
+                fontSize: 10,
+                color: "#6b7280",
+              }}
+            >
+              <span>
+                {(anomalyResult.issues || []).length.toLocaleString("ko-KR")} /{" "}
+                {Number(anomalyResult.issuesTotal || 0).toLocaleString("ko-KR")}건
+              </span>
+              <button
+                type="button"
+                onClick={onLoadMoreIssues}
+                disabled={issuesPageLoading || !onLoadMoreIssues}
+                style={{
+                  ...filterBaseStyle,
+                  cursor: issuesPageLoading ? "wait" : "pointer",
+                }}
+              >
+                {issuesPageLoading ? "불러오는 중..." : "더 보기"}
+              </button>
+              {issuesPageError && (
+                <span style={{ color: "#b91c1c" }}>
+                  다음 이슈를 불러오지 못했습니다: {issuesPageError}
+                </span>
+              )}
+            </div>
+          )}
         </div>
 
         {/* 오른쪽: 선택 이슈 추이 */}
@@ -1480,6 +1619,10 @@ export default function ClosingTab({
                     </ResponsiveContainer>
                   </div>
                 </div>
+              ) : selectedHistKey && historyErrors[selectedHistKey] ? (
+                <div style={{ fontSize: 11, color: "#b91c1c" }}>
+                  {historyErrors[selectedHistKey]}
+                </div>
               ) : (
                 <div style={{ fontSize: 11, color: "#9ca3af" }}>
                   선택한 항목의 월별 히스토리가 없습니다.